@@ -32,20 +32,106 @@ class Config:
     # LLM Model
     LLM_MODEL = "qwen2.5-vl-3b-instruct"  # Small (3B)
     # LLM_MODEL = "gpt-4o-mini"   # Medium (8B)
+    LLM_TOKENIZER = None  # For stored token counts: HF name (e.g. "Qwen/Qwen2.5-VL-3B-Instruct") or "tiktoken:o200k_base"
     
     # =========================================================================
 
     # --- AUTOMATIC PATH CONFIGURATION ---
+    MODEL_NAME = EMBEDDING_MODEL  # Alias used by the indexing / retrieval scripts
     _clean_model_name = EMBEDDING_MODEL.split("/")[-1]
     
     # Collection & DB Path derived from the selected Embedding Model
     COLLECTION_NAME = f"legal_rag_{_clean_model_name}"
     QDRANT_PATH = DB_ROOT_DIR / f"qdrant_{_clean_model_name}"
+    # Qdrant server instead of the embedded local DB (e.g. "http://localhost:6333"); None = local mode at QDRANT_PATH.
+    # A server is HNSW-backed and can be searched by several processes (UI, API workers, experiments) at once.
+    QDRANT_URL = None
+    QDRANT_API_KEY = None    # Falls back to the QDRANT_API_KEY env var
+    QDRANT_PREFER_GRPC = True
+    QDRANT_GRPC_PORT = 6334
+    QDRANT_TIMEOUT = 30      # Seconds
+    QDRANT_POOL_SIZE = 16    # Keep-alive REST connections of the shared client
+    # Content hashes of what is already indexed (enables incremental re-indexing)
+    MANIFEST_PATH = DB_ROOT_DIR / f"manifest_{_clean_model_name}.json"
+    # Side store for chunk text + document metadata (keeps Qdrant payloads lean)
+    USE_DOC_STORE = False
+    DOC_STORE_PATH = DB_ROOT_DIR / f"docstore_{_clean_model_name}.sqlite"
+    # Memory-mapped float32 copy of the vectors; queries then skip with_vectors (ids + scores only)
+    USE_LOCAL_VECTORS = False
+    LOCAL_VECTORS_DIR = DB_ROOT_DIR / f"vectors_{_clean_model_name}"
+    # In-process ANN index for local mode, which otherwise scans every vector: None | "hnswlib" | "faiss"
+    # (unfiltered dense search goes to the index; Qdrant still serves payloads, filters and group-by)
+    ANN_BACKEND = None
+    ANN_INDEX_DIR = None  # None = DB_ROOT_DIR / "ann_<backend>_<model>" for the backend and model set at runtime
+    ANN_EF_SEARCH = 64                  # hnswlib ef / FAISS efSearch (HNSW) or nprobe (IVF); AnnIndex.set_ef at runtime
+    ANN_FAISS_FACTORY = "HNSW32,Flat"   # Or e.g. "IVF1024,PQ64" (trained once ANN_FAISS_TRAIN_SIZE vectors arrive)
+    ANN_FAISS_TRAIN_SIZE = 50000
+    ANN_FAISS_MAX_DELETED = 0.2         # Share of deleted-but-unremovable (HNSW) vectors that triggers a rebuild
+    # Lexical BM25 index over the chunks, fused with dense search (reciprocal rank fusion)
+    USE_BM25 = False
+    BM25_DIR = DB_ROOT_DIR / f"bm25_{_clean_model_name}"
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    BM25_TOP_K = 50   # Lexical candidates per query
+    RRF_K = 60        # Rank offset in 1 / (RRF_K + rank)
+    # Grouped retrieval: at most CHUNKS_PER_DOC chunks per judgment reach MMR / reranking (None = off)
+    CHUNKS_PER_DOC = None
+    GROUP_OVERSAMPLING = 3   # Candidates fetched per slot before collapsing by doc_id
 
     # Fixed Settings
     RERANKER_NAME = "BAAI/bge-reranker-v2-m3"
     MAX_TOKENS = 512
     SEMANTIC_THRESHOLD = 0.65 
     BATCH_SIZE = 64
+    EMBED_BATCH_SIZE = 128   # Texts per model.encode batch (sentences/chunks from many documents)
+    INDEX_DOC_BUFFER = 64    # Documents buffered before a cross-document embedding pass
+    # Per-chunk token counts (embed / rerank / llm tokenizers) in the payload, so the query path never tokenizes
+    STORE_TOKEN_COUNTS = True
+    CONTEXT_BUDGET_TOKENIZER = "embed"  # Which stored count the context token budget uses ("embed" or "llm")
+
+    # Persistent embedding cache (None = disabled), shared by indexing and retrieval
+    EMBEDDING_CACHE_DIR = None  # e.g. DB_ROOT_DIR / "embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES = 1_000_000
+    # In-memory LRU of query vectors in Retriever (0 = disabled); QUERY_CACHE_DIR persists it across restarts
+    QUERY_CACHE_SIZE = 2048
+    QUERY_CACHE_DIR = None  # e.g. DB_ROOT_DIR / "query_cache"
+    # In-memory LRU of cross-encoder scores by (normalized query, point id) (0 = disabled)
+    RERANK_CACHE_SIZE = 50_000
+    # Print the per-stage latency breakdown after every answer in run_rag.py ("stats" prints p50/p95/p99)
+    SHOW_TIMINGS = False
+    # Async RAG (RAGPipeline.arun): threads for embedding / search / reranking shared by all requests
+    RAG_CPU_WORKERS = 1
+    # Retrieve on the raw query while the rewrite LLM call is in flight. Only pays off when rewrites
+    # often keep the query, and only runs while a CPU worker is idle (needs RAG_CPU_WORKERS >= 2)
+    SPECULATIVE_RETRIEVAL = False
+    # Questions per RetrievalPipeline.run_batch call when experiment scripts prefetch retrieval
+    RETRIEVAL_BATCH_QUERIES = 16
+    # Pre-tokenized passage ids for the cross-encoder by point id (0 = disabled; tokenizes text per call)
+    RERANK_TOKEN_CACHE_SIZE = 0
+    RERANK_MAX_LENGTH = 512       # Tokens per (query, passage) pair; passages are cut at a token boundary
+    RERANK_BATCH_TOKENS = 8192    # Padded tokens per cross-encoder forward pass (pairs are length-sorted)
+    # Reranking cascade in front of RERANKER_NAME (both stages None = every MMR survivor is reranked)
+    RERANK_EXIT_MARGIN = None     # Skip reranking when the top bi-encoder similarity beats the runner-up by this much (e.g. 0.1)
+    RERANK_FIRST_PASS = None      # None, "dense" (bi-encoder similarity) or a small cross-encoder, e.g. "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANK_FIRST_PASS_KEEP = 8    # Candidates the first pass lets through to the full reranker
+
+    # Embedding backend: "torch" (SentenceTransformer) or "onnx" (ONNX Runtime, CPU)
+    EMBEDDING_BACKEND = "torch"
+    ONNX_DIR = DB_ROOT_DIR / "onnx"
+    ONNX_QUANTIZE = False     # Dynamic int8 weights
+    EMBEDDING_THREADS = None  # Intra-op threads (None = library default)
+
+    # Pipelined indexing (read -> chunk -> embed -> write)
+    PARALLEL_INDEXING = False
+    CHUNK_WORKERS = 4        # Processes for sentence splitting + tokenization
+    EMBED_WORKERS = 1        # Threads sharing the embedding model
+    QUEUE_SIZE = 8           # Files in flight between two stages (backpressure)
     HNSW_M = 16 
-    HNSW_EF = 100
\ No newline at end of file
+    HNSW_EF = 100
+
+    # Vector quantization (None | "scalar" (int8) | "binary"); originals move to disk for rescoring.
+    # Only a Qdrant server (QDRANT_URL) quantizes: embedded local mode ignores it, so it is skipped there
+    QUANTIZATION = None
+    QUANTIZATION_ALWAYS_RAM = True
+    SEARCH_OVERSAMPLING = 2.0  # Candidates fetched from the quantized index per requested hit
+    SEARCH_RESCORE = True      # Re-rank those candidates with the original float32 vectors
\ No newline at end of file
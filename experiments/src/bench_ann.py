@@ -0,0 +1,165 @@
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from indexing.src.ann_index import HnswlibIndex, FaissIndex
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+
+class AnnBenchmark(RetrievalEvaluator):
+    """
+    Embedded Qdrant (exhaustive scan) vs in-process ANN indexes on the indexed collection,
+    with the golden-dataset questions as queries.
+
+    Per setting: build / load time and size on disk, single-query latency p50 / p95 of the raw
+    search and of the Retriever path (search + payloads from Qdrant), and Recall@k against
+    exact cosine search over all vectors.
+    """
+
+    def __init__(self, backends, faiss_factories, ef_values, top_k, n_queries):
+        super().__init__()
+        self.backends = backends
+        self.faiss_factories = faiss_factories
+        self.ef_values = ef_values
+        self.top_k = top_k
+        self.n_queries = n_queries
+
+    def load_vectors(self, batch_size=1024):
+        ids, vectors = [], []
+        offset = None
+        while True:
+            points, offset = self.retriever.client.scroll(
+                Config.COLLECTION_NAME, limit=batch_size, offset=offset, with_payload=False, with_vectors=True
+            )
+            ids.extend(str(p.id) for p in points)
+            vectors.extend(p.vector for p in points)
+            if offset is None:
+                break
+        return ids, np.asarray(vectors, dtype=np.float32)
+
+    def recall(self, id_lists, exact):
+        return float(np.mean([len(set(ids) & truth) / len(truth) for ids, truth in zip(id_lists, exact)]))
+
+    @staticmethod
+    def latency(fn, queries):
+        times, results = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            results.append(fn(q))
+            times.append((time.perf_counter() - t0) * 1000)
+        return results, float(np.percentile(times, 50)), float(np.percentile(times, 95))
+
+    def build(self, index_cls, workdir, ids, vectors):
+        """Builds, saves and reopens (read-only) an index; returns it with build/load seconds and MB on disk."""
+        t0 = time.perf_counter()
+        index = index_cls(str(workdir), vectors.shape[1])
+        for start in range(0, len(ids), Config.BATCH_SIZE):
+            index.add(ids[start:start + Config.BATCH_SIZE], vectors[start:start + Config.BATCH_SIZE])
+        index.save()
+        build_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = index_cls(str(workdir), vectors.shape[1], read_only=True)
+        load_s = time.perf_counter() - t0
+        size_mb = sum(f.stat().st_size for f in workdir.iterdir()) / 1e6
+        return index, build_s, load_s, size_mb
+
+    def run(self):
+        print(f"📥 Reading vectors of {Config.COLLECTION_NAME}...")
+        ids, vectors = self.load_vectors()
+        questions = [item['question'] for item in self.load_dataset()[:self.n_queries]]
+        query_vectors = self.retriever.embed_queries(questions)
+        print(f"🚀 ANN benchmark: {len(ids)} points, dim {vectors.shape[1]}, {len(questions)} queries, top_k {self.top_k}")
+
+        # Ground truth: exact cosine top-k
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        q_normalized = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        top = np.argsort(-(q_normalized @ normalized.T), axis=1)[:, :self.top_k]
+        exact = [{ids[i] for i in row} for row in top]
+
+        rows = []
+        # --- Embedded Qdrant ---
+        def qdrant_search(q):
+            return self.retriever.client.query_points(
+                collection_name=Config.COLLECTION_NAME, query=q.tolist(), limit=self.top_k, with_payload=True
+            ).points
+        results, p50, p95 = self.latency(qdrant_search, query_vectors)
+        rows.append({
+            "backend": "qdrant-local", "ef": None, "build_s": None, "load_s": None, "disk_mb": None,
+            "search_p50_ms": round(p50, 2), "search_p95_ms": round(p95, 2),
+            "retrieve_p50_ms": round(p50, 2), "retrieve_p95_ms": round(p95, 2),
+            f"recall@{self.top_k}": round(self.recall([[str(p.id) for p in hits] for hits in results], exact), 4),
+        })
+
+        # --- ANN indexes ---
+        settings = []
+        if "hnswlib" in self.backends:
+            settings.append(("hnswlib", HnswlibIndex, None))
+        if "faiss" in self.backends:
+            settings += [(f"faiss {factory}", FaissIndex, factory) for factory in self.faiss_factories]
+
+        for name, index_cls, factory in settings:
+            if factory:
+                Config.ANN_FAISS_FACTORY = factory
+                Config.ANN_FAISS_TRAIN_SIZE = len(ids)  # train once, on the whole corpus
+            workdir = Path(tempfile.mkdtemp(prefix="bench_ann_"))
+            try:
+                print(f"🧭 Building {name}...")
+                index, build_s, load_s, size_mb = self.build(index_cls, workdir, ids, vectors)
+                self.retriever.ann_index = index
+
+                for ef in tqdm(self.ef_values, desc=name):
+                    index.set_ef(ef)
+                    results, s50, s95 = self.latency(lambda q: index.search(q, self.top_k)[0][0], query_vectors)
+                    _, r50, r95 = self.latency(lambda q: self.retriever._ann_search([q], self.top_k, False)[0], query_vectors)
+                    rows.append({
+                        "backend": name, "ef": ef,
+                        "build_s": round(build_s, 2), "load_s": round(load_s, 3), "disk_mb": round(size_mb, 1),
+                        "search_p50_ms": round(s50, 2), "search_p95_ms": round(s95, 2),
+                        "retrieve_p50_ms": round(r50, 2), "retrieve_p95_ms": round(r95, 2),
+                        f"recall@{self.top_k}": round(self.recall(results, exact), 4),
+                    })
+            except ImportError as e:
+                print(f"⚠️  Skipping {name}: {e}")
+            finally:
+                self.retriever.ann_index = None
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        df = pd.DataFrame(rows)
+        print("\n" + "="*40)
+        print(f"📊 ANN BACKENDS ({Config.MODEL_NAME}, {len(ids)} points)")
+        print("="*40)
+        print(df.to_string(index=False))
+
+        clean_name = Config.MODEL_NAME.split("/")[-1]
+        output_file = self.results_dir / f"bench_ann_{clean_name}.csv"
+        df.to_csv(output_file, index=False)
+        print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency and recall of hnswlib / FAISS vs embedded Qdrant")
+    parser.add_argument("--backends", nargs="+", default=["hnswlib", "faiss"], choices=["hnswlib", "faiss"])
+    parser.add_argument("--faiss-factories", nargs="+", default=["HNSW32,Flat", "IVF256,PQ32"])
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256], help="hnswlib ef / FAISS efSearch or nprobe")
+    parser.add_argument("--top-k", type=int, default=50, help="Candidates per query (RetrievalPipeline retrieves 50)")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    bench = AnnBenchmark(args.backends, args.faiss_factories, args.ef, args.top_k, args.queries)
+    try:
+        bench.run()
+    finally:
+        bench.retriever.close()
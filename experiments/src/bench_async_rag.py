@@ -0,0 +1,115 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from dotenv import load_dotenv
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from retrieval.src.pipeline import RetrievalPipeline
+from rag_llm.src.llm_client import LLMClient
+from rag_llm.src.rag_pipeline import RAGPipeline
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+
+class AsyncRAGBenchmark(RetrievalEvaluator):
+    """
+    Sequential RAGPipeline.run vs concurrent RAGPipeline.arun on golden-dataset questions.
+
+    Every question gets a one-turn history (the previous question) so the rewrite step and
+    speculative retrieval are exercised. Reports wall time, throughput and per-request
+    latency percentiles for each mode.
+    """
+
+    def __init__(self, n_queries, concurrency):
+        super().__init__()
+        load_dotenv()
+        api_key = os.getenv("AVALAI_API_KEY")
+        if not api_key:
+            raise ValueError("❌ AVALAI_API_KEY not found in .env")
+
+        self.n_queries = n_queries
+        self.concurrency = concurrency
+        retrieval_pipe = RetrievalPipeline(self.retriever, self.reranker, self.embedder, doc_store=self.doc_store)
+        self.rag = RAGPipeline(retrieval_pipe, LLMClient(model_name=Config.LLM_MODEL, api_key=api_key))
+
+    def conversations(self):
+        questions = [item['question'] for item in self.load_dataset()[:self.n_queries]]
+        return [
+            (q, [{"role": "user", "content": questions[i - 1]}, {"role": "assistant", "content": "..."}] if i else [])
+            for i, q in enumerate(questions)
+        ]
+
+    def run_sequential(self, conversations):
+        latencies = []
+        for query, history in conversations:
+            t0 = time.perf_counter()
+            self.rag.run(query, history)
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    async def run_concurrent(self, conversations):
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def one(query, history):
+            async with limit:
+                t0 = time.perf_counter()
+                await self.rag.arun(query, history)
+                return time.perf_counter() - t0
+
+        return await asyncio.gather(*(one(q, h) for q, h in conversations))
+
+    def run(self):
+        conversations = self.conversations()
+        print(f"🚀 Async RAG benchmark: {len(conversations)} conversations, concurrency {self.concurrency}")
+
+        # Warm-up (model load, Qdrant open) outside the timed runs
+        self.rag.run(*conversations[0])
+
+        rows = []
+        for mode in ["sequential", "async"]:
+            t0 = time.perf_counter()
+            if mode == "sequential":
+                latencies = self.run_sequential(conversations)
+            else:
+                latencies = asyncio.run(self.run_concurrent(conversations))
+            wall = time.perf_counter() - t0
+            ms = np.asarray(latencies) * 1000
+            rows.append({
+                "mode": mode,
+                "wall_s": round(wall, 2),
+                "req_per_s": round(len(conversations) / wall, 2),
+                "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                "p95_ms": round(float(np.percentile(ms, 95)), 1),
+            })
+
+        df = pd.DataFrame(rows)
+        print("\n" + "="*40)
+        print(f"📊 ASYNC RAG (workers {Config.RAG_CPU_WORKERS}, speculative {Config.SPECULATIVE_RETRIEVAL})")
+        print("="*40)
+        print(df.to_string(index=False))
+
+        output_file = self.results_dir / "bench_async_rag.csv"
+        df.to_csv(output_file, index=False)
+        print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput and latency of RAGPipeline.arun vs run")
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8, help="Conversations in flight at once (async mode)")
+    args = parser.parse_args()
+
+    bench = AsyncRAGBenchmark(args.queries, args.concurrency)
+    try:
+        bench.run()
+    finally:
+        bench.retriever.close()
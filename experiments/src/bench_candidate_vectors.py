@@ -0,0 +1,102 @@
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from indexing.src.embedding import Embedder
+from indexing.src.vector_store import LocalVectorStore
+from retrieval.src.retriever import Retriever
+
+
+class MemoEmbedder:
+    """Query vectors are computed once up front so the timings only cover search + vector transfer."""
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.model_name = embedder.model_name
+        self.is_e5 = embedder.is_e5
+        self._memo = {}
+
+    def get_dimension(self):
+        return self.embedder.get_dimension()
+
+    def embed(self, texts, is_query=False, batch_size=32):
+        key = (tuple(texts), is_query)
+        if key not in self._memo:
+            self._memo[key] = self.embedder.embed(texts, is_query=is_query, batch_size=batch_size)
+        return self._memo[key]
+
+
+def run_mode(retriever, queries, top_k: int, mode: str):
+    latencies, peaks = [], []
+    for query in queries:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        if mode == "with_vectors":
+            # Previous path: vectors in the search response, copied into a float64 array
+            hits, _ = retriever.retrieve(query, top_k=top_k, with_vectors=True)
+            vectors = np.array([h.vector for h in hits])
+        else:
+            hits, _ = retriever.retrieve(query, top_k=top_k, with_vectors=False)
+            vectors = retriever.candidate_vectors(hits)
+        latencies.append(time.perf_counter() - t0)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert len(vectors) == len(hits)
+    return {
+        "Mode": mode,
+        "Latency_p50_ms": round(np.median(latencies) * 1000, 2),
+        "Latency_p95_ms": round(np.percentile(latencies, 95) * 1000, 2),
+        "Peak_alloc_KB": round(np.median(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candidate vectors: search response vs local memmap vs targeted fetch")
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    with open(project_root / "experiments" / "data" / "golden_dataset.json", 'r', encoding='utf-8') as f:
+        queries = [item['question'] for item in json.load(f)][:args.queries]
+
+    embedder = MemoEmbedder(Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL))
+    for query in queries:
+        embedder.embed([query], is_query=True)
+
+    retriever = Retriever(str(Config.QDRANT_PATH), Config.COLLECTION_NAME, embedder)
+    try:
+        rows = [run_mode(retriever, queries, args.top_k, "with_vectors")]
+        rows.append(run_mode(retriever, queries, args.top_k, "ids_then_fetch"))
+
+        if Path(Config.LOCAL_VECTORS_DIR, "index.json").exists():
+            retriever.local_vectors = LocalVectorStore(str(Config.LOCAL_VECTORS_DIR), embedder.get_dimension(), read_only=True)
+            rows.append(run_mode(retriever, queries, args.top_k, "ids_then_local_memmap"))
+        else:
+            print(f"⚠️ No local vectors at {Config.LOCAL_VECTORS_DIR} (index with USE_LOCAL_VECTORS = True).")
+    finally:
+        retriever.close()
+
+    df = pd.DataFrame(rows)
+    print("\n" + "="*40)
+    print(f"📊 CANDIDATE VECTORS (top_k={args.top_k}, {len(queries)} queries)")
+    print("="*40)
+    print(df.to_string(index=False))
+
+    clean_name = Config.MODEL_NAME.split("/")[-1]
+    output_file = project_root / "experiments" / "logs" / f"bench_candidate_vectors_{clean_name}.csv"
+    df.to_csv(output_file, index=False)
+    print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from sklearn.metrics.pairwise import cosine_similarity
+from config.config import Config
+from indexing.src.embedding import Embedder
+from indexing.src.chunking import SemanticChunker
+from indexing.src.reader import iter_judgment_files
+
+
+class MemoEmbedder:
+    """Wraps the Embedder so both chunkers see identical vectors and the model cost is excluded."""
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self.tokenizer = embedder.tokenizer
+        self._memo = {}
+
+    def embed(self, texts, is_query=False):
+        key = tuple(texts)
+        if key not in self._memo:
+            self._memo[key] = self.embedder.embed(texts, is_query=is_query)
+        return self._memo[key]
+
+
+class LegacySemanticChunker(SemanticChunker):
+    """The previous quadratic implementation, kept here as the reference for boundaries and timing."""
+    def chunk_text(self, text: str, title: str = ""):
+        if not text: return []
+        raw_sentences = self._split_sentences(text)
+        if not raw_sentences: return []
+
+        valid_sentences = []
+        for s in raw_sentences:
+            if len(self.tokenizer.tokenize(s)) > self.max_tokens:
+                valid_sentences.extend(self._force_split(s))
+            else:
+                valid_sentences.append(s)
+
+        if not valid_sentences: return []
+        embeddings = self.embedder.embed(valid_sentences)
+
+        sims = []
+        for i in range(len(embeddings) - 1):
+            sims.append(cosine_similarity(embeddings[i].reshape(1, -1), embeddings[i+1].reshape(1, -1))[0][0])
+
+        chunks = []
+        current_chunk = [valid_sentences[0]]
+        for i in range(len(sims)):
+            next_s = valid_sentences[i+1]
+            cand_text = " ".join(current_chunk + [next_s])
+            token_count = len(self.tokenizer.tokenize(f"Title: {title}\n{cand_text}"))
+            if token_count >= self.max_tokens or (sims[i] < self.threshold and len(current_chunk) > 3):
+                chunks.append(" ".join(current_chunk))
+                overlap_start = max(0, len(current_chunk) - self.overlap)
+                current_chunk = current_chunk[overlap_start:] + [next_s]
+            else:
+                current_chunk.append(next_s)
+        if current_chunk:
+            chunks.append(" ".join(current_chunk))
+        return [f"Title: {title}\n{c}".strip() for c in chunks]
+
+
+def load_long_judgments(n_docs: int, min_chars: int):
+    """Longest processed judgments, padded with text from other judgments up to min_chars."""
+    docs = []
+    for _, item in iter_judgment_files(Config.DATA_DIR, fields=("text_full", "clean_parts.title")):
+        if item.get("text_full"):
+            docs.append((item["text_full"], item.get("clean_parts", {}).get("title", "")))
+    if not docs:
+        raise SystemExit(f"No processed judgments found in {Config.DATA_DIR}")
+
+    docs.sort(key=lambda d: len(d[0]), reverse=True)
+    rng = random.Random(13)
+    long_docs = []
+    for text, title in docs[:n_docs]:
+        # Stretch shorter texts with sentences from other judgments to reach the target length
+        while len(text) < min_chars:
+            text += "\n" + rng.choice(docs)[0]
+        long_docs.append((text, title))
+    return long_docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SemanticChunker: legacy vs linear-time implementation")
+    parser.add_argument("--docs", type=int, default=30)
+    parser.add_argument("--min-chars", type=int, default=20000)
+    args = parser.parse_args()
+
+    embedder = MemoEmbedder(Embedder(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL))
+    docs = load_long_judgments(args.docs, args.min_chars)
+
+    chunkers = {
+        "legacy": LegacySemanticChunker(embedder, max_tokens=Config.MAX_TOKENS, similarity_threshold=Config.SEMANTIC_THRESHOLD),
+        "linear": SemanticChunker(embedder, max_tokens=Config.MAX_TOKENS, similarity_threshold=Config.SEMANTIC_THRESHOLD),
+    }
+
+    # Warm-up: fills the embedding memo so only chunking is timed
+    for text, title in tqdm(docs, desc="Embedding"):
+        chunkers["linear"].chunk_text(text, title=title)
+
+    timings = {}
+    outputs = {}
+    for name, chunker in chunkers.items():
+        start = time.perf_counter()
+        outputs[name] = [chunker.chunk_text(text, title=title) for text, title in docs]
+        timings[name] = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(outputs["legacy"], outputs["linear"]) if a != b)
+
+    print("\n" + "="*40)
+    print(f"📊 CHUNKING BENCHMARK ({len(docs)} docs, avg {sum(len(t) for t, _ in docs) // len(docs)} chars)")
+    print("="*40)
+    for name, seconds in timings.items():
+        print(f"   {name:<8}: {seconds:.3f}s ({seconds / len(docs) * 1000:.1f} ms/doc)")
+    print(f"   Speedup : {timings['legacy'] / timings['linear']:.1f}x")
+    print(f"   Boundary mismatches: {mismatches}/{len(docs)}")
+    print("="*40)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from sklearn.metrics.pairwise import cosine_similarity
+from retrieval.src.mmr import mmr, mmr_batch
+
+
+def legacy_mmr(query_embedding, doc_embeddings, lambda_=0.7, k=5):
+    """The previous per-candidate implementation, kept here as the reference for selections and timing."""
+    selected = []
+    candidates = list(range(len(doc_embeddings)))
+    similarity_to_query = cosine_similarity(query_embedding.reshape(1, -1), doc_embeddings)[0]
+
+    while len(selected) < k and candidates:
+        scores = []
+        for c in candidates:
+            redundancy = max(
+                cosine_similarity(doc_embeddings[c].reshape(1, -1), doc_embeddings[selected])[0]
+            ) if selected else 0.0
+            scores.append(lambda_ * similarity_to_query[c] - (1 - lambda_) * redundancy)
+
+        best_idx = candidates[int(np.argmax(scores))]
+        selected.append(best_idx)
+        candidates.remove(best_idx)
+    return selected
+
+
+def make_candidates(rng, n_queries: int, n: int, dim: int):
+    """Queries plus clustered candidates (near-duplicate chunks of the same judgment are common)."""
+    queries = rng.standard_normal((n_queries, dim)).astype(np.float32)
+    docs = []
+    for q in queries:
+        centers = q + rng.standard_normal((max(1, n // 5), dim)).astype(np.float32)
+        d = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, dim)).astype(np.float32)
+        docs.append(d / np.linalg.norm(d, axis=1, keepdims=True))
+    return queries, docs
+
+
+def timed(fn, repeats: int):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy vs vectorized MMR")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--lambda", dest="lambda_", type=float, default=0.7)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries, docs = make_candidates(rng, args.queries, args.candidates, args.dim)
+
+    legacy, t_legacy = timed(lambda: [legacy_mmr(q, d, args.lambda_, args.k) for q, d in zip(queries, docs)], args.repeats)
+    single, t_single = timed(lambda: [mmr(q, d, args.lambda_, args.k) for q, d in zip(queries, docs)], args.repeats)
+    batch, t_batch = timed(lambda: mmr_batch(queries, docs, args.lambda_, args.k), args.repeats)
+
+    identical = sum(a == b == c for a, b, c in zip(legacy, single, batch))
+    df = pd.DataFrame([
+        {"Implementation": "legacy (sklearn per candidate)", "ms_per_query": t_legacy},
+        {"Implementation": "vectorized mmr()", "ms_per_query": t_single},
+        {"Implementation": f"mmr_batch() x{args.queries}", "ms_per_query": t_batch},
+    ])
+    df["ms_per_query"] = (df["ms_per_query"] * 1000 / args.queries).round(3)
+    df["speedup"] = (df["ms_per_query"].iloc[0] / df["ms_per_query"]).round(1)
+
+    print("\n" + "="*40)
+    print(f"📊 MMR (n={args.candidates}, k={args.k}, dim={args.dim})")
+    print("="*40)
+    print(df.to_string(index=False))
+    print(f"✅ Identical selections: {identical}/{args.queries}")
+
+
+if __name__ == "__main__":
+    main()
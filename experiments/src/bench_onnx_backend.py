@@ -0,0 +1,106 @@
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from indexing.src.embedding import Embedder
+from indexing.src.reader import iter_judgment_files
+
+
+def load_texts(n_queries: int, n_passages: int):
+    """Golden-dataset questions as queries, chunks of processed judgments as passages."""
+    with open(project_root / "experiments" / "data" / "golden_dataset.json", 'r', encoding='utf-8') as f:
+        queries = [item['question'] for item in json.load(f)][:n_queries]
+
+    passages = []
+    for _, item in iter_judgment_files(Config.DATA_DIR, fields=("text_full",)):
+        # Sentence-sized and chunk-sized pieces, as the indexer embeds both
+        text = item.get("text_full", "")
+        passages.extend(p for p in text.split("\n") if len(p) > 30)
+        passages.append(text[:2000])
+        if len(passages) >= n_passages:
+            break
+    return queries, passages[:n_passages]
+
+
+def measure(embedder: Embedder, queries, passages, batch_size: int):
+    # Warm-up
+    embedder.embed(queries[:2], is_query=True)
+
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        embedder.embed([q], is_query=True)
+        latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    vectors = embedder.embed(passages, batch_size=batch_size)
+    bulk_seconds = time.perf_counter() - t0
+
+    return {
+        "query_p50_ms": round(np.median(latencies) * 1000, 2),
+        "query_p95_ms": round(np.percentile(latencies, 95) * 1000, 2),
+        "bulk_texts_per_s": round(len(passages) / bulk_seconds, 1),
+    }, vectors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="torch vs ONNX Runtime (fp32 / int8) embedding backends")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--passages", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=Config.EMBED_BATCH_SIZE)
+    parser.add_argument("--threads", type=int, default=Config.EMBEDDING_THREADS)
+    args = parser.parse_args()
+
+    queries, passages = load_texts(args.queries, args.passages)
+    print(f"🧪 {len(queries)} queries, {len(passages)} passages, model={Config.MODEL_NAME}")
+
+    backends = {
+        "torch": dict(backend="torch"),
+        "onnx_fp32": dict(backend="onnx", onnx_dir=Config.ONNX_DIR, onnx_quantize=False),
+        "onnx_int8": dict(backend="onnx", onnx_dir=Config.ONNX_DIR, onnx_quantize=True),
+    }
+
+    rows = []
+    reference = None
+    for name, kwargs in backends.items():
+        embedder = Embedder(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL, intra_op_threads=args.threads, **kwargs)
+        stats, vectors = measure(embedder, queries, passages, args.batch_size)
+
+        # Parity against the torch vectors (all vectors are L2-normalized)
+        if reference is None:
+            reference = vectors
+            cos = np.ones(len(vectors))
+        else:
+            cos = np.einsum("ij,ij->i", reference, vectors)
+        stats.update({
+            "backend": name,
+            "max_cos_deviation": float(np.max(1 - cos)),
+            "mean_cos_deviation": float(np.mean(1 - cos)),
+        })
+        rows.append(stats)
+        del embedder
+
+    df = pd.DataFrame(rows)[["backend", "query_p50_ms", "query_p95_ms", "bulk_texts_per_s", "max_cos_deviation", "mean_cos_deviation"]]
+    print("\n" + "="*40)
+    print("📊 EMBEDDING BACKENDS")
+    print("="*40)
+    print(df.to_string(index=False))
+
+    clean_name = Config.MODEL_NAME.split("/")[-1]
+    output_file = project_root / "experiments" / "logs" / f"bench_onnx_{clean_name}.csv"
+    df.to_csv(output_file, index=False)
+    print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
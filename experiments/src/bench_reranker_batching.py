@@ -0,0 +1,100 @@
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from retrieval.src.pipeline import RetrievalPipeline
+from retrieval.src.reranker import truncate
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+
+class RerankerBatchingBenchmark(RetrievalEvaluator):
+    """
+    Reranking latency on the benchmark queries (the MMR survivors of each query):
+
+    - legacy:  passages cut at 4 chars per token, pairs in arrival order, batches of 8.
+    - sorted:  token-accurate truncation, length-sorted batches under a token budget.
+    - batched: the same, with the pairs of `batch_size` queries in one call (rerank_batch).
+    """
+
+    def __init__(self, limit=None, retrieve_k=40):
+        super().__init__()
+        self.reranker.score_cache = None
+        self.pipeline = RetrievalPipeline(self.retriever, self.reranker, self.embedder, doc_store=self.doc_store, cascade=False)
+        self.limit = limit
+        self.retrieve_k = retrieve_k
+
+    def legacy_predict(self, query, passages):
+        pairs = [(query, truncate(p)) for p in passages]
+        return self.reranker.model.predict(pairs, batch_size=8, show_progress_bar=False)
+
+    def run(self):
+        dataset = self.load_dataset()[:self.limit]
+        queries = [item['question'] for item in dataset]
+        print(f"🚀 Reranker batching on {len(queries)} queries ({self.reranker.device}, {Config.RERANK_BATCH_TOKENS} tokens/batch)")
+
+        hit_lists, query_vectors = self.pipeline._retrieve_candidates_batch(queries, self.retrieve_k)
+        mmr_lists, _, texts = self.pipeline._mmr_candidates(hit_lists, query_vectors)
+        passages = [[texts[str(h.id)] for h in hits] for hits in mmr_lists]
+
+        # Warm-up (model weights, kernels)
+        self.legacy_predict(queries[0], passages[0][:2])
+
+        rows = []
+        for query, query_passages in tqdm(list(zip(queries, passages))):
+            if not query_passages:
+                continue
+            t0 = time.perf_counter()
+            legacy = np.asarray(self.legacy_predict(query, query_passages), dtype=np.float32)
+            t1 = time.perf_counter()
+            new = self.reranker.rerank(query, query_passages)
+            t2 = time.perf_counter()
+            rows.append({
+                "pairs": len(query_passages),
+                "legacy_ms": (t1 - t0) * 1000,
+                "sorted_ms": (t2 - t1) * 1000,
+                "max_abs_diff": float(np.abs(legacy - new).max()),
+                "same_top1": int(np.argmax(legacy) == np.argmax(new)),
+            })
+
+        batched_ms = []
+        for start in range(0, len(queries), self.batch_size):
+            t0 = time.perf_counter()
+            self.reranker.rerank_batch(queries[start:start + self.batch_size], passages[start:start + self.batch_size])
+            batched_ms.append((time.perf_counter() - t0) * 1000 / len(queries[start:start + self.batch_size]))
+
+        df = pd.DataFrame(rows)
+        print("\n" + "="*40)
+        print(f"📊 RERANK LATENCY ({Config.RERANKER_NAME}, ms per query)")
+        print("="*40)
+        for column in ("legacy_ms", "sorted_ms"):
+            print(f"   {column:<10} mean {df[column].mean():8.1f}   p50 {df[column].median():8.1f}   p95 {df[column].quantile(0.95):8.1f}")
+        print(f"   {'batched_ms':<10} mean {np.mean(batched_ms):8.1f}   (batches of {self.batch_size} queries)")
+        print("-" * 40)
+        print(f"   Top-1 agreement with legacy: {df['same_top1'].mean():.2%}   max |score diff|: {df['max_abs_diff'].max():.4f}")
+
+        clean_name = Config.RERANKER_NAME.split("/")[-1]
+        output_file = self.results_dir / f"bench_reranker_batching_{clean_name}.csv"
+        df.to_csv(output_file, index=False)
+        print(f"📄 Detailed results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reranker latency: fixed batches vs length-sorted token-budget batches")
+    parser.add_argument("--limit", type=int, default=None, help="First N benchmark queries")
+    args = parser.parse_args()
+
+    bench = RerankerBatchingBenchmark(limit=args.limit)
+    try:
+        bench.run()
+    finally:
+        bench.retriever.close()
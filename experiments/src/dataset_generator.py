@@ -15,6 +15,7 @@ project_root = current_file.parent.parent.parent
 sys.path.append(str(project_root))
 
 from rag_llm.src.llm_client import LLMClient
+from indexing.src.reader import iter_documents
 
 # --- LOGGER SETUP ---
 def setup_experiment_logger():
@@ -74,12 +75,12 @@ class GoldenDatasetGenerator:
             json.dump(data, f, ensure_ascii=False, indent=2)
 
     def load_source_documents(self):
-        files = list(self.data_dir.glob("judgments-*-clean.json"))
+        # Streamed and projected: only the fields used for question generation stay in memory
+        fields = ("id", "text_short", "metadata.title", "metadata.source_url")
         all_docs = []
-        for file_path in files:
+        for file_path in self.data_dir.glob("judgments-*-clean.json"):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    all_docs.extend(json.load(f))
+                all_docs.extend(iter_documents(str(file_path), fields=fields))
             except Exception:
                 continue
         return all_docs
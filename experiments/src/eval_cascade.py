@@ -0,0 +1,126 @@
+import sys
+import time
+import argparse
+import itertools
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from retrieval.src.pipeline import RetrievalPipeline
+from retrieval.src.cascade import RerankCascade
+from retrieval.src.reranker import ReRanker
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+
+class CascadeEvaluator(RetrievalEvaluator):
+    """
+    Recall / latency trade-off of the reranking cascade on the golden dataset.
+
+    Candidates (retrieval + MMR + hydration) are computed once per query; every setting
+    (early-exit margin x first pass x keep) then ranks the same candidates, so the times
+    are ranking cost only. "full" is the plain reranker on every MMR survivor.
+    """
+
+    def __init__(self, margins, first_passes, keeps, retrieve_k=40):
+        super().__init__()
+        # Every setting must pay for its own cross-encoder calls
+        self.reranker.score_cache = None
+        self.pipeline = RetrievalPipeline(self.retriever, self.reranker, self.embedder, doc_store=self.doc_store, cascade=False)
+        self.retrieve_k = retrieve_k
+
+        scorers = {}
+        for name in first_passes:
+            if name in ("none", "dense"):
+                scorers[name] = None if name == "none" else "dense"
+            else:
+                print(f"⚖️  Loading first-pass reranker: {name}")
+                scorers[name] = ReRanker(name)
+                scorers[name].score_cache = None
+
+        self.settings = [("full", None)]
+        for margin, name, keep in itertools.product(margins, first_passes, keeps):
+            if margin is None and name == "none":
+                continue
+            label = f"margin={margin} first={name} keep={keep if name != 'none' else '-'}"
+            if any(label == existing for existing, _ in self.settings):
+                continue
+            self.settings.append((label, RerankCascade(self.reranker, exit_margin=margin, first_pass=scorers[name], keep=keep)))
+
+    def _candidates(self, queries):
+        hit_lists, query_vectors = self.pipeline._retrieve_candidates_batch(queries, self.retrieve_k)
+        return self.pipeline._mmr_candidates(hit_lists, query_vectors)
+
+    def run(self):
+        dataset = self.load_dataset()
+        rows = []
+        print(f"🚀 Cascade evaluation: {len(dataset)} queries x {len(self.settings)} settings")
+
+        for start in tqdm(range(0, len(dataset), self.batch_size)):
+            batch = dataset[start:start + self.batch_size]
+            queries = [item['question'] for item in batch]
+            mmr_lists, dense_lists, texts = self._candidates(queries)
+
+            for label, cascade in self.settings:
+                self.pipeline.cascade = cascade
+                exits_before = cascade.stats["early_exits"] if cascade else 0
+                t0 = time.perf_counter()
+                ranked_lists = self.pipeline._rank(queries, mmr_lists, dense_lists, texts)
+                elapsed = time.perf_counter() - t0
+                exits = (cascade.stats["early_exits"] - exits_before) if cascade else 0
+
+                for item, ranked in zip(batch, ranked_lists):
+                    doc_ids = [hit.payload.get('doc_id') for hit, _ in ranked]
+                    _, mrr, r5, r10 = self.calculate_metrics(item['id'], doc_ids)
+                    rows.append({
+                        "setting": label,
+                        "mrr": mrr,
+                        "recall@5": r5,
+                        "recall@10": r10,
+                        "candidates": len(ranked),
+                        "rank_time": elapsed / len(batch),
+                        "early_exit_rate": exits / len(batch)
+                    })
+
+        df = pd.DataFrame(rows)
+        summary = df.groupby("setting", sort=False).agg(
+            Recall5=("recall@5", "mean"),
+            Recall10=("recall@10", "mean"),
+            MRR=("mrr", "mean"),
+            Early_Exit=("early_exit_rate", "mean"),
+            Rank_ms=("rank_time", lambda s: s.mean() * 1000),
+        ).round(4).reset_index()
+
+        print("\n" + "="*40)
+        print(f"📊 RERANK CASCADE ({Config.MODEL_NAME} -> {Config.RERANKER_NAME})")
+        print("="*40)
+        print(summary.to_string(index=False))
+
+        clean_name = Config.MODEL_NAME.split("/")[-1]
+        output_file = self.results_dir / f"eval_cascade_{clean_name}.csv"
+        summary.to_csv(output_file, index=False)
+        print(f"📄 Results saved to: {output_file}")
+
+
+def _margin(value: str):
+    return None if value.lower() == "none" else float(value)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall / latency of reranking cascade settings")
+    parser.add_argument("--margins", type=_margin, nargs="+", default=[None, 0.05, 0.1])
+    parser.add_argument("--first-pass", nargs="+", default=["none", "dense"],
+                        help='"none", "dense" or cross-encoder names, e.g. cross-encoder/mmarco-mMiniLMv2-L12-H384-v1')
+    parser.add_argument("--keep", type=int, nargs="+", default=[4, 8])
+    args = parser.parse_args()
+
+    evaluator = CascadeEvaluator(args.margins, args.first_pass, args.keep)
+    try:
+        evaluator.run()
+    finally:
+        evaluator.retriever.close()
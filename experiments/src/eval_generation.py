@@ -16,9 +16,14 @@ sys.path.append(str(project_root))
 
 from config.config import Config
 from indexing.src.embedding import Embedder
+from indexing.src.doc_store import DocStore
+from indexing.src.vector_store import LocalVectorStore
+from indexing.src.ann_index import AnnIndex
+from indexing.src.bm25 import Bm25Index
 from retrieval.src.retriever import Retriever
 from retrieval.src.reranker import ReRanker
 from retrieval.src.pipeline import RetrievalPipeline
+from retrieval.src.timing import share_timings
 from rag_llm.src.llm_client import LLMClient
 from rag_llm.src.rag_pipeline import RAGPipeline
 
@@ -43,10 +48,20 @@ class GenerationEvaluator:
 
         # Setup Retrieval
         self.log("⚙️  Initializing Retrieval Engine...")
-        self.embedder = Embedder(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
-        self.retriever = Retriever(str(Config.QDRANT_PATH), Config.COLLECTION_NAME, self.embedder)
+        self.embedder = Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
+        local_vectors = None
+        if Config.USE_LOCAL_VECTORS:
+            local_vectors = LocalVectorStore(str(Config.LOCAL_VECTORS_DIR), self.embedder.get_dimension(), read_only=True)
+        self.retriever = Retriever(
+            str(Config.QDRANT_PATH), Config.COLLECTION_NAME, self.embedder, local_vectors=local_vectors,
+            ann_index=AnnIndex.from_config(self.embedder.get_dimension(), read_only=True)
+        )
         self.reranker = ReRanker(Config.RERANKER_NAME)
-        self.retrieval_pipe = RetrievalPipeline(self.retriever, self.reranker, self.embedder)
+        self.doc_store = DocStore(str(Config.DOC_STORE_PATH)) if Config.USE_DOC_STORE else None
+        self.bm25 = Bm25Index(str(Config.BM25_DIR)) if Config.USE_BM25 else None
+        self.retrieval_pipe = RetrievalPipeline(
+            self.retriever, self.reranker, self.embedder, doc_store=self.doc_store, bm25=self.bm25
+        )
         
         # Judge Client
         self.judge_llm = LLMClient("gpt-4o-mini", api_key=self.api_key, temperature=0.0)
@@ -150,6 +165,23 @@ Output JSON ONLY: {{"score": 0.0 to 1.0, "reason": "..."}}
             return data.get("score", 0), data.get("reason", "N/A")
         return 0, "Judge Failed"
 
+    def prefetch_retrieval(self, questions):
+        """
+        Retrieval for every question, RETRIEVAL_BATCH_QUERIES at a time (the rewriter keeps
+        history-free queries as is). Each result carries its share of the batch's timings, and
+        that share in seconds is returned per question to add back to the answer latency.
+        """
+        prefetched, seconds = [], []
+        for start in range(0, len(questions), Config.RETRIEVAL_BATCH_QUERIES):
+            batch = questions[start:start + Config.RETRIEVAL_BATCH_QUERIES]
+            results = self.retrieval_pipe.run_batch(batch, retrieve_k=50)
+            share = share_timings(results[0].timings, len(batch))
+            for result in results:
+                result.timings = share
+            prefetched.extend(results)
+            seconds.extend([share["total_ms"] / 1000] * len(batch))
+        return prefetched, seconds
+
     def run(self):
         dataset = json.load(open(self.dataset_path, 'r', encoding='utf-8'))
         self.log(f"🚀 Starting Evaluation on {len(dataset)} questions", to_results=True)
@@ -157,6 +189,9 @@ Output JSON ONLY: {{"score": 0.0 to 1.0, "reason": "..."}}
         all_results_df = pd.DataFrame()
         output_file = self.results_dir / "final_generation_report.csv"
 
+        # Retrieval does not depend on the LLM: run it once, batched, for all experiments
+        prefetched, retrieval_latency = self.prefetch_retrieval([item['question'] for item in dataset])
+
         for exp in Config.EXPERIMENTS:
             exp_name = exp["name"]
             model = exp["model"]
@@ -178,8 +213,9 @@ Output JSON ONLY: {{"score": 0.0 to 1.0, "reason": "..."}}
                 
                 # Run RAG (Infinite Retry)
                 start = time.time()
-                res = self._retry_wrapper(lambda: rag.run(query), description="RAG Gen")
-                latency = time.time() - start
+                res = self._retry_wrapper(lambda: rag.run(query, retrieved=prefetched[i]), description="RAG Gen")
+                # End to end, as before retrieval was batched
+                latency = time.time() - start + retrieval_latency[i]
 
                 # Judge (Infinite Retry)
                 context_text = "".join([d.get('text', '') for d in res['documents'].values()])
@@ -196,6 +232,7 @@ Output JSON ONLY: {{"score": 0.0 to 1.0, "reason": "..."}}
                     "model": model,
                     "query_id": target_doc_id,
                     "latency": latency,
+                    "retrieval_latency": retrieval_latency[i],
                     "faithfulness": score,
                     "hallucination": hallucination,
                     "citation_recall": citation_hit,
@@ -0,0 +1,108 @@
+import sys
+import time
+import argparse
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from retrieval.src.pipeline import RetrievalPipeline
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+
+class GroupingEvaluator(RetrievalEvaluator):
+    """
+    Raw chunk hits vs hits collapsed by doc_id (at most N chunks per judgment) on the golden
+    dataset: distinct judgments among the reranker's inputs, distinct-document Recall@5/10
+    and MRR after reranking, and rerank time. Every setting reranks the same pool size.
+
+    "qdrant_agree" checks the local collapse against Qdrant's own group-by on doc_id.
+    """
+
+    def __init__(self, chunks_per_doc, pool_size):
+        super().__init__()
+        # Every setting must pay for its own cross-encoder calls
+        self.reranker.score_cache = None
+        self.pool_size = pool_size
+        self.pipelines = {
+            n: RetrievalPipeline(self.retriever, self.reranker, self.embedder, doc_store=self.doc_store, cascade=False, chunks_per_doc=n)
+            for n in chunks_per_doc
+        }
+
+    @staticmethod
+    def distinct(doc_ids):
+        return list(dict.fromkeys(doc_ids))
+
+    def run(self):
+        dataset = self.load_dataset()
+        rows = []
+        print(f"🚀 Grouped retrieval: {len(dataset)} queries, pool {self.pool_size}, chunks/doc {list(self.pipelines)}")
+
+        for item in tqdm(dataset):
+            query, target_id = item['question'], item['id']
+            for per_doc, pipeline in self.pipelines.items():
+                hits, _ = pipeline._retrieve_candidates(query, self.pool_size)
+                doc_ids = [h.payload.get('doc_id') for h in hits]
+                texts = pipeline._hit_texts(hits)
+
+                t0 = time.perf_counter()
+                scores = self.reranker.rerank(query, [texts.get(str(h.id), '') for h in hits])
+                rerank_time = time.perf_counter() - t0
+
+                # Recall over judgments: a case counts once, at its best-ranked chunk
+                reranked = self.distinct(doc_id for doc_id, _ in sorted(zip(doc_ids, scores), key=lambda x: x[1], reverse=True))
+                _, mrr, r5, r10 = self.calculate_metrics(target_id, reranked)
+
+                row = {
+                    "chunks_per_doc": per_doc or "off",
+                    "distinct_docs": len(set(doc_ids)),
+                    "pool_recall": int(str(target_id) in doc_ids),
+                    "recall@5": r5,
+                    "recall@10": r10,
+                    "mrr": mrr,
+                    "rerank_time": rerank_time,
+                }
+                if per_doc:
+                    grouped, _ = self.retriever.retrieve_groups(query, top_k=self.pool_size, group_size=per_doc)
+                    row["qdrant_agree"] = int(set(doc_ids) == {h.payload.get('doc_id') for h in grouped})
+                rows.append(row)
+
+        df = pd.DataFrame(rows)
+        summary = df.groupby("chunks_per_doc", sort=False).agg(
+            Distinct_Docs=("distinct_docs", "mean"),
+            Pool_Recall=("pool_recall", "mean"),
+            Recall5=("recall@5", "mean"),
+            Recall10=("recall@10", "mean"),
+            MRR=("mrr", "mean"),
+            Rerank_ms=("rerank_time", lambda s: s.mean() * 1000),
+        ).round(4).reset_index()
+        if "qdrant_agree" in df:
+            summary["Qdrant_Agree"] = df.groupby("chunks_per_doc", sort=False)["qdrant_agree"].mean().round(4).values
+
+        print("\n" + "="*40)
+        print(f"📊 GROUPED RETRIEVAL ({Config.MODEL_NAME}, pool {self.pool_size})")
+        print("="*40)
+        print(summary.to_string(index=False))
+
+        clean_name = Config.MODEL_NAME.split("/")[-1]
+        output_file = self.results_dir / f"eval_grouping_{clean_name}.csv"
+        summary.to_csv(output_file, index=False)
+        print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distinct-document recall and rerank time with chunks collapsed by doc_id")
+    parser.add_argument("--chunks-per-doc", type=int, nargs="+", default=[0, 1, 2], help="0 = no grouping")
+    parser.add_argument("--pool", type=int, default=20, help="Candidates sent to the reranker")
+    args = parser.parse_args()
+
+    evaluator = GroupingEvaluator(args.chunks_per_doc, args.pool)
+    try:
+        evaluator.run()
+    finally:
+        evaluator.retriever.close()
@@ -0,0 +1,89 @@
+import sys
+import time
+import argparse
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from indexing.src.bm25 import Bm25Index
+from retrieval.src.pipeline import RetrievalPipeline
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+
+class HybridEvaluator(RetrievalEvaluator):
+    """
+    Dense-only vs dense + BM25 (RRF) candidate pools of several sizes on the golden dataset:
+    Recall@10 / MRR before and after reranking, and the rerank time each pool size costs.
+    """
+
+    def __init__(self, pool_sizes):
+        super().__init__()
+        self.pool_sizes = pool_sizes
+        # Nested pools would otherwise hit the score cache and hide the rerank cost
+        self.reranker.score_cache = None
+        self.bm25 = Bm25Index(str(Config.BM25_DIR))
+        self.dense = RetrievalPipeline(self.retriever, self.reranker, self.embedder, doc_store=self.doc_store)
+        self.hybrid = RetrievalPipeline(self.retriever, self.reranker, self.embedder, doc_store=self.doc_store, bm25=self.bm25)
+
+    def _texts(self, hits):
+        return self.dense._hit_texts(hits)
+
+    def _evaluate(self, pipeline, query, target_id, pool_size):
+        hits, _ = pipeline._retrieve_candidates(query, pool_size)
+        doc_ids = [h.payload.get('doc_id') for h in hits]
+        _, mrr, _, r10 = self.calculate_metrics(target_id, doc_ids)
+
+        texts = self._texts(hits)
+        t0 = time.perf_counter()
+        scores = self.reranker.rerank(query, [texts.get(str(h.id), '') for h in hits])
+        rerank_time = time.perf_counter() - t0
+
+        reranked = [doc_id for doc_id, _ in sorted(zip(doc_ids, scores), key=lambda x: x[1], reverse=True)]
+        _, rr_mrr, _, rr_r10 = self.calculate_metrics(target_id, reranked)
+        return {"mrr": mrr, "recall@10": r10, "rerank_mrr": rr_mrr, "rerank_recall@10": rr_r10, "rerank_time": rerank_time}
+
+    def run(self):
+        dataset = self.load_dataset()
+        rows = []
+        for item in tqdm(dataset):
+            for pool_size in self.pool_sizes:
+                for mode, pipeline in (("dense", self.dense), ("hybrid", self.hybrid)):
+                    row = self._evaluate(pipeline, item['question'], item['id'], pool_size)
+                    rows.append({"mode": mode, "pool": pool_size, **row})
+
+        df = pd.DataFrame(rows)
+        summary = df.groupby(["mode", "pool"]).agg(
+            Recall10=("recall@10", "mean"),
+            MRR=("mrr", "mean"),
+            Rerank_Recall10=("rerank_recall@10", "mean"),
+            Rerank_MRR=("rerank_mrr", "mean"),
+            Rerank_ms=("rerank_time", lambda s: s.mean() * 1000),
+        ).round(4).reset_index()
+
+        print("\n" + "="*40)
+        print(f"📊 DENSE vs HYBRID ({Config.MODEL_NAME}, BM25 top {Config.BM25_TOP_K}, RRF k={Config.RRF_K})")
+        print("="*40)
+        print(summary.to_string(index=False))
+
+        clean_name = Config.MODEL_NAME.split("/")[-1]
+        output_file = self.results_dir / f"eval_hybrid_{clean_name}.csv"
+        summary.to_csv(output_file, index=False)
+        print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall and rerank cost: dense vs dense + BM25 (RRF)")
+    parser.add_argument("--pools", type=int, nargs="+", default=[10, 20, 30, 50])
+    args = parser.parse_args()
+
+    evaluator = HybridEvaluator(args.pools)
+    try:
+        evaluator.run()
+    finally:
+        evaluator.retriever.close()
@@ -0,0 +1,166 @@
+import sys
+import time
+import argparse
+import pandas as pd
+from pathlib import Path
+from tqdm import tqdm
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from qdrant_client.http import models
+from config.config import Config
+from indexing.src.embedding import Embedder
+from indexing.src.storage import build_quantization_config
+from retrieval.src.retriever import Retriever
+from experiments.src.eval_retrieval import RetrievalEvaluator
+
+MODES = [None, "scalar", "binary"]
+BYTES_PER_DIM = {None: 4.0, "scalar": 1.0, "binary": 1 / 8}
+
+
+class QuantizationEvaluator(RetrievalEvaluator):
+    """
+    Copies the current collection into one collection per quantization mode and compares
+    memory, search latency and Recall@10 / MRR on the golden dataset (no reranker).
+
+    RAM_MB / Disk_MB are what the Qdrant server reports for the collection's segments
+    (telemetry), after it has finished optimizing them; they need Config.QDRANT_URL, since
+    embedded local mode neither quantizes nor reports memory. Vectors_Est_MB is the expected
+    points * dim * bytes per dimension of the searched representation, for comparison.
+    """
+
+    def __init__(self, top_k: int, oversampling: float, rescore: bool):
+        self.dataset_path = project_root / "experiments" / "data" / "golden_dataset.json"
+        self.results_dir = project_root / "experiments" / "logs"
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.top_k = top_k
+        self.oversampling = oversampling
+        self.rescore = rescore
+
+        print(f"⚙️  Loading Model: {Config.MODEL_NAME}")
+        self.embedder = Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
+
+        print(f"📂 Opening Database: {Config.QDRANT_URL or Config.QDRANT_PATH}")
+        self.retriever = Retriever(str(Config.QDRANT_PATH), Config.COLLECTION_NAME, self.embedder)
+        self.client = self.retriever.client
+
+    def _copy_collection(self, mode) -> str:
+        """Creates (once) a copy of the collection with the given quantization."""
+        name = f"{Config.COLLECTION_NAME}_q_{mode}"
+        if self.client.collection_exists(name):
+            return name
+
+        source = self.client.get_collection(Config.COLLECTION_NAME).config.params.vectors
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(size=source.size, distance=source.distance, on_disk=True),
+            hnsw_config=models.HnswConfigDiff(m=Config.HNSW_M, ef_construct=Config.HNSW_EF),
+            quantization_config=build_quantization_config(mode, Config.QUANTIZATION_ALWAYS_RAM)
+        )
+
+        offset = None
+        with tqdm(desc=f"Copying -> {name}") as bar:
+            while True:
+                points, offset = self.client.scroll(
+                    Config.COLLECTION_NAME, limit=256, offset=offset, with_payload=True, with_vectors=True
+                )
+                self.client.upsert(name, points=[
+                    models.PointStruct(id=p.id, vector=p.vector, payload=p.payload) for p in points
+                ])
+                bar.update(len(points))
+                if offset is None:
+                    break
+        return name
+
+    def collection_memory(self, name: str, timeout: float = 600):
+        """(RAM MB, disk MB) of a collection's segments as reported by the server; (None, None) in local mode."""
+        if not Config.QDRANT_URL:
+            return None, None
+        # Quantized vectors and the HNSW graph are built by the optimizer after the copy
+        deadline = time.time() + timeout
+        while self.client.get_collection(name).status != models.CollectionStatus.GREEN and time.time() < deadline:
+            time.sleep(1)
+
+        telemetry = self.client.http.service_api.telemetry(details_level=3).result
+        ram = disk = 0
+        for collection in telemetry.collections.collections or []:
+            if getattr(collection, "id", None) != name:
+                continue
+            for shard in collection.shards or []:
+                for segment in (shard.local.segments or []) if shard.local else []:
+                    ram += segment.info.ram_usage_bytes
+                    disk += segment.info.disk_usage_bytes
+        return round(ram / 2**20, 1), round(disk / 2**20, 1)
+
+    def _evaluate(self, collection_name: str, mode, dataset):
+        self.retriever.collection_name = collection_name
+        oversampling = self.oversampling if mode else None
+        rescore = self.rescore if mode else None
+
+        rows = []
+        for item in dataset:
+            t0 = time.perf_counter()
+            hits, _ = self.retriever.retrieve(
+                item['question'], top_k=self.top_k, oversampling=oversampling, rescore=rescore, with_vectors=False
+            )
+            latency = time.perf_counter() - t0
+
+            ids = [h.payload.get('doc_id') for h in hits]
+            _, mrr, _, r10 = self.calculate_metrics(item['id'], ids)
+            rows.append({"latency": latency, "mrr": mrr, "recall@10": r10})
+        return pd.DataFrame(rows)
+
+    def run(self):
+        dataset = self.load_dataset()
+        n_points = self.client.count(Config.COLLECTION_NAME, exact=True).count
+        dim = self.embedder.get_dimension()
+
+        # Warm-up: query embedding and client code paths
+        self.retriever.retrieve(dataset[0]['question'], top_k=self.top_k)
+        if not Config.QDRANT_URL:
+            print("⚠️  Embedded local mode ignores quantization and reports no memory: set Config.QDRANT_URL to measure it")
+
+        summary = []
+        for mode in MODES:
+            name = Config.COLLECTION_NAME if mode is None else self._copy_collection(mode)
+
+            ram_mb, disk_mb = self.collection_memory(name)
+            df = self._evaluate(name, mode, dataset)
+            summary.append({
+                "Mode": mode or "float32",
+                "RAM_MB": ram_mb,
+                "Disk_MB": disk_mb,
+                "Vectors_Est_MB": round(n_points * dim * BYTES_PER_DIM[mode] / 2**20, 1),
+                "Latency_p50_ms": round(df["latency"].median() * 1000, 2),
+                "Latency_p95_ms": round(df["latency"].quantile(0.95) * 1000, 2),
+                "Recall@10": round(df["recall@10"].mean(), 4),
+                "MRR": round(df["mrr"].mean(), 4),
+            })
+
+        result = pd.DataFrame(summary)
+        print("\n" + "="*40)
+        print(f"📊 QUANTIZATION ({n_points} points, dim={dim}, oversampling={self.oversampling}, rescore={self.rescore})")
+        print("="*40)
+        print(result.to_string(index=False))
+
+        clean_name = Config.MODEL_NAME.split("/")[-1]
+        output_file = self.results_dir / f"eval_quantization_{clean_name}.csv"
+        result.to_csv(output_file, index=False)
+        print(f"📄 Results saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory / latency / recall per quantization mode")
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--oversampling", type=float, default=Config.SEARCH_OVERSAMPLING)
+    parser.add_argument("--no-rescore", action="store_true")
+    args = parser.parse_args()
+
+    evaluator = QuantizationEvaluator(args.top_k, args.oversampling, rescore=not args.no_rescore)
+    try:
+        evaluator.run()
+    finally:
+        evaluator.retriever.close()
@@ -14,6 +14,7 @@ sys.path.append(str(project_root))
 
 from config.config import Config
 from indexing.src.embedding import Embedder
+from indexing.src.doc_store import DocStore
 from retrieval.src.retriever import Retriever
 from retrieval.src.reranker import ReRanker
 
@@ -24,13 +25,15 @@ class RetrievalEvaluator:
         self.results_dir.mkdir(parents=True, exist_ok=True)
 
         print(f"⚙️  Loading Model: {Config.MODEL_NAME}")
-        self.embedder = Embedder(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
+        self.embedder = Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
         
-        print(f"📂 Opening Database: {Config.QDRANT_PATH}")
+        print(f"📂 Opening Database: {Config.QDRANT_URL or Config.QDRANT_PATH}")
         self.retriever = Retriever(str(Config.QDRANT_PATH), Config.COLLECTION_NAME, self.embedder)
+        self.doc_store = DocStore(str(Config.DOC_STORE_PATH)) if Config.USE_DOC_STORE else None
         
         print("⚖️  Loading Reranker...")
         self.reranker = ReRanker("BAAI/bge-reranker-v2-m3")
+        self.batch_size = 16
 
     def load_dataset(self):
         with open(self.dataset_path, 'r', encoding='utf-8') as f:
@@ -59,49 +62,59 @@ class RetrievalEvaluator:
         print(f"🚀 Starting Evaluation on {len(dataset)} queries...")
         print(f"ℹ️  Configuration: {Config.MODEL_NAME}")
 
-        for item in tqdm(dataset):
-            query = item['question']
-            target_id = item['id']
-            
+        # Queries go through retrieval and reranking in batches; per-query times are the batch time / batch size
+        for start in tqdm(range(0, len(dataset), self.batch_size)):
+            batch = dataset[start:start + self.batch_size]
+            queries = [item['question'] for item in batch]
+
             # --- VECTOR RETRIEVAL (Top 50) ---
             t0 = time.time()
-            hits, _ = self.retriever.retrieve(query, top_k=50)
+            hit_lists, _ = self.retriever.retrieve_batch(queries, top_k=50, with_vectors=False)
             t1 = time.time()
-            
-            # Extract IDs from Qdrant hits
-            vector_ids = [h.payload.get('doc_id') for h in hits]
-            
-            v_rank, v_mrr, v_r5, v_r10 = self.calculate_metrics(target_id, vector_ids)
 
             # --- WITH RERANKING (Top 10) ---
             # We take the top 50 from vector search and rerank them
-            texts = [h.payload.get('text', '') for h in hits]
-            
+            all_hits = [h for hits in hit_lists for h in hits]
+            if self.doc_store is not None:
+                hit_texts = self.doc_store.hit_texts(all_hits)
+            else:
+                hit_texts = {str(h.id): h.payload.get('text', '') for h in all_hits}
+
             t2 = time.time()
-            scores = self.reranker.rerank(query, texts)
+            score_lists = self.reranker.rerank_batch(
+                queries,
+                [[hit_texts.get(str(h.id), '') for h in hits] for hits in hit_lists],
+                ids=[[str(h.id) for h in hits] for hits in hit_lists]
+            )
             t3 = time.time()
-            
-            # Sort hits based on reranker scores
-            ranked_pairs = sorted(zip(vector_ids, scores), key=lambda x: x[1], reverse=True)
-            reranked_ids = [doc_id for doc_id, _ in ranked_pairs]
-            
-            rr_rank, rr_mrr, rr_r5, rr_r10 = self.calculate_metrics(target_id, reranked_ids)
-
-            results.append({
-                "query_id": target_id,
-                # Vector Search Metrics
-                "vector_rank": v_rank,
-                "vector_mrr": v_mrr,
-                "vector_recall@5": v_r5,
-                "vector_recall@10": v_r10,
-                "vector_time": t1 - t0,
-                # Reranked Metrics
-                "rerank_rank": rr_rank,
-                "rerank_mrr": rr_mrr,
-                "rerank_recall@5": rr_r5,
-                "rerank_recall@10": rr_r10,
-                "rerank_time": t3 - t2
-            })
+
+            for item, hits, scores in zip(batch, hit_lists, score_lists):
+                target_id = item['id']
+
+                # Extract IDs from Qdrant hits
+                vector_ids = [h.payload.get('doc_id') for h in hits]
+                v_rank, v_mrr, v_r5, v_r10 = self.calculate_metrics(target_id, vector_ids)
+
+                # Sort hits based on reranker scores
+                ranked_pairs = sorted(zip(vector_ids, scores), key=lambda x: x[1], reverse=True)
+                reranked_ids = [doc_id for doc_id, _ in ranked_pairs]
+                rr_rank, rr_mrr, rr_r5, rr_r10 = self.calculate_metrics(target_id, reranked_ids)
+
+                results.append({
+                    "query_id": target_id,
+                    # Vector Search Metrics
+                    "vector_rank": v_rank,
+                    "vector_mrr": v_mrr,
+                    "vector_recall@5": v_r5,
+                    "vector_recall@10": v_r10,
+                    "vector_time": (t1 - t0) / len(batch),
+                    # Reranked Metrics
+                    "rerank_rank": rr_rank,
+                    "rerank_mrr": rr_mrr,
+                    "rerank_recall@5": rr_r5,
+                    "rerank_recall@10": rr_r10,
+                    "rerank_time": (t3 - t2) / len(batch)
+                })
 
         # --- AGGREGATE RESULTS ---
         df = pd.DataFrame(results)
@@ -13,6 +13,7 @@ project_root = current_file.parent.parent.parent
 sys.path.append(str(project_root))
 
 from rag_llm.src.llm_client import LLMClient
+from indexing.src.reader import iter_documents
 
 class BenchmarkPreparer:
     def __init__(self, source_dataset: str, output_path: str, target_size: int = 20):
@@ -25,21 +26,23 @@ class BenchmarkPreparer:
         self.api_key = os.getenv("AVALAI_API_KEY")
         self.llm = LLMClient(model_name="gpt-4o-mini", api_key=self.api_key)
 
-    def load_doc_text(self, doc_id):
-        """Finds the full text of the document by ID."""
+    def load_doc_texts(self, doc_ids):
+        """Finds the full text of every requested document in one streaming pass over the data."""
+        wanted = {str(doc_id) for doc_id in doc_ids}
+        texts = {}
 
         files = list(self.data_dir.glob("judgments-*-clean.json"))
         for file_path in files:
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    for item in data:
-                        # Match ID
-                        if str(item['id']) == str(doc_id):
-                            return item.get('text_full', '')
-            except:
+                for item in iter_documents(str(file_path), fields=("id", "text_full")):
+                    # Match ID
+                    if str(item['id']) in wanted:
+                        texts[str(item['id'])] = item.get('text_full', '')
+            except Exception:
                 continue
-        return None
+            if len(texts) == len(wanted):
+                break
+        return texts
 
     def generate_reference_answer(self, question, context):
         """Generates a Gold Standard answer for metrics calculation."""
@@ -67,6 +70,7 @@ Reference Answer (Persian):
             selection = data
 
         benchmark_data = []
+        doc_texts = self.load_doc_texts(item['id'] for item in selection)
         print(f"🚀 Generating Reference Answers for {len(selection)} items...")
 
         for item in tqdm(selection):
@@ -74,7 +78,7 @@ Reference Answer (Persian):
             question = item['question']
             
             # Get Context
-            context = self.load_doc_text(doc_id)
+            context = doc_texts.get(str(doc_id))
             if not context:
                 print(f"⚠️ Doc {doc_id} not found, skipping.")
                 continue
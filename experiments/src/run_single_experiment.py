@@ -15,19 +15,27 @@ sys.path.append(str(project_root))
 
 from config.config import Config
 from indexing.src.embedding import Embedder
+from indexing.src.doc_store import DocStore
+from indexing.src.vector_store import LocalVectorStore
+from indexing.src.ann_index import AnnIndex
+from indexing.src.bm25 import Bm25Index
 from retrieval.src.retriever import Retriever
 from retrieval.src.reranker import ReRanker
 from retrieval.src.pipeline import RetrievalPipeline
+from retrieval.src.timing import share_timings
 from rag_llm.src.llm_client import LLMClient
 from rag_llm.src.rag_pipeline import RAGPipeline
 from experiments.src.metrics_utils import MetricsCalculator
 
 # --- DUMMY RERANKER (For "No Reranker" Mode) ---
 class PassthroughReranker:
-    def rerank(self, query, passages):
+    def rerank(self, query, passages, ids=None):
         # Return dummy scores preserving original order
         return [1.0 - (i * 0.01) for i in range(len(passages))]
 
+    def rerank_batch(self, queries, passages, batch_size=32, ids=None, lengths=None):
+        return [self.rerank(q, p) for q, p in zip(queries, passages)]
+
 class ExperimentRunner:
     def __init__(self):
         load_dotenv()
@@ -45,7 +53,7 @@ class ExperimentRunner:
         # Log Configuration
         self.logger.info(f"🧪 EXPERIMENT START: {Config.EXPERIMENT_NAME}")
         self.logger.info(f"   - Embedding: {Config.EMBEDDING_MODEL}")
-        self.logger.info(f"   - DB Path: {Config.QDRANT_PATH}")
+        self.logger.info(f"   - DB Path: {Config.QDRANT_URL or Config.QDRANT_PATH}")
         self.logger.info(f"   - Reranker: {'ON' if Config.USE_RERANKER else 'OFF'}")
         self.logger.info(f"   - LLM: {Config.LLM_MODEL}")
 
@@ -67,12 +75,14 @@ class ExperimentRunner:
     def setup_pipeline(self):
         self.logger.info("⚙️  Initializing Pipeline Components...")
         
-        embedder = Embedder(Config.EMBEDDING_MODEL, is_e5=Config.IS_E5_MODEL)
+        embedder = Embedder.from_config(Config.EMBEDDING_MODEL, is_e5=Config.IS_E5_MODEL)
         
         retriever = Retriever(
             qdrant_path=str(Config.QDRANT_PATH),
             collection_name=Config.COLLECTION_NAME,
-            embedder=embedder
+            embedder=embedder,
+            local_vectors=LocalVectorStore(str(Config.LOCAL_VECTORS_DIR), embedder.get_dimension(), read_only=True) if Config.USE_LOCAL_VECTORS else None,
+            ann_index=AnnIndex.from_config(embedder.get_dimension(), read_only=True)
         )
         
         if Config.USE_RERANKER:
@@ -82,12 +92,31 @@ class ExperimentRunner:
             reranker = PassthroughReranker()
             self.logger.info("   -> Reranker Disabled (Passthrough)")
             
-        retrieval_pipe = RetrievalPipeline(retriever, reranker, embedder)
+        doc_store = DocStore(str(Config.DOC_STORE_PATH)) if Config.USE_DOC_STORE else None
+        bm25 = Bm25Index(str(Config.BM25_DIR)) if Config.USE_BM25 else None
+        retrieval_pipe = RetrievalPipeline(retriever, reranker, embedder, doc_store=doc_store, bm25=bm25)
         
         llm = LLMClient(model_name=Config.LLM_MODEL, api_key=self.api_key)
         
         self.rag = RAGPipeline(retrieval_pipe, llm)
 
+    def prefetch_retrieval(self, questions):
+        """
+        Retrieval for every question, RETRIEVAL_BATCH_QUERIES at a time (the rewriter keeps
+        history-free queries as is). Each result carries its share of the batch's timings, and
+        that share in seconds is returned per question to add back to the answer latency.
+        """
+        prefetched, seconds = [], []
+        for start in range(0, len(questions), Config.RETRIEVAL_BATCH_QUERIES):
+            batch = questions[start:start + Config.RETRIEVAL_BATCH_QUERIES]
+            results = self.rag.retrieval_pipeline.run_batch(batch, retrieve_k=50)
+            share = share_timings(results[0].timings, len(batch))
+            for result in results:
+                result.timings = share
+            prefetched.extend(results)
+            seconds.extend([share["total_ms"] / 1000] * len(batch))
+        return prefetched, seconds
+
     def run(self):
         self.setup_pipeline()
         
@@ -97,6 +126,8 @@ class ExperimentRunner:
         results = []
         
         self.logger.info(f"🚀 Processing {len(dataset)} items...")
+
+        prefetched, retrieval_latency = self.prefetch_retrieval([item['question'] for item in dataset])
         
         for i, item in enumerate(tqdm(dataset)):
             time.sleep(60) # Rate limit safety between items
@@ -110,8 +141,9 @@ class ExperimentRunner:
             # Run RAG
             start = time.time()
             try:
-                res = self.rag.run(query)
-                latency = time.time() - start
+                res = self.rag.run(query, retrieved=prefetched[i])
+                # End to end, as before retrieval was batched
+                latency = time.time() - start + retrieval_latency[i]
                 
                 # Extract Data
                 generated_answer = res['answer']
@@ -127,7 +159,7 @@ class ExperimentRunner:
                 self.logger.info(f"   📝 Generated Answer:\n{generated_answer}")
                 self.logger.info(f"   🎯 Retrieval Metrics: {ret_metrics}")
                 self.logger.info(f"   🎯 Generation Metrics: {gen_metrics}")
-                self.logger.info(f"   ⏱️ Latency: {latency:.2f}s")
+                self.logger.info(f"   ⏱️ Latency: {latency:.2f}s (retrieval {retrieval_latency[i]:.2f}s)")
                 
                 # Store Row
                 row = {
@@ -135,6 +167,7 @@ class ExperimentRunner:
                     "question": query,
                     "generated_answer": generated_answer,
                     "latency": latency,
+                    "retrieval_latency": retrieval_latency[i],
                     **ret_metrics,
                     **gen_metrics
                 }
@@ -179,7 +212,7 @@ if __name__ == "__main__":
         # Cleanup Qdrant connection
         if hasattr(runner, 'rag'):
             try:
-                runner.rag.retrieval_pipeline.retriever.client.close()
+                runner.rag.retrieval_pipeline.retriever.close()
                 print("🔒 Qdrant Closed.")
             except:
                 pass
\ No newline at end of file
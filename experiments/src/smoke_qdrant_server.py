@@ -0,0 +1,137 @@
+"""
+Smoke test for Qdrant server mode (Config.QDRANT_URL) against a throwaway collection.
+
+Start a server first, e.g.
+    docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+or the standalone `qdrant` binary, then
+    python experiments/src/smoke_qdrant_server.py --url http://localhost:6333
+
+Checks: collection + payload indexes through VectorDB, one shared client across threads,
+several processes searching the same collection at once, the Retriever's query calls
+(query_points / query_batch_points / query_points_groups), and HNSW recall@10 against
+exact search.
+"""
+import sys
+import time
+import uuid
+import argparse
+import multiprocessing
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# --- SETUP PATHS ---
+current_file = Path(__file__).resolve()
+project_root = current_file.parent.parent.parent
+sys.path.append(str(project_root))
+
+from qdrant_client.http import models
+from config.config import Config
+from indexing.src.storage import VectorDB
+from indexing.src.qdrant_pool import get_client, release_client
+
+
+def configure(url: str, grpc: bool):
+    Config.QDRANT_URL = url
+    Config.QDRANT_PREFER_GRPC = grpc
+
+
+def search_worker(url, grpc, collection, queries, top_k):
+    """Runs in a separate process: its own pooled client, same collection."""
+    configure(url, grpc)
+    client = get_client()
+    try:
+        t0 = time.perf_counter()
+        for q in queries:
+            client.query_points(collection_name=collection, query=q, limit=top_k, with_payload=False)
+        return len(queries), time.perf_counter() - t0
+    finally:
+        release_client(client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Smoke test for Qdrant server / gRPC mode")
+    parser.add_argument("--url", default=Config.QDRANT_URL or "http://localhost:6333")
+    parser.add_argument("--rest", action="store_true", help="REST instead of gRPC")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=2)
+    args = parser.parse_args()
+
+    configure(args.url, not args.rest)
+    collection = f"smoke_{uuid.uuid4().hex[:8]}"
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.points, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(args.points, args.queries, replace=False)] + 0.1 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    top_k = 10
+
+    print(f"🚀 Qdrant smoke test: {args.url} ({'REST' if args.rest else 'gRPC'}), collection {collection}")
+    db = VectorDB(path=None, collection_name=collection, vector_size=args.dim)
+    try:
+        # --- Indexing path ---
+        for start in range(0, args.points, 500):
+            db.upsert_batch([
+                {"id": str(uuid.UUID(int=i)), "vector": vectors[i].tolist(), "payload": {"doc_id": str(i // 5), "chunk_index": i % 5}}
+                for i in range(start, min(start + 500, args.points))
+            ])
+        assert db.count() == args.points, f"count {db.count()} != {args.points}"
+        schema = db.client.get_collection(collection).payload_schema or {}
+        assert "doc_id" in schema, "payload index on doc_id missing"
+        print(f"✅ Indexed {args.points} points, payload indexes: {sorted(schema)}")
+
+        # --- One shared client across threads ---
+        client = get_client()
+        assert client is db.client, "get_client() did not return the shared client"
+
+        def search(q):
+            return client.query_points(collection_name=collection, query=q.tolist(), limit=top_k, with_payload=False).points
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.threads) as pool:
+            results = list(pool.map(search, queries))
+        elapsed = time.perf_counter() - t0
+        print(f"✅ {args.queries} searches on {args.threads} threads: {args.queries / elapsed:.1f} q/s")
+
+        # --- HNSW recall vs exact ---
+        exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :top_k]
+        recall = np.mean([
+            len({int(uuid.UUID(str(p.id))) for p in hits} & set(exact[i].tolist())) / top_k
+            for i, hits in enumerate(results)
+        ])
+        print(f"✅ Recall@{top_k} vs exact search: {recall:.3f}")
+
+        # --- Retriever calls ---
+        batch = client.query_batch_points(
+            collection_name=collection,
+            requests=[models.QueryRequest(query=q.tolist(), limit=top_k) for q in queries[:4]]
+        )
+        assert len(batch) == 4 and all(len(r.points) == top_k for r in batch)
+        groups = client.query_points_groups(
+            collection_name=collection, query=queries[0].tolist(), group_by="doc_id", limit=5, group_size=2
+        ).groups
+        assert len({g.id for g in groups}) == len(groups) == 5
+        release_client(client)
+        print("✅ query_batch_points / query_points_groups")
+
+        # --- Several processes on the same collection ---
+        chunks = [q.tolist() for q in queries]
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(args.processes, mp_context=ctx) as pool:
+            futures = [
+                pool.submit(search_worker, args.url, not args.rest, collection, chunks[i::args.processes], top_k)
+                for i in range(args.processes)
+            ]
+            done = [f.result() for f in futures]
+        print(f"✅ {args.processes} processes searched concurrently: {sum(n for n, _ in done)} queries")
+
+    finally:
+        db.client.delete_collection(collection)
+        db.close()
+        print(f"🧹 Dropped {collection}")
+
+
+if __name__ == "__main__":
+    main()
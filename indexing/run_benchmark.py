@@ -0,0 +1,312 @@
+import json
+import time
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from qdrant_client import QdrantClient
+from config.config import Config
+from src.embedding import Embedder
+from src.chunking import SemanticChunker
+from src.storage import VectorDB
+from src.doc_store import DocStore
+from src.batcher import EmbeddingBatcher
+from src.manifest import INDEXED_FIELDS
+from src.reader import iter_documents
+from src.index_jobs import build_points
+from src.logger import setup_logger
+
+# --- Synthetic corpus ---
+WORDS = (
+    "دادگاه رأی دادگاه‌ تجدیدنظر دیوان عالی کشور خواهان خوانده تجدیدنظرخواه قرار دعوا "
+    "قانون ماده تبصره آیین دادرسی مدنی کیفری اجرای احکام محکوم‌علیه محکوم‌له وکیل "
+    "قرارداد اجاره بیع خسارت تأخیر تأدیه مطالبه وجه چک سفته ملک مال غیرمنقول "
+    "ابطال سند رسمی الزام تنظیم اثبات مالکیت تخلیه مهریه نفقه حضانت طلاق "
+    "شعبه پرونده کلاسه اعتراض ثالث واخواهی فرجام‌خواهی صلاحیت رسیدگی دلایل ادله "
+    "کارشناسی نظریه کارشناس شهادت شهود اقرار سوگند استناد مستند مستندا به "
+    "با توجه محتویات و از در که را این آن بر برای تا است نمی‌باشد می‌باشد گردید "
+    "صادر نقض تأیید رد محکوم می‌نماید اعلام می‌گردد قطعی ظرف مدت روز پس ابلاغ"
+).split()
+DOMAINS = ["حقوقی", "کیفری", "خانواده", "تجاری", "اداری"]
+AUTHORITIES = ["دادگاه تجدیدنظر استان تهران", "دیوان عالی کشور", "دادگاه عمومی حقوقی", "دادگاه کیفری یک"]
+LAWS = ["قانون مدنی", "قانون آیین دادرسی مدنی", "قانون مجازات اسلامی", "قانون تجارت", "قانون صدور چک"]
+
+
+def make_sentence(rng: random.Random, min_words: int = 6, max_words: int = 24) -> str:
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return " ".join(words) + rng.choice([".", ".", ".", "؛", "."])
+
+
+def make_document(rng: random.Random, idx: int, min_sentences: int, max_sentences: int) -> dict:
+    """One document with the same fields preprocess/run.py writes to judgments-*-clean.json."""
+    title = make_sentence(rng, 4, 10).rstrip(".؛")
+    message = " ".join(make_sentence(rng) for _ in range(rng.randint(1, 3)))
+    decision = "\n".join(make_sentence(rng) for _ in range(rng.randint(min_sentences, max_sentences)))
+    laws = rng.sample(LAWS, k=rng.randint(0, 3))
+    date = f"{rng.randint(1390, 1403)}/{rng.randint(1, 12):02d}/{rng.randint(1, 29):02d}"
+    meta = {
+        "title": title,
+        "date": date,
+        "case_number": f"{rng.randint(10**8, 10**9 - 1)}",
+        "domain": rng.choice(DOMAINS),
+        "authority": rng.choice(AUTHORITIES),
+        "language": "fa",
+        "source_url": f"https://example.invalid/Judge/{idx}",
+    }
+    return {
+        "id": f"{meta['case_number']}_{idx}",
+        "metadata": {**meta, "date_processed": date},
+        "text_short": f"{title}\n\n{message}".strip(),
+        "text_full": f"{title}\n\n{message}\n\n{decision}".strip(),
+        "clean_parts": {"title": title, "message": message, "decision": decision},
+        "related_laws": [{"law_title": law, "law_url": f"https://ilaws.net/law/{i}"} for i, law in enumerate(laws)],
+        "mentioned_laws": [f"ماده {rng.randint(1, 500)} {law}" for law in laws],
+    }
+
+
+def generate_corpus(out_dir: Path, n_docs: int, n_files: int, min_sentences: int, max_sentences: int, seed: int):
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    per_file = -(-n_docs // n_files)
+    files = []
+    for page in range(1, n_files + 1):
+        start = (page - 1) * per_file
+        docs = [make_document(rng, i, min_sentences, max_sentences) for i in range(start, min(start + per_file, n_docs))]
+        if not docs:
+            break
+        path = out_dir / f"judgments-{page}-clean.json"
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(docs, f, ensure_ascii=False, indent=2)
+        files.append(path)
+    return files
+
+
+# --- Tiny offline model ---
+def build_tiny_model(out_dir: Path, hidden_size: int = 64, layers: int = 2, seed: int = 0) -> str:
+    """
+    Randomly initialized BERT + mean pooling saved as a SentenceTransformer, with a word-level
+    vocabulary built from the synthetic corpus. Needs no download; only useful for throughput.
+    """
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+    from sentence_transformers import SentenceTransformer, models
+
+    st_dir = out_dir / "sentence-transformer"
+    if (st_dir / "modules.json").exists():
+        return str(st_dir)
+
+    bert_dir = out_dir / "bert"
+    bert_dir.mkdir(parents=True, exist_ok=True)
+    specials = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    # BERT's basic tokenizer drops the zero-width non-joiner, so add the joined forms too
+    extra = set(" ".join(WORDS + DOMAINS + AUTHORITIES + LAWS + ["Title", "ماده"]).split())
+    extra |= {w.replace("\u200c", "") for w in extra}
+    vocab = specials + sorted(extra) + list(".:؛,/0123456789")
+    with open(bert_dir / "vocab.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+
+    tokenizer = BertTokenizerFast(vocab_file=str(bert_dir / "vocab.txt"), do_lower_case=False)
+    tokenizer.save_pretrained(str(bert_dir))
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=hidden_size,
+        num_hidden_layers=layers,
+        num_attention_heads=2,
+        intermediate_size=hidden_size * 4,
+        max_position_embeddings=Config.MAX_TOKENS
+    )
+    BertModel(config).save_pretrained(str(bert_dir))
+
+    word = models.Transformer(str(bert_dir), max_seq_length=Config.MAX_TOKENS)
+    pooling = models.Pooling(word.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[word, pooling]).save(str(st_dir))
+    return str(st_dir)
+
+
+# --- Benchmark ---
+class StageTimer:
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage: str, t0: float):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def index_corpus(files, chunker, batcher, db, doc_buffer: int, timer: StageTimer) -> dict:
+    """Same stages as run_indexing.flush(), timed separately and without the manifest."""
+    counts = {"docs": 0, "sentences": 0, "chunks": 0}
+
+    def flush(items):
+        t0 = time.perf_counter()
+        prepared = [chunker.prepare_sentences(item.get("text_full", "")) for _, item in items]
+        timer.add("sentence_split", t0)
+
+        t0 = time.perf_counter()
+        sentence_vectors = batcher.embed_groups([sentences for sentences, _ in prepared])
+        timer.add("sentence_embedding", t0)
+
+        t0 = time.perf_counter()
+        chunk_lists = [
+            chunker.chunk_from_embeddings(sentences, tokens, vectors, item.get("clean_parts", {}).get("title", "")) if sentences else []
+            for (sentences, tokens), vectors, (_, item) in zip(prepared, sentence_vectors, items)
+        ]
+        timer.add("merge", t0)
+
+        t0 = time.perf_counter()
+        chunk_vectors = batcher.embed_groups(chunk_lists)
+        timer.add("chunk_embedding", t0)
+
+        t0 = time.perf_counter()
+        points = []
+        for (file_name, item), chunks, vectors in zip(items, chunk_lists, chunk_vectors):
+            points.extend(build_points(file_name, item, chunks, vectors))
+        for start in range(0, len(points), Config.BATCH_SIZE):
+            db.upsert_batch(points[start:start + Config.BATCH_SIZE])
+        timer.add("write", t0)
+
+        counts["docs"] += len(items)
+        counts["sentences"] += sum(len(sentences) for sentences, _ in prepared)
+        counts["chunks"] += len(points)
+
+    buffer = []
+    t0 = time.perf_counter()
+    for path in files:
+        for item in iter_documents(str(path), fields=INDEXED_FIELDS):
+            buffer.append((Path(path).name, item))
+            if len(buffer) >= doc_buffer:
+                timer.add("read", t0)
+                flush(buffer)
+                buffer = []
+                t0 = time.perf_counter()
+    timer.add("read", t0)
+    if buffer:
+        flush(buffer)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexing throughput on a synthetic Persian corpus")
+    parser.add_argument("--docs", type=int, default=500, help="Number of synthetic documents")
+    parser.add_argument("--files", type=int, default=10, help="Number of judgments-*-clean.json files")
+    parser.add_argument("--min-sentences", type=int, default=10, help="Min decision sentences per document")
+    parser.add_argument("--max-sentences", type=int, default=60, help="Max decision sentences per document")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--model", default=Config.MODEL_NAME, help="Embedding model (ignored with --tiny-model)")
+    parser.add_argument("--tiny-model", action="store_true", help="Random-initialized local BERT; runs offline")
+    parser.add_argument("--backend", default=Config.EMBEDDING_BACKEND, choices=["torch", "onnx"])
+    parser.add_argument("--threads", type=int, default=Config.EMBEDDING_THREADS)
+    parser.add_argument("--embed-batch-size", type=int, default=Config.EMBED_BATCH_SIZE)
+    parser.add_argument("--doc-buffer", type=int, default=Config.INDEX_DOC_BUFFER)
+    parser.add_argument("--workdir", default=None, help="Corpus, model and Qdrant directory (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="Keep the working directory")
+    parser.add_argument("--output", default=None, help="JSON report path")
+    args = parser.parse_args()
+
+    logger = setup_logger("benchmark")
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="index_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    timer = StageTimer()
+
+    try:
+        t0 = time.perf_counter()
+        files = generate_corpus(workdir / "corpus", args.docs, args.files, args.min_sentences, args.max_sentences, args.seed)
+        corpus_mb = sum(f.stat().st_size for f in files) / 2**20
+        timer.add("generate_corpus", t0)
+        logger.info(f"🧪 Synthetic corpus: {args.docs} docs in {len(files)} files ({corpus_mb:.1f} MB) at {workdir}")
+
+        t0 = time.perf_counter()
+        model_name = build_tiny_model(workdir / "tiny-model", seed=args.seed) if args.tiny_model else args.model
+        embedder = Embedder(
+            model_name,
+            is_e5=Config.IS_E5_MODEL and not args.tiny_model,
+            backend=args.backend,
+            onnx_dir=str(workdir / "onnx"),
+            intra_op_threads=args.threads
+        )
+        chunker = SemanticChunker(embedder, max_tokens=Config.MAX_TOKENS, similarity_threshold=Config.SEMANTIC_THRESHOLD)
+        batcher = EmbeddingBatcher(embedder, batch_size=args.embed_batch_size)
+        db = VectorDB(
+            path=str(workdir / "qdrant"),
+            collection_name="benchmark",
+            vector_size=embedder.get_dimension(),
+            quantization=Config.QUANTIZATION,
+            doc_store=DocStore(str(workdir / "docstore.sqlite")) if Config.USE_DOC_STORE else None,
+            # Always a throwaway local DB, even when Config.QDRANT_URL points at a server
+            client=QdrantClient(path=str(workdir / "qdrant"))
+        )
+        timer.add("model_load", t0)
+
+        rss_before = peak_rss_mb()
+        t0 = time.perf_counter()
+        counts = index_corpus(files, chunker, batcher, db, args.doc_buffer, timer)
+        wall = time.perf_counter() - t0
+        points = db.count()
+        db.close()
+        if db.doc_store is not None:
+            db.doc_store.close()
+
+        index_stages = ["read", "sentence_split", "sentence_embedding", "merge", "chunk_embedding", "write"]
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "settings": {
+                "model": model_name if not args.tiny_model else "tiny-random-bert",
+                "backend": args.backend,
+                "device": embedder.device,
+                "threads": args.threads,
+                "docs": args.docs,
+                "files": len(files),
+                "sentences_per_doc": [args.min_sentences, args.max_sentences],
+                "corpus_mb": round(corpus_mb, 2),
+                "max_tokens": Config.MAX_TOKENS,
+                "embed_batch_size": args.embed_batch_size,
+                "doc_buffer": args.doc_buffer,
+                "upsert_batch_size": Config.BATCH_SIZE,
+                "quantization": Config.QUANTIZATION,
+                "doc_store": Config.USE_DOC_STORE,
+                "seed": args.seed,
+            },
+            "counts": {**counts, "points": points},
+            "throughput": {
+                "docs_per_s": round(counts["docs"] / wall, 2),
+                "chunks_per_s": round(counts["chunks"] / wall, 2),
+                "sentences_per_s": round(counts["sentences"] / wall, 2),
+            },
+            "seconds": {
+                "index_wall": round(wall, 3),
+                **{stage: round(timer.seconds.get(stage, 0.0), 3) for stage in index_stages},
+                "model_load": round(timer.seconds["model_load"], 3),
+                "generate_corpus": round(timer.seconds["generate_corpus"], 3),
+            },
+            "share": {stage: round(timer.seconds.get(stage, 0.0) / wall, 4) for stage in index_stages},
+            "peak_rss_mb": {
+                "before_indexing": round(rss_before, 1),
+                "total": round(peak_rss_mb(), 1),
+            },
+        }
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = Path(args.output) if args.output else (
+        Config.BASE_DIR / "logs" / f"index_benchmark_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    logger.info(f"📄 Report saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import os
 import json
 import glob
 import time
@@ -6,27 +7,76 @@ from config.config import Config
 from src.embedding import Embedder
 from src.chunking import SemanticChunker
 from src.storage import VectorDB
+from src.doc_store import DocStore
+from src.vector_store import LocalVectorStore
+from src.ann_index import AnnIndex
+from src.bm25 import Bm25Index
+from src.batcher import EmbeddingBatcher
+from src.manifest import IndexManifest
+from src.index_jobs import load_pending_file, build_points, record_document, commit_file
+from src.parallel_indexer import ParallelIndexer
+from src.token_counts import TokenCounter
 from src.logger import setup_logger
 
+def flush(pending_files, chunker, batcher, db, manifest, token_counter=None) -> int:
+    """Chunks, embeds and upserts the buffered documents of several files, then records them in the manifest."""
+    entries = [(pending, item, doc_hash) for pending in pending_files for item, doc_hash in pending.to_index]
+
+    # Cross-document batches: sentences of all documents, then chunks of all documents
+    docs = [doc for pending in pending_files for doc in pending.chunk_inputs()]
+    chunk_lists = chunker.chunk_batch(docs, batcher)
+    vector_lists = batcher.embed_groups(chunk_lists)
+
+    batch_points = []
+    total_chunks = 0
+    for (pending, item, doc_hash), chunks, vectors in zip(entries, chunk_lists, vector_lists):
+        record_document(pending, item, doc_hash, len(chunks), db, manifest)
+        batch_points.extend(build_points(pending.file_name, item, chunks, vectors, token_counter))
+
+        # Batch Insert
+        if len(batch_points) >= Config.BATCH_SIZE:
+            db.upsert_batch(batch_points)
+            total_chunks += len(batch_points)
+            batch_points = []
+
+    # Insert remaining
+    if batch_points:
+        db.upsert_batch(batch_points)
+        total_chunks += len(batch_points)
+
+    # Record progress per file so an interrupted run resumes after the last flush
+    for pending in pending_files:
+        commit_file(pending, db, manifest)
+    manifest.save()
+
+    return total_chunks
+
+
 def main():
     # Setup Logging
     logger = setup_logger(Config.MODEL_NAME)
     
     logger.info(f"⏱️  Starting Indexing Pipeline")
-    logger.info(f"⚙️  Model: {Config.MODEL_NAME} | Batch: {Config.BATCH_SIZE}")
+    logger.info(f"⚙️  Model: {Config.MODEL_NAME} | Batch: {Config.BATCH_SIZE} | Embed Batch: {Config.EMBED_BATCH_SIZE}")
     logger.info(f"📂 Database Path: {Config.DB_ROOT_DIR}")
     
     start_time = time.perf_counter()
 
     # Initialize Components
-    embedder = Embedder(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
+    embedder = Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
     chunker = SemanticChunker(embedder, max_tokens=Config.MAX_TOKENS, similarity_threshold=Config.SEMANTIC_THRESHOLD)
+    batcher = EmbeddingBatcher(embedder, batch_size=Config.EMBED_BATCH_SIZE)
+    token_counter = TokenCounter.from_config(embedder) if Config.STORE_TOKEN_COUNTS else None
     
     # Qdrant Setup
     db = VectorDB(
         path=str(Config.QDRANT_PATH),
         collection_name=Config.COLLECTION_NAME, 
-        vector_size=embedder.get_dimension()
+        vector_size=embedder.get_dimension(),
+        quantization=Config.QUANTIZATION,
+        doc_store=DocStore(str(Config.DOC_STORE_PATH)) if Config.USE_DOC_STORE else None,
+        local_vectors=LocalVectorStore(str(Config.LOCAL_VECTORS_DIR), embedder.get_dimension()) if Config.USE_LOCAL_VECTORS else None,
+        ann_index=AnnIndex.from_config(embedder.get_dimension())
     )
 
     # Find Files
@@ -39,58 +89,97 @@ def main():
 
     logger.info(f"Found {len(files)} files to index.")
 
+    # Manifest (what is already in the collection)
+    manifest = IndexManifest(str(Config.MANIFEST_PATH), Config.MODEL_NAME)
+    if not len(manifest) and db.count() > 0:
+        logger.warning("⚠️ Collection has points but no manifest. Points from older runs are not tracked and may duplicate.")
+
+    # Deletions (files that disappeared since the last run)
+    file_names = [os.path.basename(f) for f in files]
+    for stale_name in manifest.stale_files(file_names):
+        stale_ids = []
+        stale_docs = manifest.get_docs(stale_name)
+        for doc_id, doc_entry in stale_docs.items():
+            stale_ids.extend(manifest.point_ids(stale_name, doc_id, doc_entry["chunks"]))
+        db.delete_points(stale_ids)
+        manifest.remove_file(stale_name)
+        if db.doc_store is not None:
+            db.doc_store.delete_documents([doc_id for doc_id in stale_docs if manifest.owner(doc_id) is None])
+        logger.info(f"🗑️  Removed {stale_name} ({len(stale_ids)} points)")
+    manifest.save()
+
+    # Points indexed before the filter fields existed
+    backfilled = db.backfill_filter_fields()
+    if backfilled:
+        logger.info(f"🏷️  Added filter fields to {backfilled} existing points")
+
+    # Points indexed before token counts were stored
+    if token_counter is not None:
+        counted = db.backfill_token_counts(token_counter)
+        if counted:
+            logger.info(f"🔢 Added token counts to {counted} existing points")
+
+    # Points indexed before the local vector store was enabled
+    copied = db.sync_local_vectors()
+    if copied:
+        logger.info(f"🗄️  Copied {copied} existing vectors to {Config.LOCAL_VECTORS_DIR}")
+
+    # Points indexed before the ANN index was enabled
+    added = db.sync_ann_index()
+    if added:
+        logger.info(f"🧭 Added {added} existing vectors to the {Config.ANN_BACKEND} index")
+
     # Process Loop
     total_chunks = 0
+    skipped_files = 0
+    skipped_docs = 0
 
-    for file_path in tqdm(files, desc="Processing Files"):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            logger.error(f"Failed to read {file_path}: {e}")
-            continue
-
-        batch_points = []
-        
-        for item in data:
-            text_full = item.get("text_full", "")
-            title = item.get("clean_parts", {}).get("title", "")
-            
-            if not text_full: continue
-
-            # Chunk
-            chunks = chunker.chunk_text(text_full, title=title)
-            if not chunks: continue
-            
-            # Embed
-            vectors = embedder.embed(chunks)
-
-            # Prepare Data
-            for i, chunk_text in enumerate(chunks):
-                payload = {
-                    "doc_id": item["id"],
-                    "chunk_index": i,
-                    "text": chunk_text,
-                    "metadata": item.get("metadata", {}),
-                    "related_laws": item.get("related_laws", []),
-                    "mentioned_laws": item.get("mentioned_laws", [])
-                }
-                
-                batch_points.append({
-                    "vector": vectors[i],
-                    "payload": payload
-                })
-
-            # Batch Insert
-            if len(batch_points) >= Config.BATCH_SIZE:
-                db.upsert_batch(batch_points)
-                total_chunks += len(batch_points)
-                batch_points = []
-
-        # Insert remaining
-        if batch_points:
-            db.upsert_batch(batch_points)
-            total_chunks += len(batch_points)
+    if Config.PARALLEL_INDEXING:
+        indexer = ParallelIndexer(
+            embedder, chunker, db, manifest,
+            chunk_workers=Config.CHUNK_WORKERS,
+            embed_workers=Config.EMBED_WORKERS,
+            queue_size=Config.QUEUE_SIZE,
+            doc_buffer=Config.INDEX_DOC_BUFFER,
+            embed_batch_size=Config.EMBED_BATCH_SIZE,
+            token_counter=token_counter
+        )
+        total_chunks = indexer.run(files)
+        skipped_files = indexer.skipped_files
+        skipped_docs = indexer.skipped_docs
+    else:
+        pending_files = []
+        for file_path in tqdm(files, desc="Processing Files"):
+            pending, skipped, unchanged = load_pending_file(file_path, manifest)
+            skipped_files += unchanged
+            skipped_docs += skipped
+            if pending is None:
+                continue
+            pending_files.append(pending)
+
+            # Flush whole files once enough documents are buffered for large embedding batches
+            if sum(len(p.to_index) for p in pending_files) >= Config.INDEX_DOC_BUFFER:
+                total_chunks += flush(pending_files, chunker, batcher, db, manifest, token_counter)
+                pending_files = []
+
+        if pending_files:
+            total_chunks += flush(pending_files, chunker, batcher, db, manifest, token_counter)
+
+    embedder.save_cache()
+    if db.local_vectors is not None:
+        db.local_vectors.save()
+    if db.ann_index is not None:
+        db.ann_index.save()
+
+    # Lexical index: rebuilt from the stored chunk texts whenever the collection changed
+    if Config.USE_BM25:
+        bm25_meta = Config.BM25_DIR / "meta.json"
+        n_points = db.count()
+        previous = json.loads(bm25_meta.read_text(encoding="utf-8"))["chunks"] if bm25_meta.exists() else None
+        if total_chunks or previous != n_points:
+            bm25_start = time.perf_counter()
+            bm25 = Bm25Index.build(str(Config.BM25_DIR), db.iter_chunk_texts(), k1=Config.BM25_K1, b=Config.BM25_B)
+            logger.info(f"📚 BM25 index rebuilt: {len(bm25)} chunks in {time.perf_counter() - bm25_start:.1f}s")
 
     end_time = time.perf_counter()
     duration = end_time - start_time
@@ -98,6 +187,7 @@ def main():
     logger.info("="*40)
     logger.info(f"🎉 Indexing Complete!")
     logger.info(f"📊 Total Chunks: {total_chunks}")
+    logger.info(f"⏭️  Skipped: {skipped_files} unchanged files, {skipped_docs} unchanged documents")
     logger.info(f"⏱️  Time: {duration:.2f}s ({duration/60:.1f} min)")
     logger.info("="*40)
 
@@ -0,0 +1,309 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
+import numpy as np
+from .logger import logger
+from config.config import Config
+
+
+class AnnIndex:
+    """
+    In-process approximate nearest-neighbour index over the collection's vectors, keyed by
+    Qdrant point id and scored by cosine similarity like the collection.
+
+    Qdrant's embedded local mode scans every vector on each query; with an AnnIndex the
+    Retriever asks it for ids + scores and reads only the payloads of the hits from Qdrant.
+    Written next to Qdrant at index time (VectorDB.upsert_batch / delete_points).
+
+    - labels.json: point id -> integer label of the backend index.
+    - index file:  the backend's own serialization.
+
+    Subclasses implement _new_index / _load_index / _write_index / _add / _delete / _search / _set_ef.
+    """
+
+    backend: str = ""
+    index_file: str = ""
+
+    def __init__(self, path: str, dim: int, read_only: bool = False):
+        self.path = Path(path)
+        self.dim = dim
+        self.read_only = read_only
+        self._lock = threading.Lock()
+
+        self.labels: Dict[str, int] = {}
+        self.ids: Dict[int, str] = {}
+        self.next_label = 0
+        self.ef = Config.ANN_EF_SEARCH
+        self.index = None
+
+        if not read_only:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def from_config(dim: int, read_only: bool = False, path: Optional[str] = None) -> Optional["AnnIndex"]:
+        """
+        Config.ANN_BACKEND index at `path` (default Config.ANN_INDEX_DIR, else a directory per
+        backend and model under DB_ROOT_DIR), or None when no backend is set.
+        """
+        if not Config.ANN_BACKEND:
+            return None
+        backends = {"hnswlib": HnswlibIndex, "faiss": FaissIndex}
+        if Config.ANN_BACKEND not in backends:
+            raise ValueError(f"Unknown ANN backend: {Config.ANN_BACKEND}")
+        if path is None:
+            clean_name = Config.MODEL_NAME.split("/")[-1]
+            path = str(Config.ANN_INDEX_DIR or Config.DB_ROOT_DIR / f"ann_{Config.ANN_BACKEND}_{clean_name}")
+        return backends[Config.ANN_BACKEND](path, dim, read_only=read_only)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    # --- Storage ---
+    def _load(self):
+        labels_path = self.path / "labels.json"
+        index_path = self.path / self.index_file
+        if labels_path.exists() and index_path.exists():
+            with open(labels_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("dim") == self.dim and state.get("backend") == self.backend:
+                self.labels = state["labels"]
+                self.next_label = state["next_label"]
+                self._load_index(str(index_path))
+            else:
+                logger.warning(f"⚠️ ANN index at {self.path} is {state.get('backend')}/{state.get('dim')}, not {self.backend}/{self.dim}. Ignoring it.")
+                self.labels = {}
+
+        if self.index is None:
+            self._new_index()
+        self.ids = {label: point_id for point_id, label in self.labels.items()}
+        self.set_ef(self.ef)
+        logger.info(f"🧭 ANN index ({self.backend}): {len(self.labels)} points at {self.path}")
+
+    def save(self):
+        if self.read_only:
+            return
+        with self._lock:
+            index_path = self.path / self.index_file
+            tmp_index = index_path.with_name(index_path.name + ".tmp")
+            self._write_index(str(tmp_index))
+            os.replace(tmp_index, index_path)
+
+            labels_path = self.path / "labels.json"
+            tmp_labels = labels_path.with_suffix(".json.tmp")
+            with open(tmp_labels, "w", encoding="utf-8") as f:
+                json.dump({
+                    "backend": self.backend,
+                    "dim": self.dim,
+                    "next_label": self.next_label,
+                    "labels": self.labels,
+                }, f)
+            os.replace(tmp_labels, labels_path)
+
+    # --- Writes (indexing) ---
+    def add(self, point_ids: List[str], vectors):
+        """Adds or replaces points (a re-added id gets a new label; its old one is deleted)."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        # Last vector wins for ids repeated in one call
+        last = {pid: i for i, pid in enumerate(point_ids)}
+        with self._lock:
+            self._delete_ids(list(last))
+            labels = np.arange(self.next_label, self.next_label + len(last), dtype=np.int64)
+            self.next_label += len(last)
+            for pid, label in zip(last, labels.tolist()):
+                self.labels[pid] = label
+                self.ids[label] = pid
+            self._add(vectors[list(last.values())], labels)
+
+    def delete(self, point_ids: List[str]):
+        with self._lock:
+            self._delete_ids(point_ids)
+
+    def _delete_ids(self, point_ids: List[str]):
+        labels = [self.labels.pop(pid) for pid in point_ids if pid in self.labels]
+        for label in labels:
+            del self.ids[label]
+        if labels:
+            self._delete(np.asarray(labels, dtype=np.int64))
+
+    # --- Reads (retrieval) ---
+    def search(self, query_vectors, k: int) -> Tuple[List[List[str]], List[List[float]]]:
+        """Top-k (point ids, cosine scores) per query, best first."""
+        query_vectors = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dim)
+        if not self.labels:
+            return [[] for _ in query_vectors], [[] for _ in query_vectors]
+        labels, scores = self._search(query_vectors, min(k, len(self.labels)))
+
+        id_lists, score_lists = [], []
+        for row_labels, row_scores in zip(labels, scores):
+            # -1 = fewer results than k; labels of deleted points may still come back
+            hits = [(self.ids[label], float(score)) for label, score in zip(row_labels.tolist(), row_scores.tolist()) if label in self.ids][:k]
+            id_lists.append([pid for pid, _ in hits])
+            score_lists.append([score for _, score in hits])
+        return id_lists, score_lists
+
+    def set_ef(self, ef: int):
+        """Search breadth (recall vs latency); takes effect on the next query."""
+        self.ef = ef
+        self._set_ef(ef)
+
+
+class HnswlibIndex(AnnIndex):
+    """HNSW graph (hnswlib) built with Config.HNSW_M / HNSW_EF; `ef` is hnswlib's query-time ef."""
+
+    backend = "hnswlib"
+    index_file = "index.bin"
+
+    @staticmethod
+    def _hnswlib():
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("Config.ANN_BACKEND = 'hnswlib': pip install hnswlib") from e
+        return hnswlib
+
+    def _new_index(self, capacity: int = 1024):
+        self.index = self._hnswlib().Index(space="cosine", dim=self.dim)
+        self.index.init_index(max_elements=capacity, ef_construction=Config.HNSW_EF, M=Config.HNSW_M, allow_replace_deleted=True)
+
+    def _load_index(self, path: str):
+        self.index = self._hnswlib().Index(space="cosine", dim=self.dim)
+        self.index.load_index(path, allow_replace_deleted=True)
+
+    def _write_index(self, path: str):
+        self.index.save_index(path)
+
+    def _add(self, vectors: np.ndarray, labels: np.ndarray):
+        needed = self.index.get_current_count() + len(labels)
+        if needed > self.index.get_max_elements():
+            self.index.resize_index(max(self.index.get_max_elements() * 2, needed))
+        # Slots of deleted points are reused
+        self.index.add_items(vectors, labels, replace_deleted=True)
+
+    def _delete(self, labels: np.ndarray):
+        for label in labels.tolist():
+            self.index.mark_deleted(label)
+
+    def _search(self, query_vectors: np.ndarray, k: int):
+        # hnswlib searches with max(ef, k)
+        labels, distances = self.index.knn_query(query_vectors, k=k)
+        return labels, 1.0 - distances
+
+    def _set_ef(self, ef: int):
+        self.index.set_ef(ef)
+
+
+class FaissIndex(AnnIndex):
+    """
+    FAISS index from Config.ANN_FAISS_FACTORY (e.g. "HNSW32,Flat" or "IVF1024,PQ64") over
+    normalized vectors with inner product. `ef` sets efSearch (HNSW) or nprobe (IVF).
+
+    Trained factories buffer vectors until Config.ANN_FAISS_TRAIN_SIZE have arrived (or until
+    save()) and train on those. Indexes that cannot remove vectors (HNSW) keep deleted points
+    in the graph and drop them from the results until the index is rebuilt from the live points:
+    on save(), or once they exceed Config.ANN_FAISS_MAX_DELETED of the index.
+    """
+
+    backend = "faiss"
+    index_file = "index.faiss"
+
+    def __init__(self, path: str, dim: int, read_only: bool = False):
+        self._pending: List[Tuple[np.ndarray, np.ndarray]] = []
+        super().__init__(path, dim, read_only=read_only)
+
+    @staticmethod
+    def _faiss():
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError("Config.ANN_BACKEND = 'faiss': pip install faiss-cpu") from e
+        return faiss
+
+    def _new_index(self):
+        faiss = self._faiss()
+        # IVF indexes take ids (and removals) natively; the others need an id map
+        factory = Config.ANN_FAISS_FACTORY if "IVF" in Config.ANN_FAISS_FACTORY else f"IDMap2,{Config.ANN_FAISS_FACTORY}"
+        self.index = faiss.index_factory(self.dim, factory, faiss.METRIC_INNER_PRODUCT)
+
+    def _load_index(self, path: str):
+        self.index = self._faiss().read_index(path)
+
+    def _write_index(self, path: str):
+        self._train()
+        if self._deleted():
+            self._compact()
+        self._faiss().write_index(self.index, path)
+
+    def _normalized(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.array(vectors, dtype=np.float32)
+        self._faiss().normalize_L2(vectors)
+        return vectors
+
+    def _train(self):
+        """Trains on the buffered vectors and adds them (no-op once trained)."""
+        if not self._pending:
+            return
+        vectors = np.concatenate([v for v, _ in self._pending])
+        labels = np.concatenate([l for _, l in self._pending])
+        self._pending = []
+        if not self.index.is_trained:
+            logger.info(f"🧭 Training FAISS {Config.ANN_FAISS_FACTORY} on {len(vectors)} vectors")
+            self.index.train(vectors)
+        self.index.add_with_ids(vectors, labels)
+
+    def _add(self, vectors: np.ndarray, labels: np.ndarray):
+        vectors = self._normalized(vectors)
+        if self.index.is_trained:
+            self.index.add_with_ids(vectors, labels)
+            return
+        self._pending.append((vectors, labels))
+        if sum(len(l) for _, l in self._pending) >= Config.ANN_FAISS_TRAIN_SIZE:
+            self._train()
+
+    def _delete(self, labels: np.ndarray):
+        if self._pending:
+            kept = []
+            for vectors, pending_labels in self._pending:
+                keep = ~np.isin(pending_labels, labels)
+                kept.append((vectors[keep], pending_labels[keep]))
+            self._pending = kept
+        try:
+            self.index.remove_ids(labels)
+        except RuntimeError:
+            # e.g. HNSW: stays in the graph, filtered out by search()
+            if self.index.ntotal and self._deleted() > Config.ANN_FAISS_MAX_DELETED * self.index.ntotal:
+                self._compact()
+
+    def _deleted(self) -> int:
+        """Deleted points still in the index."""
+        if not self.index.is_trained:
+            return 0
+        return max(self.index.ntotal - len(self.ids), 0)
+
+    def _compact(self):
+        """Rebuilds the index from the live points (their stored vectors; lossy for compressed storage)."""
+        live = np.fromiter(self.ids, dtype=np.int64, count=len(self.ids))
+        vectors = self.index.reconstruct_batch(live) if len(live) else np.empty((0, self.dim), dtype=np.float32)
+        logger.info(f"🧭 Rebuilding FAISS index: {self.index.ntotal - len(live)} deleted points dropped, {len(live)} kept")
+        self._new_index()
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add_with_ids(vectors, live)
+        self._set_ef(self.ef)
+
+    def _search(self, query_vectors: np.ndarray, k: int):
+        if self._pending:
+            with self._lock:
+                self._train()
+        # Room for deleted points that are still in the index
+        k = min(k + max(self.index.ntotal - len(self.labels), 0), self.index.ntotal)
+        scores, labels = self.index.search(self._normalized(query_vectors), k)
+        return labels, scores
+
+    def _set_ef(self, ef: int):
+        if "IVF" in Config.ANN_FAISS_FACTORY:
+            self._faiss().ParameterSpace().set_index_parameter(self.index, "nprobe", ef)
+        elif "HNSW" in Config.ANN_FAISS_FACTORY:
+            self._faiss().ParameterSpace().set_index_parameter(self.index, "efSearch", ef)
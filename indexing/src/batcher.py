@@ -0,0 +1,39 @@
+from typing import List
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """
+    Embeds texts from many documents together.
+
+    All texts are flattened, sorted by length so each batch pads to a similar size,
+    encoded in batches of `batch_size`, and routed back to their owning group in order.
+    """
+
+    def __init__(self, embedder, batch_size: int = 128):
+        self.embedder = embedder
+        self.batch_size = batch_size
+
+    def embed_groups(self, groups: List[List[str]], is_query: bool = False) -> List[np.ndarray]:
+        flat_texts = [text for group in groups for text in group]
+        if not flat_texts:
+            return [np.empty((0, 0), dtype=np.float32) for _ in groups]
+
+        # Longest first: the largest batch runs first and later batches shrink
+        order = sorted(range(len(flat_texts)), key=lambda i: len(flat_texts[i]), reverse=True)
+
+        vectors = None
+        for start in range(0, len(order), self.batch_size):
+            batch_idx = order[start:start + self.batch_size]
+            batch_vectors = self.embedder.embed(
+                [flat_texts[i] for i in batch_idx],
+                is_query=is_query,
+                batch_size=self.batch_size
+            )
+            if vectors is None:
+                vectors = np.empty((len(flat_texts), batch_vectors.shape[1]), dtype=batch_vectors.dtype)
+            vectors[batch_idx] = batch_vectors
+
+        # Route back: group g owns the flat slice [offsets[g], offsets[g+1])
+        offsets = np.cumsum([0] + [len(group) for group in groups])
+        return [vectors[offsets[g]:offsets[g + 1]] for g in range(len(groups))]
@@ -0,0 +1,139 @@
+import os
+import re
+import json
+import shutil
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Tuple
+import numpy as np
+from preprocess.src.text_cleaning import normalize_text, to_english_digits
+from .logger import logger
+
+TOKEN_RE = re.compile(r"[\w\u200c]+")
+STOPWORDS = frozenset(
+    "و در به از که این را با است برای آن یک تا بر هم نیز یا اما شود شده می ها های "
+    "وی او ای اگر پس چه هر همه خود باید بود شد کرد کند".split()
+)
+
+
+def tokenize(text: str, normalize: bool = True) -> List[str]:
+    """
+    Persian-aware terms: the preprocess normalization (shekar + digit folding), then word
+    tokens with zero-width non-joiners kept inside words. Indexed chunks were already
+    normalized by preprocess/run.py, so they only need normalize=False.
+    """
+    text = to_english_digits(normalize_text(text) if normalize else text)
+    tokens = (t.strip("\u200c").lower() for t in TOKEN_RE.findall(text))
+    return [t for t in tokens if t and t not in STOPWORDS]
+
+
+class Bm25Index:
+    """
+    Inverted BM25 index over chunks, stored as flat memory-mapped postings.
+
+    - postings_docs.u32: chunk number of every posting, grouped by term (ascending within a term).
+    - postings_w.f32:    precomputed BM25 weight of every posting (idf * saturated tf).
+    - offsets.u64:       postings of term t are [offsets[t], offsets[t + 1]).
+    - vocab.json:        term -> term id.
+    - point_ids.json:    chunk number -> Qdrant point id.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        if not (self.path / "meta.json").exists():
+            raise FileNotFoundError(f"No BM25 index at {self.path}. Run indexing with Config.USE_BM25 = True.")
+
+        with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(self.path / "vocab.json", "r", encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        with open(self.path / "point_ids.json", "r", encoding="utf-8") as f:
+            self.point_ids = json.load(f)
+
+        self.offsets = np.fromfile(self.path / "offsets.u64", dtype=np.uint64)
+        n_postings = int(self.offsets[-1]) if len(self.offsets) else 0
+        if n_postings:
+            self.docs = np.memmap(self.path / "postings_docs.u32", dtype=np.uint32, mode="r", shape=(n_postings,))
+            self.weights = np.memmap(self.path / "postings_w.f32", dtype=np.float32, mode="r", shape=(n_postings,))
+        else:
+            self.docs = np.empty(0, dtype=np.uint32)
+            self.weights = np.empty(0, dtype=np.float32)
+        logger.info(f"📚 BM25 index: {len(self.point_ids)} chunks, {len(self.vocab)} terms at {self.path}")
+
+    def __len__(self) -> int:
+        return len(self.point_ids)
+
+    @classmethod
+    def build(cls, path: str, chunks: Iterable[Tuple[str, str]], k1: float = 1.2, b: float = 0.75) -> "Bm25Index":
+        """Builds the index from (point_id, text) pairs into a temporary directory, then swaps it in."""
+        path = Path(path)
+        vocab = {}
+        point_ids = []
+        lengths = array("I")
+        term_col, doc_col, tf_col = array("I"), array("I"), array("I")
+
+        for point_id, text in chunks:
+            tokens = tokenize(text, normalize=False)
+            doc = len(point_ids)
+            point_ids.append(str(point_id))
+            lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_col.append(vocab.setdefault(term, len(vocab)))
+                doc_col.append(doc)
+                tf_col.append(tf)
+
+        terms = np.frombuffer(term_col, dtype=np.uint32) if len(term_col) else np.empty(0, dtype=np.uint32)
+        docs = np.frombuffer(doc_col, dtype=np.uint32) if len(doc_col) else np.empty(0, dtype=np.uint32)
+        tfs = np.frombuffer(tf_col, dtype=np.uint32).astype(np.float32) if len(tf_col) else np.empty(0, dtype=np.float32)
+        doc_lengths = np.frombuffer(lengths, dtype=np.uint32).astype(np.float32) if len(lengths) else np.empty(0, dtype=np.float32)
+
+        # Group postings by term; the stable sort keeps chunk numbers ascending inside each term
+        order = np.argsort(terms, kind="stable")
+        terms, docs, tfs = terms[order], docs[order], tfs[order]
+        # Integer counts: a float32 cumsum stops being exact past 2^24 postings
+        counts = np.bincount(terms, minlength=len(vocab))
+        offsets = np.concatenate([np.zeros(1, dtype=np.uint64), np.cumsum(counts, dtype=np.uint64)])
+        df = counts.astype(np.float32)
+
+        n_docs = len(point_ids)
+        avgdl = float(doc_lengths.mean()) if n_docs else 0.0
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths[docs] / max(avgdl, 1e-9))
+        weights = (idf[terms] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        docs.astype(np.uint32).tofile(tmp_path / "postings_docs.u32")
+        weights.tofile(tmp_path / "postings_w.f32")
+        offsets.tofile(tmp_path / "offsets.u64")
+        with open(tmp_path / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+        with open(tmp_path / "point_ids.json", "w", encoding="utf-8") as f:
+            json.dump(point_ids, f)
+        with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"chunks": n_docs, "terms": len(vocab), "postings": len(docs), "avgdl": avgdl, "k1": k1, "b": b}, f)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        return cls(str(path))
+
+    def search(self, query: str, top_k: int = 50) -> List[Tuple[str, float]]:
+        """(point_id, BM25 score) of the best `top_k` chunks, best first."""
+        scores = np.zeros(len(self.point_ids), dtype=np.float32)
+        for term, qtf in Counter(tokenize(query)).items():
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+            # Chunk numbers are unique within a term, so the fancy-index add is exact
+            scores[self.docs[start:end]] += qtf * self.weights[start:end]
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.point_ids[i], float(scores[i])) for i in matched]
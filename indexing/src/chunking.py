@@ -1,6 +1,6 @@
 import re
-from typing import List
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Tuple
+import numpy as np
 
 class SemanticChunker:
     def __init__(self, embedder, max_tokens: int = 512, similarity_threshold: float = 0.65, overlap_sentences: int = 1):
@@ -27,44 +27,83 @@ class SemanticChunker:
             sentences.append(current.strip())
         return sentences
 
-    def chunk_text(self, text: str, title: str = "") -> List[str]:
-        if not text: return []
-        raw_sentences = self._split_sentences(text)
-        if not raw_sentences: return []
+    def _token_count(self, text: str) -> int:
+        return len(self.tokenizer.tokenize(text))
 
+    def prepare_sentences(self, text: str) -> Tuple[List[str], List[int]]:
+        """Splits text into sentences that fit the model, tokenizing every sentence exactly once."""
+        if not text: return [], []
         valid_sentences = []
-        for s in raw_sentences:
-            if len(self.tokenizer.tokenize(s)) > self.max_tokens:
-                valid_sentences.extend(self._force_split(s))
+        sentence_tokens = []
+        for s in self._split_sentences(text):
+            count = self._token_count(s)
+            if count > self.max_tokens:
+                for piece in self._force_split(s):
+                    valid_sentences.append(piece)
+                    sentence_tokens.append(self._token_count(piece))
             else:
                 valid_sentences.append(s)
+                sentence_tokens.append(count)
+        return valid_sentences, sentence_tokens
+
+    def chunk_text(self, text: str, title: str = "") -> List[str]:
+        sentences, sentence_tokens = self.prepare_sentences(text)
+        if not sentences: return []
+        embeddings = self.embedder.embed(sentences)
+        return self.chunk_from_embeddings(sentences, sentence_tokens, embeddings, title)
+
+    def chunk_batch(self, docs: List[Tuple[str, str]], batcher) -> List[List[str]]:
+        """
+        Chunks many (text, title) documents with one cross-document sentence embedding pass.
+        Returns one list of chunks per document, in input order.
+        """
+        prepared = [self.prepare_sentences(text) for text, _ in docs]
+        embeddings = batcher.embed_groups([sentences for sentences, _ in prepared])
+        return [
+            self.chunk_from_embeddings(sentences, sentence_tokens, doc_embeddings, title) if sentences else []
+            for (sentences, sentence_tokens), doc_embeddings, (_, title) in zip(prepared, embeddings, docs)
+        ]
 
-        if not valid_sentences: return []
-        embeddings = self.embedder.embed(valid_sentences)
+    def chunk_from_embeddings(self, sentences: List[str], sentence_tokens: List[int], embeddings: np.ndarray, title: str = "") -> List[str]:
+        sims = self._adjacent_similarities(embeddings)
+        return self._merge(sentences, sentence_tokens, sims, title)
 
-        sims = []
-        for i in range(len(embeddings) - 1):
-            v1 = embeddings[i].reshape(1, -1)
-            v2 = embeddings[i+1].reshape(1, -1)
-            sim = cosine_similarity(v1, v2)[0][0]
-            sims.append(sim)
+    @staticmethod
+    def _adjacent_similarities(embeddings: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each sentence with the next one (embeddings are L2-normalized)."""
+        if len(embeddings) < 2:
+            return np.empty(0, dtype=np.float32)
+        return np.einsum("ij,ij->i", embeddings[:-1], embeddings[1:])
+
+    def _merge(self, sentences: List[str], sentence_tokens: List[int], sims: np.ndarray, title: str) -> List[str]:
+        """
+        Greedy merge of sentences into chunks using running token totals.
+        Same boundaries as tokenizing "Title: {title}\n" + " ".join(chunk) for every candidate.
+        """
+        prefix_tokens = self._token_count(f"Title: {title}\n")
+        join_tokens = self._token_count(" ")
 
         chunks = []
-        current_chunk = [valid_sentences[0]]
-        
+        current_chunk = [sentences[0]]
+        current_tokens = sentence_tokens[0]
+
         for i in range(len(sims)):
-            similarity = sims[i]
-            next_s = valid_sentences[i+1]
-            
-            cand_text = " ".join(current_chunk + [next_s])
-            token_count = len(self.tokenizer.tokenize(f"Title: {title}\n{cand_text}"))
+            next_s = sentences[i+1]
+            next_tokens = sentence_tokens[i+1]
+
+            token_count = prefix_tokens + current_tokens + join_tokens + next_tokens
 
-            if token_count >= self.max_tokens or (similarity < self.threshold and len(current_chunk) > 3):
+            if token_count >= self.max_tokens or (sims[i] < self.threshold and len(current_chunk) > 3):
                 chunks.append(" ".join(current_chunk))
                 overlap_start = max(0, len(current_chunk) - self.overlap)
-                current_chunk = current_chunk[overlap_start:] + [next_s]
+                tail = current_chunk[overlap_start:]
+                # current_chunk always ends at sentence i, so the tail is sentences (i - len(tail), i]
+                kept_tokens = sentence_tokens[i + 1 - len(tail): i + 1] + [next_tokens]
+                current_chunk = tail + [next_s]
+                current_tokens = sum(kept_tokens) + join_tokens * (len(kept_tokens) - 1)
             else:
                 current_chunk.append(next_s)
+                current_tokens += join_tokens + next_tokens
         
         if current_chunk:
             chunks.append(" ".join(current_chunk))
@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Tuple
+
+
+class DocStore:
+    """
+    SQLite side store for everything that does not need to live in Qdrant payloads.
+
+    - documents: one row per judgment (metadata, related_laws, mentioned_laws).
+    - chunks:    one row per point (doc_id, chunk_index, text).
+
+    Qdrant payloads then only carry ids and filterable fields; text and metadata are
+    hydrated here for the few candidates that actually need them.
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                doc_id TEXT PRIMARY KEY,
+                metadata TEXT,
+                related_laws TEXT,
+                mentioned_laws TEXT
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                point_id TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    # --- Writes (indexing) ---
+    def upsert_documents(self, items: Iterable[Dict[str, Any]]):
+        rows = [
+            (
+                item["id"],
+                json.dumps(item.get("metadata", {}), ensure_ascii=False),
+                json.dumps(item.get("related_laws", []), ensure_ascii=False),
+                json.dumps(item.get("mentioned_laws", []), ensure_ascii=False),
+            )
+            for item in items
+        ]
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def upsert_chunks(self, rows: List[Tuple[str, str, int, str]]):
+        """rows: (point_id, doc_id, chunk_index, text)"""
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def delete_chunks(self, point_ids: List[str]):
+        with self._lock:
+            self.conn.executemany("DELETE FROM chunks WHERE point_id = ?", [(pid,) for pid in point_ids])
+            self.conn.commit()
+
+    def delete_documents(self, doc_ids: List[str]):
+        with self._lock:
+            self.conn.executemany("DELETE FROM documents WHERE doc_id = ?", [(d,) for d in doc_ids])
+            self.conn.commit()
+
+    def iter_chunks(self, batch_size: int = 1000):
+        """(point_id, text) of every stored chunk, read in pages of `batch_size` rows."""
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT point_id, text FROM chunks WHERE point_id > ? ORDER BY point_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+
+    # --- Reads (retrieval) ---
+    def _select_in(self, sql: str, keys: List[str]):
+        keys = list(dict.fromkeys(str(k) for k in keys))
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            return self.conn.execute(sql.format(placeholders), keys).fetchall()
+
+    def get_texts(self, point_ids: List[str]) -> Dict[str, str]:
+        rows = self._select_in("SELECT point_id, text FROM chunks WHERE point_id IN ({})", point_ids)
+        return {point_id: text for point_id, text in rows}
+
+    def get_documents(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        rows = self._select_in(
+            "SELECT doc_id, metadata, related_laws, mentioned_laws FROM documents WHERE doc_id IN ({})", doc_ids
+        )
+        return {
+            doc_id: {
+                "metadata": json.loads(metadata),
+                "related_laws": json.loads(related_laws),
+                "mentioned_laws": json.loads(mentioned_laws),
+            }
+            for doc_id, metadata, related_laws, mentioned_laws in rows
+        }
+
+    def hit_texts(self, hits) -> Dict[str, str]:
+        """Chunk text per hit id: from the payload when present (full payloads), otherwise from the store."""
+        texts = {str(h.id): h.payload["text"] for h in hits if h.payload.get("text")}
+        missing = [str(h.id) for h in hits if str(h.id) not in texts]
+        if missing:
+            texts.update(self.get_texts(missing))
+        return texts
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -2,31 +2,113 @@ from sentence_transformers import SentenceTransformer
 from typing import List
 import torch
 import numpy as np
+from pathlib import Path
+from config.config import Config
+from .embedding_cache import EmbeddingCache
+from .onnx_backend import OnnxEncoder
 from .logger import logger
 
 class Embedder:
-    def __init__(self, model_name: str, is_e5: bool = False):
+    def __init__(
+        self,
+        model_name: str,
+        is_e5: bool = False,
+        cache_dir: str = None,
+        cache_max_entries: int = 1_000_000,
+        backend: str = "torch",
+        onnx_dir: str = None,
+        onnx_quantize: bool = False,
+        intra_op_threads: int = None
+    ):
         logger.info(f"🔄 Loading Model: {model_name}...")
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        logger.info(f"🚀 Using Device: {self.device}")
-        
-        self.model = SentenceTransformer(model_name, trust_remote_code=True, device=self.device, local_files_only=False)
+        self.model_name = model_name
         self.is_e5 = is_e5
+        self.backend = backend
+
+        if backend == "onnx":
+            # CPU-only: ONNX Runtime, optionally dynamic int8
+            self.device = "cpu"
+            self.model = None
+            export_dir = Path(onnx_dir or "onnx") / model_name.split("/")[-1]
+            self.onnx = OnnxEncoder(model_name, str(export_dir), quantize=onnx_quantize, intra_op_threads=intra_op_threads)
+        elif backend == "torch":
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            logger.info(f"🚀 Using Device: {self.device}")
+            if intra_op_threads:
+                torch.set_num_threads(intra_op_threads)
+            self.model = SentenceTransformer(model_name, trust_remote_code=True, device=self.device, local_files_only=False)
+            self.onnx = None
+        else:
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+        # Optional persistent cache (one directory per model; the key also carries the model name)
+        self.cache = None
+        if cache_dir:
+            cache_path = Path(cache_dir) / model_name.split("/")[-1]
+            self.cache = EmbeddingCache(str(cache_path), self.get_dimension(), max_entries=cache_max_entries)
+
+    @classmethod
+    def from_config(cls, model_name: str, is_e5: bool = False):
+        """Embedder with the backend and cache settings from Config."""
+        return cls(
+            model_name,
+            is_e5=is_e5,
+            cache_dir=Config.EMBEDDING_CACHE_DIR,
+            cache_max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES,
+            backend=Config.EMBEDDING_BACKEND,
+            onnx_dir=Config.ONNX_DIR,
+            onnx_quantize=Config.ONNX_QUANTIZE,
+            intra_op_threads=Config.EMBEDDING_THREADS
+        )
 
     @property
     def tokenizer(self):
+        if self.onnx is not None:
+            return self.onnx.tokenizer
         return self.model.tokenizer
 
     def get_dimension(self) -> int:
+        if self.onnx is not None:
+            return self.onnx.dim
         return self.model.get_sentence_embedding_dimension()
 
-    def embed(self, texts: List[str], is_query: bool = False) -> np.ndarray:
+    def embed(self, texts: List[str], is_query: bool = False, batch_size: int = 32) -> np.ndarray:
         if not texts:
             return np.array([])
 
-        if self.is_e5:
-            prefix = "query: " if is_query else "passage: "
+        if self.cache is not None:
+            return self._embed_cached(texts, is_query, batch_size)
+        return self._encode(texts, is_query, batch_size)
+
+    def _prefix(self, is_query: bool) -> str:
+        if not self.is_e5:
+            return ""
+        return "query: " if is_query else "passage: "
+
+    def _encode(self, texts: List[str], is_query: bool, batch_size: int) -> np.ndarray:
+        prefix = self._prefix(is_query)
+        if prefix:
             texts = [f"{prefix}{t}" for t in texts]
             
-        embeddings = self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True)
-        return embeddings
\ No newline at end of file
+        if self.onnx is not None:
+            return self.onnx.encode(texts, batch_size=batch_size)
+        embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False, normalize_embeddings=True)
+        return embeddings
+
+    def _embed_cached(self, texts: List[str], is_query: bool, batch_size: int) -> np.ndarray:
+        prefix = self._prefix(is_query)
+        keys = [self.cache.make_key(self.model_name, prefix, t) for t in texts]
+        found = self.cache.get_many(keys)
+
+        missing = [i for i in range(len(texts)) if i not in found]
+        if missing:
+            computed = self._encode([texts[i] for i in missing], is_query, batch_size)
+            self.cache.put_many([keys[i] for i in missing], computed)
+            found.update(zip(missing, computed))
+
+        return np.stack([found[i] for i in range(len(texts))]).astype(np.float32, copy=False)
+
+    def save_cache(self):
+        if self.cache is not None:
+            self.cache.save()
+            logger.info(f"🗄️  Embedding cache stats: {self.cache.stats()}")
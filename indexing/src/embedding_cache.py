@@ -0,0 +1,173 @@
+import os
+import json
+import atexit
+import hashlib
+import threading
+from pathlib import Path
+from typing import List, Dict
+import numpy as np
+from .logger import logger
+
+
+def normalize_for_key(text: str) -> str:
+    """Whitespace-insensitive form of a text; the tokenizers ignore these differences anyway."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache.
+
+    - vectors.f32: float32 memory-mapped matrix, one row ("slot") per cached text.
+    - keys.bin:    20-byte sha1 key of the text stored in each slot (guards against a stale index.json).
+    - index.json:  key -> slot, plus the access tick used for LRU eviction.
+
+    When `max_entries` is reached the least recently used 10% of slots are evicted and reused.
+    """
+
+    KEY_BYTES = 20
+
+    def __init__(self, cache_dir: str, dim: int, max_entries: int = 1_000_000, save_every: int = 10_000):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.max_entries = max_entries
+        self.save_every = save_every
+
+        self._vectors_path = self.cache_dir / "vectors.f32"
+        self._keys_path = self.cache_dir / "keys.bin"
+        self._index_path = self.cache_dir / "index.json"
+        self._lock = threading.Lock()
+
+        self.index: Dict[str, List[int]] = {}  # hex key -> [slot, last_used_tick]
+        self.free_slots: List[int] = []
+        self.tick = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._unsaved = 0
+
+        self._load()
+        atexit.register(self.save)
+
+    # --- Keys ---
+    @staticmethod
+    def make_key(model_name: str, prefix: str, text: str) -> str:
+        raw = f"{model_name}\0{prefix}\0{normalize_for_key(text)}".encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()
+
+    # --- Storage ---
+    def _load(self):
+        capacity = 0
+        if self._index_path.exists() and self._vectors_path.exists():
+            try:
+                with open(self._index_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state.get("dim") == self.dim:
+                    self.index = state["index"]
+                    self.free_slots = state["free_slots"]
+                    self.tick = state["tick"]
+                    capacity = state["capacity"]
+                else:
+                    logger.warning(f"⚠️ Embedding cache dim {state.get('dim')} != {self.dim}. Rebuilding.")
+                    self._vectors_path.unlink()
+                    self._keys_path.unlink(missing_ok=True)
+            except Exception as e:
+                logger.warning(f"⚠️ Embedding cache index unreadable ({e}). Rebuilding.")
+                self.index, self.free_slots, self.tick = {}, [], 0
+
+        self.capacity = capacity
+        self._open(max(capacity, 1024))
+        logger.info(f"🗄️  Embedding cache: {len(self.index)} vectors at {self.cache_dir}")
+
+    def _open(self, capacity: int):
+        """(Re)maps both files with room for `capacity` slots; existing rows are preserved."""
+        for path, row_bytes in ((self._vectors_path, self.dim * 4), (self._keys_path, self.KEY_BYTES)):
+            with open(path, "ab") as f:
+                f.truncate(max(os.path.getsize(path), capacity * row_bytes))
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.keys = np.memmap(self._keys_path, dtype=np.uint8, mode="r+", shape=(capacity, self.KEY_BYTES))
+        self.free_slots.extend(range(self.capacity, capacity))
+        self.capacity = capacity
+
+    def _grow_or_evict(self, needed: int):
+        if len(self.free_slots) >= needed:
+            return
+        if self.capacity < self.max_entries:
+            new_capacity = min(self.max_entries, max(self.capacity * 2, self.capacity + needed))
+            self.vectors.flush()
+            self.keys.flush()
+            self._open(new_capacity)
+        if len(self.free_slots) < needed:
+            self._evict(max(needed - len(self.free_slots), self.max_entries // 10))
+
+    def _evict(self, count: int):
+        oldest = sorted(self.index.items(), key=lambda kv: kv[1][1])[:count]
+        for key, (slot, _) in oldest:
+            del self.index[key]
+            self.keys[slot] = 0
+            self.free_slots.append(slot)
+        self.evictions += len(oldest)
+
+    # --- API ---
+    def get_many(self, keys: List[str]) -> Dict[int, np.ndarray]:
+        """Cached vectors by position in `keys`. Missing positions are absent from the result."""
+        found = {}
+        with self._lock:
+            for pos, key in enumerate(keys):
+                entry = self.index.get(key)
+                if entry is not None and self.keys[entry[0]].tobytes() == bytes.fromhex(key):
+                    self.tick += 1
+                    entry[1] = self.tick
+                    found[pos] = np.array(self.vectors[entry[0]])
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, keys: List[str], vectors: np.ndarray):
+        with self._lock:
+            # One slot per key: the last vector wins for keys repeated in the batch
+            batch = dict(zip(keys, vectors))
+            new = [(key, vec) for key, vec in batch.items() if key not in self.index]
+            if not new:
+                return
+            self._grow_or_evict(len(new))
+            for key, vec in new[:len(self.free_slots)]:
+                slot = self.free_slots.pop()
+                self.vectors[slot] = vec
+                self.keys[slot] = np.frombuffer(bytes.fromhex(key), dtype=np.uint8)
+                self.tick += 1
+                self.index[key] = [slot, self.tick]
+
+            self._unsaved += len(new)
+            if self._unsaved >= self.save_every:
+                self._save()
+
+    def _save(self):
+        self.vectors.flush()
+        self.keys.flush()
+        tmp_path = self._index_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "capacity": self.capacity,
+                "tick": self.tick,
+                "free_slots": self.free_slots,
+                "index": self.index,
+            }, f)
+        os.replace(tmp_path, self._index_path)
+        self._unsaved = 0
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+        }
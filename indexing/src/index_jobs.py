@@ -0,0 +1,137 @@
+import os
+from typing import List, Dict, Any, Tuple
+from config.config import Config
+from preprocess.src.text_cleaning import date_to_int
+from .manifest import IndexManifest, INDEXED_FIELDS, make_point_id, hash_file, hash_document
+from .reader import iter_documents
+from .logger import logger
+
+
+class PendingFile:
+    """A changed file whose new/changed documents still have to be chunked, embedded and written."""
+    def __init__(self, file_name: str, file_hash: str, old_docs: dict):
+        self.file_name = file_name
+        self.file_hash = file_hash
+        self.old_docs = old_docs
+        self.new_docs = {}
+        self.to_index = []  # (item, doc_hash)
+
+    def chunk_inputs(self) -> List[Tuple[str, str]]:
+        """(text, title) of every document waiting to be chunked."""
+        return [
+            (item.get("text_full", ""), item.get("clean_parts", {}).get("title", ""))
+            for item, _ in self.to_index
+        ]
+
+
+def load_pending_file(file_path: str, manifest: IndexManifest):
+    """
+    Reads one processed file and splits its documents into unchanged and to-index.
+    Returns (PendingFile, skipped_docs, file_unchanged); PendingFile is None when the file
+    is unchanged or unreadable.
+
+    Documents whose doc id belongs to another file (or repeats within this one) are skipped
+    with a warning, and the file is re-read on the next run in case the other file let go of it.
+    """
+    file_name = os.path.basename(file_path)
+    file_hash = hash_file(file_path)
+    if manifest.is_unchanged(file_name, file_hash):
+        return None, 0, True
+
+    pending = PendingFile(file_name, file_hash, manifest.get_docs(file_name))
+    skipped_docs = 0
+    duplicates = {}
+    seen = set()
+    try:
+        # Streamed and projected: text_short / clean_parts bodies are never kept in memory
+        for item in iter_documents(file_path, fields=INDEXED_FIELDS):
+            other = file_name if item["id"] in seen else manifest.claim(file_name, item["id"])
+            if other is not None:
+                duplicates.setdefault(other, []).append(item["id"])
+                continue
+            seen.add(item["id"])
+            doc_hash = hash_document(item)
+            old_entry = pending.old_docs.get(item["id"])
+
+            # Unchanged document inside a changed file
+            if old_entry and old_entry["hash"] == doc_hash:
+                pending.new_docs[item["id"]] = old_entry
+                skipped_docs += 1
+            else:
+                pending.to_index.append((item, doc_hash))
+    except Exception as e:
+        logger.error(f"Failed to read {file_path}: {e}")
+        manifest.release_claims(file_name)
+        return None, 0, False
+
+    for other, doc_ids in duplicates.items():
+        logger.warning(f"⚠️ Skipped {len(doc_ids)} documents of {file_name}: their doc ids already appear in {other} (e.g. {doc_ids[0]})")
+    if duplicates:
+        pending.file_hash = None  # never "unchanged"
+    return pending, skipped_docs, False
+
+
+def filterable_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Top-level payload fields Qdrant filters on (see FILTER_FIELDS in storage.py).
+    date_int is YYYYMMDD from preprocessing (or parsed here for older files); 0 means unknown.
+    """
+    meta = item.get("metadata") or {}
+    fields = {"domain": meta.get("domain"), "authority": meta.get("authority")}
+    fields = {k: v for k, v in fields.items() if v}
+    fields["date_int"] = meta.get("date_int") or date_to_int(meta.get("date")) or 0
+    return fields
+
+
+def build_points(file_name: str, item: Dict[str, Any], chunks: List[str], vectors, token_counter=None) -> List[Dict[str, Any]]:
+    doc_id = item["id"]
+    # {"embed": n, "rerank": n, "llm": n} per chunk (see TokenCounter)
+    token_counts = token_counter.count(chunks) if token_counter is not None else [None] * len(chunks)
+    points = []
+    for i, chunk_text in enumerate(chunks):
+        if Config.USE_DOC_STORE:
+            # Lean payload: text and metadata live in the DocStore
+            payload = {
+                "doc_id": doc_id,
+                "chunk_index": i,
+                **filterable_fields(item)
+            }
+        else:
+            payload = {
+                "doc_id": doc_id,
+                "chunk_index": i,
+                "text": chunk_text,
+                "metadata": item.get("metadata", {}),
+                "related_laws": item.get("related_laws", []),
+                "mentioned_laws": item.get("mentioned_laws", []),
+                **filterable_fields(item)
+            }
+        if token_counts[i] is not None:
+            payload["tokens"] = token_counts[i]
+        points.append({
+            "id": make_point_id(file_name, doc_id, i, Config.MODEL_NAME),
+            "vector": vectors[i],
+            "payload": payload,
+            "text": chunk_text,
+            "document": item
+        })
+    return points
+
+
+def record_document(pending: PendingFile, item: Dict[str, Any], doc_hash: str, n_chunks: int, db, manifest: IndexManifest):
+    """Deletes chunks the previous version had beyond the new chunk count and records the new entry."""
+    doc_id = item["id"]
+    old_entry = pending.old_docs.get(doc_id)
+    if old_entry:
+        db.delete_points(manifest.point_ids(pending.file_name, doc_id, old_entry["chunks"], start=n_chunks))
+    pending.new_docs[doc_id] = {"hash": doc_hash, "chunks": n_chunks}
+
+
+def commit_file(pending: PendingFile, db, manifest: IndexManifest):
+    """Drops documents removed from the file and stores the file's new state in the manifest."""
+    removed = [doc_id for doc_id in pending.old_docs if doc_id not in pending.new_docs]
+    for doc_id in removed:
+        db.delete_points(manifest.point_ids(pending.file_name, doc_id, pending.old_docs[doc_id]["chunks"]))
+    if removed and db.doc_store is not None:
+        db.doc_store.delete_documents([doc_id for doc_id in removed if manifest.owner(doc_id) == pending.file_name])
+    manifest.update_file(pending.file_name, pending.file_hash, pending.new_docs)
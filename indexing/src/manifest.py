@@ -0,0 +1,139 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from .logger import logger
+
+# Fixed namespace so the same (model, file, doc_id, chunk_index) always maps to the same point
+POINT_ID_NAMESPACE = uuid.UUID("8f6c1f8e-4f4a-4b55-9a52-3f2d8f0c7b21")
+
+# Fields of a processed judgment that end up in the index (text or payload)
+INDEXED_FIELDS = ("id", "text_full", "clean_parts.title", "metadata", "related_laws", "mentioned_laws")
+
+
+def make_point_id(file_name: str, doc_id: str, chunk_index: int, model_name: str) -> str:
+    """Deterministic Qdrant point id for one chunk of one document of one source file."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{model_name}|{file_name}|{doc_id}|{chunk_index}"))
+
+
+def hash_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_document(item: Dict[str, Any]) -> str:
+    """Hash of a judgment projected to INDEXED_FIELDS (everything that affects its chunks or payload)."""
+    encoded = json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class IndexManifest:
+    """
+    Tracks what is already in the collection so re-indexing only touches what changed.
+
+    Layout on disk:
+        {"model": ..., "files": {file_name: {"hash": ..., "docs": {doc_id: {"hash": ..., "chunks": n}}}}}
+
+    Every doc id belongs to one file (DocStore rows, metadata and grouping are keyed by doc id):
+    a file claims its doc ids while it is read, and a claimed id found in another file is skipped.
+
+    Thread-safe: ParallelIndexer's reader looks files up while its writer records them. Reads
+    return copies, never the live entries.
+    """
+
+    def __init__(self, path: str, model_name: str):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # doc_id -> the file it belongs to (recorded, or claimed by a file being indexed)
+        self._owners: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._load()
+        self._index_docs()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Manifest {self.path} unreadable ({e}). Starting fresh.")
+            return
+
+        if data.get("model") != self.model_name:
+            logger.warning(f"⚠️ Manifest belongs to {data.get('model')}, not {self.model_name}. Ignoring it.")
+            return
+        self.files = data.get("files", {})
+
+    def _index_docs(self):
+        self._owners = {}
+        for file_name, entry in self.files.items():
+            for doc_id in entry.get("docs", {}):
+                self._owners.setdefault(doc_id, file_name)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.files)
+
+    def is_unchanged(self, file_name: str, file_hash: str) -> bool:
+        with self._lock:
+            entry = self.files.get(file_name)
+            return entry is not None and entry.get("hash") == file_hash
+
+    def get_docs(self, file_name: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self.files.get(file_name, {}).get("docs", {}))
+
+    def stale_files(self, current_files: List[str]) -> List[str]:
+        """Files recorded in the manifest that no longer exist on disk."""
+        current = set(current_files)
+        with self._lock:
+            return [name for name in self.files if name not in current]
+
+    def owner(self, doc_id: str) -> Optional[str]:
+        with self._lock:
+            return self._owners.get(doc_id)
+
+    def claim(self, file_name: str, doc_id: str) -> Optional[str]:
+        """Claims doc_id for file_name; returns the other file it already belongs to, if any."""
+        with self._lock:
+            owner = self._owners.setdefault(doc_id, file_name)
+            return owner if owner != file_name else None
+
+    def release_claims(self, file_name: str):
+        """Drops claims of file_name that its recorded entry does not back (e.g. the read failed)."""
+        with self._lock:
+            docs = self.files.get(file_name, {}).get("docs", {})
+            for doc_id in [d for d, f in self._owners.items() if f == file_name and d not in docs]:
+                del self._owners[doc_id]
+
+    def point_ids(self, file_name: str, doc_id: str, n_chunks: int, start: int = 0) -> List[str]:
+        return [make_point_id(file_name, doc_id, i, self.model_name) for i in range(start, n_chunks)]
+
+    def update_file(self, file_name: str, file_hash: str, docs: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            self.files[file_name] = {"hash": file_hash, "docs": dict(docs)}
+            for doc_id in docs:
+                self._owners[doc_id] = file_name
+            self.release_claims(file_name)
+
+    def remove_file(self, file_name: str):
+        with self._lock:
+            self.files.pop(file_name, None)
+            self.release_claims(file_name)
+
+    def save(self):
+        """Atomic write so a crash never leaves a half-written manifest behind."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "files": self.files}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
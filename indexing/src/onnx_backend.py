@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+from .logger import logger
+
+# SentenceTransformer pooling modes _pool reproduces
+SUPPORTED_POOLING = ("cls", "mean", "max")
+
+
+class OnnxEncoder:
+    """
+    Sentence embeddings served by ONNX Runtime on CPU.
+
+    The first run exports the SentenceTransformer's transformer to `export_dir/model.onnx`
+    (and, with `quantize`, a dynamic int8 copy `model.int8.onnx`), together with the tokenizer
+    and the pooling settings. Later runs load the exported files directly.
+    Pooling and L2 normalization reproduce SentenceTransformer.encode(normalize_embeddings=True).
+    """
+
+    def __init__(self, model_name: str, export_dir: str, quantize: bool = False, intra_op_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.export_dir = Path(export_dir)
+        if not (self.export_dir / "encoder.json").exists():
+            self._export(model_name)
+
+        onnx_path = self.export_dir / "model.onnx"
+        if quantize:
+            onnx_path = self._quantize(onnx_path)
+
+        with open(self.export_dir / "encoder.json", "r", encoding="utf-8") as f:
+            info = json.load(f)
+        self.dim = info["dim"]
+        self.max_length = info["max_length"]
+        self.pooling = info["pooling"]
+        self._check_pooling(self.pooling)
+        self.input_names = info["input_names"]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.export_dir))
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        logger.info(f"🚀 ONNX Runtime session: {onnx_path.name} (threads={intra_op_threads or 'auto'})")
+
+    @staticmethod
+    def _check_pooling(pooling: str):
+        if pooling not in SUPPORTED_POOLING:
+            raise ValueError(f"ONNX backend supports pooling {', '.join(SUPPORTED_POOLING)}, not '{pooling}': use EMBEDDING_BACKEND = 'torch'")
+
+    def _export(self, model_name: str):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"📦 Exporting {model_name} to ONNX at {self.export_dir} ...")
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+
+        st_model = SentenceTransformer(model_name, trust_remote_code=True, device="cpu")
+        transformer = st_model[0]
+        pooling = st_model[1].get_pooling_mode_str() if len(st_model) > 1 else "mean"
+        self._check_pooling(pooling)
+        # Modules after pooling (e.g. Dense projections) are not part of the export
+        extra = [type(module).__name__ for module in list(st_model)[2:] if type(module).__name__ != "Normalize"]
+        if extra:
+            raise ValueError(f"ONNX backend exports Transformer + Pooling only; {model_name} also has {', '.join(extra)}")
+
+        auto_model = transformer.auto_model.eval()
+        tokenizer = transformer.tokenizer
+        sample = tokenizer(["نمونه متن", "sample"], padding=True, return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                auto_model,
+                tuple(sample[name] for name in input_names),
+                str(self.export_dir / "model.onnx"),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+
+        tokenizer.save_pretrained(str(self.export_dir))
+        with open(self.export_dir / "encoder.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "model_name": model_name,
+                "dim": st_model.get_sentence_embedding_dimension(),
+                "max_length": transformer.max_seq_length or 512,
+                "pooling": pooling,
+                "input_names": input_names,
+            }, f, indent=2)
+
+    def _quantize(self, fp32_path: Path) -> Path:
+        int8_path = fp32_path.with_name("model.int8.onnx")
+        if not int8_path.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            logger.info("📦 Quantizing ONNX model to dynamic int8 ...")
+            quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        return int8_path
+
+    def _pool(self, hidden: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            return hidden[:, 0]
+        mask = mask[..., None].astype(hidden.dtype)
+        if self.pooling == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        if self.pooling == "mean":
+            return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        raise ValueError(f"Unsupported pooling: {self.pooling}")
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+
+        # Length-sorted batches keep padding low, like SentenceTransformer.encode
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            enc = self.tokenizer(
+                [texts[i] for i in idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            feeds = {name: enc[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            pooled = self._pool(hidden, enc["attention_mask"])
+            out[idx] = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return out
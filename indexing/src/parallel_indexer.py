@@ -0,0 +1,299 @@
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
+from config.config import Config
+from .chunking import SemanticChunker
+from .batcher import EmbeddingBatcher
+from .index_jobs import load_pending_file, build_points, record_document, commit_file
+from .logger import logger
+
+_DONE = object()
+
+
+class StageCounter:
+    """Thread-safe throughput counters for one pipeline stage."""
+    def __init__(self, name: str):
+        self.name = name
+        self.files = 0
+        self.docs = 0
+        self.chunks = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, busy: float, files: int = 0, docs: int = 0, chunks: int = 0):
+        with self._lock:
+            self.busy += busy
+            self.files += files
+            self.docs += docs
+            self.chunks += chunks
+
+    def as_dict(self, wall: float) -> Dict[str, Any]:
+        return {
+            "stage": self.name,
+            "files": self.files,
+            "docs": self.docs,
+            "chunks": self.chunks,
+            "busy_s": round(self.busy, 2),
+            "docs_per_s": round(self.docs / wall, 2) if wall else 0.0,
+        }
+
+
+# --- Chunk workers (separate processes: sentence split + tokenization only) ---
+_preparer = None
+
+
+class _TokenizerOnly:
+    """Stands in for the Embedder inside chunk workers, which never load the model itself."""
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+
+def _init_chunk_worker(model_name: str, max_tokens: int, similarity_threshold: float):
+    global _preparer
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    _preparer = SemanticChunker(_TokenizerOnly(tokenizer), max_tokens=max_tokens, similarity_threshold=similarity_threshold)
+
+
+def _prepare_docs(docs):
+    start = time.perf_counter()
+    prepared = [_preparer.prepare_sentences(text) for text, _ in docs]
+    return prepared, time.perf_counter() - start
+
+
+class ParallelIndexer:
+    """
+    read → chunk → embed → write, connected by bounded queues.
+
+    - Reader (1 thread): hashes files, skips unchanged ones, loads the rest.
+    - Chunk (process pool): sentence split + tokenization, the pure-Python part.
+    - Embed (N threads): cross-document sentence embedding, chunk merge, chunk embedding.
+    - Writer (caller's thread): the only one writing to VectorDB and the manifest (the reader
+      looks files up in the manifest, which locks every access).
+    """
+
+    def __init__(
+        self,
+        embedder,
+        chunker: SemanticChunker,
+        db,
+        manifest,
+        chunk_workers: int = 4,
+        embed_workers: int = 1,
+        queue_size: int = 8,
+        doc_buffer: int = 64,
+        embed_batch_size: int = 128,
+        token_counter=None
+    ):
+        self.embedder = embedder
+        self.chunker = chunker
+        self.db = db
+        self.manifest = manifest
+        self.chunk_workers = chunk_workers
+        self.embed_workers = embed_workers
+        self.doc_buffer = doc_buffer
+        self.batcher = EmbeddingBatcher(embedder, batch_size=embed_batch_size)
+        self.token_counter = token_counter
+
+        self.read_q = queue.Queue(maxsize=queue_size)
+        self.prep_q = queue.Queue(maxsize=queue_size)
+        self.write_q = queue.Queue(maxsize=queue_size)
+
+        self.counters = {name: StageCounter(name) for name in ("read", "chunk", "embed", "write")}
+        self.skipped_files = 0
+        self.skipped_docs = 0
+        self.errors: List[BaseException] = []
+        self._embed_left = embed_workers
+        self._embed_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # --- Queues (every stage gives up once another one failed) ---
+    def _fail(self, stage: str, error: BaseException):
+        logger.error(f"❌ [{stage}] {error}")
+        self.errors.append(error)
+        self._stop.set()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Blocking put that returns False instead of waiting on a consumer that stopped."""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        """Blocking get; _DONE once the pipeline is stopping and nothing is left."""
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    # --- Stages ---
+    def _read(self, files: List[str]):
+        try:
+            for file_path in files:
+                if self._stop.is_set():
+                    break
+                start = time.perf_counter()
+                pending, skipped, unchanged = load_pending_file(file_path, self.manifest)
+                self.skipped_files += unchanged
+                self.skipped_docs += skipped
+                if pending is None:
+                    continue
+                self.counters["read"].add(time.perf_counter() - start, files=1, docs=len(pending.to_index))
+                if not self._put(self.read_q, pending):
+                    break
+        except BaseException as e:
+            self._fail("Reader", e)
+        finally:
+            self._put(self.read_q, _DONE)
+
+    def _dispatch_chunking(self, pool: ProcessPoolExecutor):
+        try:
+            while True:
+                pending = self._get(self.read_q)
+                if pending is _DONE:
+                    break
+                # The future travels with its file; the bounded queue caps work in flight
+                if not self._put(self.prep_q, (pending, pool.submit(_prepare_docs, pending.chunk_inputs()))):
+                    break
+        except BaseException as e:
+            self._fail("Chunk", e)
+        finally:
+            for _ in range(self.embed_workers):
+                self._put(self.prep_q, _DONE)
+
+    def _embed(self):
+        try:
+            finished = False
+            while not finished:
+                item = self._get(self.prep_q)
+                if item is _DONE:
+                    break
+                batch = [item]
+                n_docs = len(item[0].to_index)
+
+                # Grow the batch with whatever is already prepared, up to doc_buffer documents
+                while n_docs < self.doc_buffer:
+                    try:
+                        item = self.prep_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        finished = True
+                        break
+                    batch.append(item)
+                    n_docs += len(item[0].to_index)
+
+                if not self._embed_batch(batch):
+                    break
+        except BaseException as e:
+            self._fail("Embed", e)
+        finally:
+            with self._embed_lock:
+                self._embed_left -= 1
+                if self._embed_left == 0:
+                    self._put(self.write_q, _DONE)
+
+    def _embed_batch(self, batch) -> bool:
+        """Embeds a batch of prepared files and queues them for the writer; False once the pipeline stopped."""
+        files = []
+        for pending, future in batch:
+            prepared, chunk_seconds = future.result()
+            self.counters["chunk"].add(chunk_seconds, files=1, docs=len(prepared))
+            files.append((pending, prepared))
+
+        start = time.perf_counter()
+        entries = [
+            (pending, item, doc_hash, sentences, tokens, title)
+            for pending, prepared in files
+            for (item, doc_hash), (sentences, tokens), (_, title) in zip(pending.to_index, prepared, pending.chunk_inputs())
+        ]
+        sentence_vectors = self.batcher.embed_groups([e[3] for e in entries])
+        chunk_lists = [
+            self.chunker.chunk_from_embeddings(sentences, tokens, vectors, title) if sentences else []
+            for (_, _, _, sentences, tokens, title), vectors in zip(entries, sentence_vectors)
+        ]
+        chunk_vectors = self.batcher.embed_groups(chunk_lists)
+
+        results = {id(pending): (pending, [], []) for pending, _ in files}
+        for (pending, item, doc_hash, *_), chunks, vectors in zip(entries, chunk_lists, chunk_vectors):
+            _, docs, points = results[id(pending)]
+            docs.append((item, doc_hash, len(chunks)))
+            points.extend(build_points(pending.file_name, item, chunks, vectors, self.token_counter))
+
+        n_chunks = sum(len(c) for c in chunk_lists)
+        self.counters["embed"].add(time.perf_counter() - start, files=len(files), docs=len(entries), chunks=n_chunks)
+        return all(self._put(self.write_q, result) for result in results.values())
+
+    def _write(self) -> int:
+        total_chunks = 0
+        while True:
+            item = self._get(self.write_q)
+            if item is _DONE:
+                break
+            pending, docs, points = item
+            start = time.perf_counter()
+            for i in range(0, len(points), Config.BATCH_SIZE):
+                self.db.upsert_batch(points[i:i + Config.BATCH_SIZE])
+            for doc, doc_hash, n_chunks in docs:
+                record_document(pending, doc, doc_hash, n_chunks, self.db, self.manifest)
+            commit_file(pending, self.db, self.manifest)
+            self.manifest.save()
+            total_chunks += len(points)
+            self.counters["write"].add(time.perf_counter() - start, files=1, docs=len(docs), chunks=len(points))
+        return total_chunks
+
+    # --- Driver ---
+    def run(self, files: List[str]) -> int:
+        start = time.perf_counter()
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=self.chunk_workers,
+            mp_context=ctx,
+            initializer=_init_chunk_worker,
+            initargs=(Config.MODEL_NAME, self.chunker.max_tokens, self.chunker.threshold)
+        ) as pool:
+            threads = [
+                threading.Thread(target=self._read, args=(files,), name="index-read", daemon=True),
+                threading.Thread(target=self._dispatch_chunking, args=(pool,), name="index-chunk", daemon=True),
+            ] + [
+                threading.Thread(target=self._embed, name=f"index-embed-{i}", daemon=True)
+                for i in range(self.embed_workers)
+            ]
+            for t in threads:
+                t.start()
+
+            try:
+                total_chunks = self._write()
+            except BaseException as e:
+                # Upstream stages see _stop and return instead of blocking on a full queue
+                self._fail("Writer", e)
+            for t in threads:
+                t.join()
+            if self.errors:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        if self.errors:
+            raise self.errors[0]
+
+        self.report(time.perf_counter() - start)
+        return total_chunks
+
+    def report(self, wall: float):
+        logger.info("-"*40)
+        logger.info(f"📈 Stage throughput (wall {wall:.1f}s)")
+        for counter in self.counters.values():
+            stats = counter.as_dict(wall)
+            logger.info(
+                f"   {stats['stage']:<6} files={stats['files']:<5} docs={stats['docs']:<6} "
+                f"chunks={stats['chunks']:<7} busy={stats['busy_s']:>8.1f}s  {stats['docs_per_s']:.2f} docs/s"
+            )
+        logger.info("-"*40)
@@ -0,0 +1,94 @@
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import httpx
+from qdrant_client import QdrantClient
+from .logger import logger
+from config.config import Config
+
+# One client per target, shared by every VectorDB / Retriever of the process
+_clients: Dict[Tuple, QdrantClient] = {}
+_refs: Dict[Tuple, int] = {}
+_lock = threading.Lock()
+
+
+class _SerializedClient:
+    """
+    Local-mode QdrantClient behind one lock. The embedded QdrantLocal does not guard its
+    in-memory collections, and one instance is shared by the indexer threads, the async CPU
+    pool and the UI; the server client needs no such lock.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return call
+
+
+def _target(path: Optional[str]) -> Tuple:
+    if Config.QDRANT_URL:
+        return ("url", Config.QDRANT_URL, Config.QDRANT_PREFER_GRPC)
+    if path is None:
+        raise ValueError("Qdrant local mode needs a path (or set Config.QDRANT_URL)")
+    return ("path", str(Path(path).resolve()))
+
+
+def _connect(target: Tuple) -> QdrantClient:
+    if target[0] == "path":
+        logger.info(f"Connecting to Qdrant Local at: {target[1]}")
+        return _SerializedClient(QdrantClient(path=target[1]))
+
+    logger.info(f"Connecting to Qdrant Server at: {Config.QDRANT_URL} ({'gRPC' if Config.QDRANT_PREFER_GRPC else 'REST'})")
+    return QdrantClient(
+        url=Config.QDRANT_URL,
+        api_key=Config.QDRANT_API_KEY or os.getenv("QDRANT_API_KEY"),
+        prefer_grpc=Config.QDRANT_PREFER_GRPC,
+        grpc_port=Config.QDRANT_GRPC_PORT,
+        timeout=Config.QDRANT_TIMEOUT,
+        # REST keep-alive pool; gRPC multiplexes all calls over one channel
+        limits=httpx.Limits(
+            max_connections=Config.QDRANT_POOL_SIZE,
+            max_keepalive_connections=Config.QDRANT_POOL_SIZE
+        )
+    )
+
+
+def get_client(path: Optional[str] = None) -> QdrantClient:
+    """
+    Shared QdrantClient for the configured target: the server at Config.QDRANT_URL when
+    set (any number of processes can search it), otherwise embedded local mode at `path`.
+
+    Local mode locks its directory per process, so sharing one client is what lets an
+    indexer, a Retriever and the UI of the same process open it together. Any thread may use
+    the client: server clients are thread-safe, and calls to a local one are serialized by a
+    lock (one at a time). Pair every call with release_client().
+    """
+    target = _target(path)
+    with _lock:
+        client = _clients.get(target)
+        if client is None:
+            client = _clients[target] = _connect(target)
+        _refs[target] = _refs.get(target, 0) + 1
+    return client
+
+
+def release_client(client: QdrantClient):
+    """Drops one reference; the last one closes the client. Clients not from get_client() are closed directly."""
+    with _lock:
+        target = next((t for t, c in _clients.items() if c is client), None)
+        if target is not None:
+            _refs[target] -= 1
+            if _refs[target] > 0:
+                return
+            del _clients[target], _refs[target]
+    client.close()
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+from typing import Iterator, Iterable, Dict, Any, Optional, Tuple
+
+_WHITESPACE = " \t\n\r"
+
+
+def _project(item: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """
+    Keeps only the requested fields. Dotted names select nested keys:
+    ("id", "clean_parts.title") -> {"id": ..., "clean_parts": {"title": ...}}
+    """
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        keys = field.split(".")
+        value = item
+        for key in keys:
+            if not isinstance(value, dict) or key not in value:
+                value = None
+                break
+            value = value[key]
+        if value is None:
+            continue
+
+        target = projected
+        for key in keys[:-1]:
+            target = target.setdefault(key, {})
+        target[keys[-1]] = value
+    return projected
+
+
+def iter_documents(path: str, fields: Optional[Iterable[str]] = None, block_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the objects of a top-level JSON array one at a time.
+
+    Only one document (plus one read block) is held in memory at a time, so peak memory
+    does not depend on the size of the file. `fields` projects each document down to
+    the keys the caller needs before it is handed out.
+    """
+    fields = tuple(fields) if fields else None
+    decoder = json.JSONDecoder()
+
+    with open(path, "r", encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+        started = False
+
+        while True:
+            # Skip separators
+            while pos < len(buf) and (buf[pos] in _WHITESPACE or (started and buf[pos] == ",")):
+                pos += 1
+
+            if pos >= len(buf):
+                if eof:
+                    raise ValueError(f"{path}: unexpected end of JSON array")
+                buf, pos = f.read(block_size), 0
+                eof = not buf
+                continue
+
+            if not started:
+                if buf[pos] != "[":
+                    raise ValueError(f"{path}: expected a JSON array")
+                started = True
+                pos += 1
+                continue
+
+            if buf[pos] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Document continues in the next block
+                more = f.read(block_size)
+                if not more:
+                    raise
+                buf, pos = buf[pos:] + more, 0
+                continue
+
+            buf, pos = buf[end:], 0
+            yield _project(item, fields) if fields else item
+
+
+def iter_judgment_files(data_dir: str, fields: Optional[Iterable[str]] = None) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+    """(file_path, document) for every document of every judgments-*-clean.json file."""
+    for file_path in sorted(Path(data_dir).glob("judgments-*-clean.json")):
+        for item in iter_documents(str(file_path), fields=fields):
+            yield file_path, item
@@ -1,17 +1,68 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from collections import defaultdict
+import json
 import uuid
 from .logger import logger
 from config.config import Config
+from .index_jobs import filterable_fields
+from .qdrant_pool import get_client, release_client
+
+# Payload fields with a Qdrant index, used by Retriever filters (and doc_id by group-by)
+FILTER_FIELDS = {
+    "doc_id": models.PayloadSchemaType.KEYWORD,
+    "domain": models.PayloadSchemaType.KEYWORD,
+    "authority": models.PayloadSchemaType.KEYWORD,
+    "date_int": models.PayloadSchemaType.INTEGER,
+}
+
+def build_quantization_config(mode: Optional[str], always_ram: bool = True):
+    """Qdrant quantization config for None | "scalar" | "binary"."""
+    if not mode:
+        return None
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=always_ram
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    raise ValueError(f"Unknown quantization mode: {mode}")
+
 
 class VectorDB:
-    def __init__(self, path: str, collection_name: str, vector_size: int):
-        logger.info(f"Connecting to Qdrant Local at: {path}")
-        
-        self.client = QdrantClient(path=path)
+    def __init__(
+        self,
+        path: str,
+        collection_name: str,
+        vector_size: int,
+        quantization: Optional[str] = None,
+        doc_store=None,
+        local_vectors=None,
+        client: Optional[QdrantClient] = None,
+        ann_index=None
+    ):
+        # Shared client (Config.QDRANT_URL server, or local mode at `path`) unless one is given
+        self.client = client or get_client(path)
+        # Injected clients belong to the caller
+        self._owns_client = client is None
         self.collection_name = collection_name
         self.vector_size = vector_size
+        if quantization and not Config.QDRANT_URL:
+            logger.warning(f"⚠️ Quantization ({quantization}) needs a Qdrant server (Config.QDRANT_URL); embedded local mode ignores it. Skipping.")
+            quantization = None
+        self.quantization = quantization
+        self.doc_store = doc_store
+        # Optional LocalVectorStore: float32 copy of every vector for retrieval-time MMR
+        self.local_vectors = local_vectors
+        # Optional AnnIndex (hnswlib / FAISS) that serves dense search in local mode
+        self.ann_index = ann_index
         self._ensure_collection_exists()
 
     def _ensure_collection_exists(self):
@@ -24,34 +75,200 @@ class VectorDB:
             logger.info(f"   - Vector Size: {self.vector_size}")
             logger.info(f"   - M (Edges): {Config.HNSW_M}")
             logger.info(f"   - ef_construct: {Config.HNSW_EF}")
+            logger.info(f"   - Quantization: {self.quantization or 'none'}")
             logger.info("="*40)
 
             self.client.create_collection(
                 collection_name=self.collection_name,
                 vectors_config=models.VectorParams(
                     size=self.vector_size,
-                    distance=models.Distance.COSINE
+                    distance=models.Distance.COSINE,
+                    # With quantization only the compressed vectors stay in RAM; originals are for rescoring
+                    on_disk=bool(self.quantization)
                 ),
                 
                 hnsw_config=models.HnswConfigDiff(
                     m=Config.HNSW_M,
                     ef_construct=Config.HNSW_EF
-                )
+                ),
+                quantization_config=build_quantization_config(self.quantization, Config.QUANTIZATION_ALWAYS_RAM)
             )
         else:
             logger.info(f"Collection {self.collection_name} already exists.")
+            if self.quantization:
+                logger.info(f"   - Applying quantization: {self.quantization}")
+                self.client.update_collection(
+                    collection_name=self.collection_name,
+                    quantization_config=build_quantization_config(self.quantization, Config.QUANTIZATION_ALWAYS_RAM)
+                )
+
+        self._ensure_payload_indexes()
+
+    def _ensure_payload_indexes(self):
+        """Keyword/integer indexes so filters are applied inside the HNSW search (no-op in local mode)."""
+        existing = self.client.get_collection(self.collection_name).payload_schema or {}
+        for field, schema in FILTER_FIELDS.items():
+            if field not in existing:
+                self.client.create_payload_index(self.collection_name, field_name=field, field_schema=schema)
 
     def upsert_batch(self, points_data: List[Dict[str, Any]]):
+        ids = [item.get('id') or str(uuid.uuid4()) for item in points_data]
         points = [
             models.PointStruct(
-                id=str(uuid.uuid4()),
+                id=point_id,
                 vector=item['vector'],
                 payload=item['payload']
             )
-            for item in points_data
+            for point_id, item in zip(ids, points_data)
         ]
         
         self.client.upsert(
             collection_name=self.collection_name,
             points=points
-        )
\ No newline at end of file
+        )
+
+        # Text and document metadata go to the side store instead of the payload
+        if self.doc_store is not None:
+            documents = {item['payload']['doc_id']: item['document'] for item in points_data}
+            self.doc_store.upsert_documents(documents.values())
+            self.doc_store.upsert_chunks([
+                (point_id, item['payload']['doc_id'], item['payload']['chunk_index'], item['text'])
+                for point_id, item in zip(ids, points_data)
+            ])
+
+        if self.local_vectors is not None:
+            self.local_vectors.put_many(ids, [item['vector'] for item in points_data])
+        if self.ann_index is not None:
+            self.ann_index.add(ids, [item['vector'] for item in points_data])
+
+    def delete_points(self, point_ids: List[str]):
+        if not point_ids:
+            return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=point_ids)
+        )
+        if self.doc_store is not None:
+            self.doc_store.delete_chunks(point_ids)
+        if self.local_vectors is not None:
+            self.local_vectors.delete_many(point_ids)
+        if self.ann_index is not None:
+            self.ann_index.delete(point_ids)
+
+    def iter_chunk_texts(self, batch_size: int = 256):
+        """(point_id, chunk text) of every point: from the DocStore when payloads are lean, else from Qdrant."""
+        if self.doc_store is not None:
+            yield from self.doc_store.iter_chunks()
+            return
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                self.collection_name, limit=batch_size, offset=offset, with_payload=["text"], with_vectors=False
+            )
+            for p in points:
+                yield str(p.id), p.payload.get("text", "")
+            if offset is None:
+                break
+
+    def backfill_filter_fields(self, batch_size: int = 256) -> int:
+        """Adds domain / authority / date_int to points written before these payload fields existed."""
+        lacking = models.Filter(must=[models.IsEmptyCondition(is_empty=models.PayloadField(key="date_int"))])
+        updated = 0
+        while True:
+            points, _ = self.client.scroll(
+                self.collection_name, scroll_filter=lacking, limit=batch_size, with_payload=True, with_vectors=False
+            )
+            if not points:
+                return updated
+
+            # Lean payloads keep the metadata in the DocStore
+            lean_docs = [p.payload.get("doc_id") for p in points if "metadata" not in p.payload]
+            documents = self.doc_store.get_documents(lean_docs) if lean_docs and self.doc_store is not None else {}
+
+            groups = defaultdict(list)
+            for p in points:
+                metadata = p.payload.get("metadata") or documents.get(p.payload.get("doc_id"), {}).get("metadata", {})
+                groups[json.dumps(filterable_fields({"metadata": metadata}), ensure_ascii=False, sort_keys=True)].append(p.id)
+            for fields, ids in groups.items():
+                self.client.set_payload(self.collection_name, payload=json.loads(fields), points=ids)
+            updated += len(points)
+
+    def backfill_token_counts(self, token_counter, batch_size: int = 256) -> int:
+        """
+        Adds the "tokens" payload field (see TokenCounter) to points written before it existed,
+        and recounts points whose counts lack Config.CONTEXT_BUDGET_TOKENIZER.
+        """
+        missing = [models.IsEmptyCondition(is_empty=models.PayloadField(key="tokens"))]
+        if Config.CONTEXT_BUDGET_TOKENIZER in token_counter.tokenizers:
+            key = f"tokens.{Config.CONTEXT_BUDGET_TOKENIZER}"
+            missing.append(models.IsEmptyCondition(is_empty=models.PayloadField(key=key)))
+        lacking = models.Filter(should=missing)
+        updated = 0
+        while True:
+            points, _ = self.client.scroll(
+                self.collection_name, scroll_filter=lacking, limit=batch_size, with_payload=["text"], with_vectors=False
+            )
+            if not points:
+                return updated
+
+            # Lean payloads keep the text in the DocStore
+            texts = {str(p.id): p.payload.get("text") for p in points if p.payload.get("text")}
+            lean_ids = [str(p.id) for p in points if str(p.id) not in texts]
+            if lean_ids and self.doc_store is not None:
+                texts.update(self.doc_store.get_texts(lean_ids))
+
+            ids = [str(p.id) for p in points]
+            counts = token_counter.count([texts.get(point_id, "") for point_id in ids])
+            self.client.batch_update_points(
+                self.collection_name,
+                update_operations=[
+                    models.SetPayloadOperation(set_payload=models.SetPayload(payload={"tokens": c}, points=[point_id]))
+                    for point_id, c in zip(ids, counts)
+                ]
+            )
+            updated += len(points)
+
+    def sync_local_vectors(self, batch_size: int = 256) -> int:
+        """Copies vectors of points the local store does not have yet (e.g. indexed before it existed)."""
+        if self.local_vectors is None or len(self.local_vectors) >= self.count():
+            return 0
+        copied = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                self.collection_name, limit=batch_size, offset=offset, with_payload=False, with_vectors=True
+            )
+            missing = [p for p in points if str(p.id) not in self.local_vectors.rows]
+            if missing:
+                self.local_vectors.put_many([str(p.id) for p in missing], [p.vector for p in missing])
+                copied += len(missing)
+            if offset is None:
+                break
+        self.local_vectors.save()
+        return copied
+
+    def sync_ann_index(self, batch_size: int = 256) -> int:
+        """Adds vectors of points the ANN index does not have yet (e.g. indexed before it existed)."""
+        if self.ann_index is None or len(self.ann_index) >= self.count():
+            return 0
+        added = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                self.collection_name, limit=batch_size, offset=offset, with_payload=False, with_vectors=True
+            )
+            missing = [p for p in points if str(p.id) not in self.ann_index.labels]
+            if missing:
+                self.ann_index.add([str(p.id) for p in missing], [p.vector for p in missing])
+                added += len(missing)
+            if offset is None:
+                break
+        self.ann_index.save()
+        return added
+
+    def count(self) -> int:
+        return self.client.count(collection_name=self.collection_name, exact=True).count
+
+    def close(self):
+        if self._owns_client:
+            release_client(self.client)
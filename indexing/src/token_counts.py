@@ -0,0 +1,53 @@
+from typing import Dict, List, Optional
+from config.config import Config
+from .logger import logger
+
+
+class TokenCounter:
+    """
+    Token counts of chunk texts for every tokenizer the query path budgets with, stored in
+    each point's payload as {"tokens": {"embed": n, "rerank": n, "llm": n}}.
+
+    - embed:  the embedding model's tokenizer (what the context budget has always used).
+    - rerank: the cross-encoder's tokenizer (which passages need truncation).
+    - llm:    Config.LLM_TOKENIZER, an HF tokenizer name or "tiktoken:<encoding>"; optional.
+
+    Counts exclude special tokens, like tokenizer.tokenize().
+    """
+
+    def __init__(self, embed_tokenizer, reranker_name: Optional[str] = None, llm_tokenizer: Optional[str] = None):
+        from transformers import AutoTokenizer
+        self.tokenizers = {"embed": embed_tokenizer}
+        if reranker_name:
+            self.tokenizers["rerank"] = AutoTokenizer.from_pretrained(reranker_name)
+        if llm_tokenizer:
+            self.tokenizers["llm"] = self.load_llm_tokenizer(llm_tokenizer)
+        logger.info(f"🔢 Token counts: {', '.join(self.tokenizers)}")
+
+    @classmethod
+    def from_config(cls, embedder) -> "TokenCounter":
+        return cls(embedder.tokenizer, reranker_name=Config.RERANKER_NAME, llm_tokenizer=Config.LLM_TOKENIZER)
+
+    @staticmethod
+    def load_llm_tokenizer(name: str):
+        if name.startswith("tiktoken:"):
+            try:
+                import tiktoken
+            except ImportError as e:
+                raise ImportError("Config.LLM_TOKENIZER uses tiktoken: pip install tiktoken") from e
+            return tiktoken.get_encoding(name.split(":", 1)[1])
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(name)
+
+    @staticmethod
+    def lengths(tokenizer, texts: List[str]) -> List[int]:
+        if hasattr(tokenizer, "encode_ordinary_batch"):  # tiktoken
+            return [len(ids) for ids in tokenizer.encode_ordinary_batch(texts)]
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def count(self, texts: List[str]) -> List[Dict[str, int]]:
+        """One {tokenizer: count} dict per text (one batched call per tokenizer)."""
+        if not texts:
+            return []
+        columns = {name: self.lengths(tokenizer, texts) for name, tokenizer in self.tokenizers.items()}
+        return [{name: lengths[i] for name, lengths in columns.items()} for i in range(len(texts))]
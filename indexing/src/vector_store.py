@@ -0,0 +1,116 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import List, Dict, Tuple
+import numpy as np
+from .logger import logger
+
+
+class LocalVectorStore:
+    """
+    float32 copy of the collection's vectors, memory-mapped and keyed by point id.
+
+    - vectors.f32: one row per point.
+    - index.json:  point id -> row, plus the free rows left by deletions.
+
+    Written next to Qdrant at index time so retrieval can ask Qdrant for ids and scores only
+    and gather the candidate vectors for MMR with one memmap read.
+    """
+
+    def __init__(self, path: str, dim: int, read_only: bool = False):
+        self.path = Path(path)
+        self.dim = dim
+        self.read_only = read_only
+        self._vectors_path = self.path / "vectors.f32"
+        self._index_path = self.path / "index.json"
+        self._lock = threading.Lock()
+
+        self.rows: Dict[str, int] = {}
+        self.free_rows: List[int] = []
+        self._released: List[int] = []  # freed since the last save; reused only after it
+        self.capacity = 0
+        self.vectors = None
+
+        if not read_only:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    # --- Storage ---
+    def _load(self):
+        if self._index_path.exists() and self._vectors_path.exists():
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("dim") == self.dim:
+                self.rows = state["rows"]
+                self.free_rows = state["free_rows"]
+                self.capacity = state["capacity"]
+            else:
+                logger.warning(f"⚠️ Local vectors dim {state.get('dim')} != {self.dim}. Ignoring {self.path}.")
+
+        if self.read_only:
+            if self.capacity:
+                self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(self.capacity, self.dim))
+        else:
+            self._open(max(self.capacity, 1024))
+        logger.info(f"🗄️  Local vectors: {len(self.rows)} points at {self.path}")
+
+    def _open(self, capacity: int):
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(max(os.path.getsize(self._vectors_path), capacity * self.dim * 4))
+        self.vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self.free_rows.extend(range(self.capacity, capacity))
+        self.capacity = capacity
+
+    # --- Writes (indexing) ---
+    def put_many(self, point_ids: List[str], vectors):
+        with self._lock:
+            new = [pid for pid in dict.fromkeys(point_ids) if pid not in self.rows]
+            if len(new) > len(self.free_rows):
+                self.vectors.flush()
+                self._open(max(self.capacity * 2, self.capacity + len(new) - len(self.free_rows)))
+            for pid in new:
+                self.rows[pid] = self.free_rows.pop()
+            self.vectors[[self.rows[pid] for pid in point_ids]] = np.asarray(vectors, dtype=np.float32)
+
+    def delete_many(self, point_ids: List[str]):
+        with self._lock:
+            for pid in point_ids:
+                row = self.rows.pop(pid, None)
+                if row is not None:
+                    # The saved index may still point here, so the row keeps its vector until save()
+                    self._released.append(row)
+
+    def save(self):
+        if self.read_only:
+            return
+        with self._lock:
+            self.vectors.flush()
+            self.free_rows.extend(self._released)
+            self._released = []
+            tmp_path = self._index_path.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "dim": self.dim,
+                    "capacity": self.capacity,
+                    "free_rows": self.free_rows,
+                    "rows": self.rows,
+                }, f)
+            os.replace(tmp_path, self._index_path)
+
+    # --- Reads (retrieval) ---
+    def get_many(self, point_ids: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        (n, dim) float32 matrix for `point_ids` (one gather from the memmap) and the
+        positions of ids that are not stored (their rows are left zero).
+        """
+        out = np.zeros((len(point_ids), self.dim), dtype=np.float32)
+        rows = [self.rows.get(str(pid)) for pid in point_ids]
+        found = [i for i, row in enumerate(rows) if row is not None]
+        if found:
+            out[found] = self.vectors[[rows[i] for i in found]]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        return out, missing
@@ -2,7 +2,7 @@ import json
 import os
 from pathlib import Path
 
-from src.text_cleaning import normalize_text, to_english_digits
+from src.text_cleaning import normalize_text, to_english_digits, date_to_int
 from src.anonymization import Anonymizer, extract_related_laws
 
 def process_file(page_number: int, secret: str) -> None:
@@ -55,10 +55,13 @@ def process_file(page_number: int, secret: str) -> None:
 
         # Construct Output
         processed_docs.append({
-            "id": f"{meta.get('case_number', 'doc')}_{idx}",
+            # Without a case number the page keeps the id unique across files
+            "id": f"{meta.get('case_number') or f'doc-p{page_number}'}_{idx}",
             "metadata": {
                 **meta,
-                "date_processed": meta.get("date") 
+                "date_processed": meta.get("date"),
+                # Sortable YYYYMMDD integer for range filters (None when the date is unreadable)
+                "date_int": date_to_int(meta.get("date"))
             },
             "text_short": text_short, 
             "text_full": text_full,   
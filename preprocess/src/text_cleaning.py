@@ -36,4 +36,23 @@ def to_english_digits(text: str) -> str:
     persian_map = str.maketrans("۰۱۲۳۴۵۶۷۸۹", "0123456789")
     arabic_map = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
     
-    return text.translate(persian_map).translate(arabic_map)
\ No newline at end of file
+    return text.translate(persian_map).translate(arabic_map)
+
+def date_to_int(text: Optional[str]) -> Optional[int]:
+    """
+    Converts a Jalali date such as "1398/05/12" (any digits) to a sortable integer 13980512.
+    A bare year becomes YYYY0000. Returns None when no date can be read.
+    """
+    if not text:
+        return None
+
+    text = to_english_digits(str(text))
+    match = re.search(r"(\d{4})\s*[/\-.]\s*(\d{1,2})\s*[/\-.]\s*(\d{1,2})", text)
+    if match:
+        year, month, day = (int(g) for g in match.groups())
+        return year * 10000 + month * 100 + day
+
+    match = re.search(r"\b(\d{4})\b", text)
+    if match:
+        return int(match.group(1)) * 10000
+    return None
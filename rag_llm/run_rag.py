@@ -10,9 +10,14 @@ sys.path.append(str(project_root))
 
 from config.config import Config
 from indexing.src.embedding import Embedder
+from indexing.src.doc_store import DocStore
+from indexing.src.vector_store import LocalVectorStore
+from indexing.src.ann_index import AnnIndex
+from indexing.src.bm25 import Bm25Index
 from retrieval.src.retriever import Retriever
 from retrieval.src.reranker import ReRanker
 from retrieval.src.pipeline import RetrievalPipeline
+from retrieval.src.timing import LATENCY, format_timings, format_summary
 
 from rag_llm.src.llm_client import LLMClient
 from rag_llm.src.rag_pipeline import RAGPipeline
@@ -29,17 +34,21 @@ def main():
     print("⏳ Initializing System (Loading Models & Database)...")
 
     # --- Setup Retrieval Components ---
-    embedder = Embedder(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
+    embedder = Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
     
     retriever = Retriever(
         qdrant_path=str(Config.QDRANT_PATH),
         collection_name=Config.COLLECTION_NAME,
-        embedder=embedder
+        embedder=embedder,
+        local_vectors=LocalVectorStore(str(Config.LOCAL_VECTORS_DIR), embedder.get_dimension(), read_only=True) if Config.USE_LOCAL_VECTORS else None,
+        ann_index=AnnIndex.from_config(embedder.get_dimension(), read_only=True)
     )
     
     reranker = ReRanker("BAAI/bge-reranker-v2-m3")
     
-    retrieval_pipe = RetrievalPipeline(retriever, reranker, embedder)
+    doc_store = DocStore(str(Config.DOC_STORE_PATH)) if Config.USE_DOC_STORE else None
+    bm25 = Bm25Index(str(Config.BM25_DIR)) if Config.USE_BM25 else None
+    retrieval_pipe = RetrievalPipeline(retriever, reranker, embedder, doc_store=doc_store, bm25=bm25)
 
     # --- Setup Generation Components ---
     llm = LLMClient(
@@ -63,6 +72,10 @@ def main():
         if query.lower() in ['exit', 'quit']:
             print("خداحافظ!")
             break
+        if query.strip().lower() == 'stats':
+            print("\n⏱️  Rolling latency (ms):")
+            print(format_summary(LATENCY.summary()))
+            continue
         
         if not query.strip(): continue
 
@@ -99,6 +112,11 @@ def main():
                         title = result["documents"][label]['metadata'].get('title')
                         print(f"- {title}")
 
+            if Config.SHOW_TIMINGS:
+                print("\n" + "-"*40)
+                print("⏱️  زمان‌بندی مراحل (ms):")
+                print(format_timings(result["timings"]))
+
         except Exception as e:
             print(f"\n❌ Error: {e}")
             import traceback
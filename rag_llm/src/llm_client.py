@@ -1,7 +1,7 @@
 import os
 import logging
 from typing import List, Dict
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 
 # Load env
@@ -35,6 +35,11 @@ class LLMClient:
             api_key=self.api_key,
             base_url=base_url
         )
+        # Same endpoint for the async pipeline (RAGPipeline.arun); requests share one connection pool
+        self.async_client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=base_url
+        )
 
     def generate(self, system_prompt: str, user_prompt: str) -> str:
         """Single turn generation"""
@@ -47,6 +52,28 @@ class LLMClient:
         """Multi-turn generation"""
         return self._call_api(messages)
 
+    async def agenerate(self, system_prompt: str, user_prompt: str) -> str:
+        return await self._acall_api([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+
+    async def agenerate_chat(self, messages: List[Dict[str, str]]) -> str:
+        return await self._acall_api(messages)
+
+    async def _acall_api(self, messages: List[Dict[str, str]]) -> str:
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                **self.config
+            )
+            return response.choices[0].message.content.strip()
+
+        except Exception as e:
+            logger.error(f"❌ LLM API Error: {e}")
+            return ""
+
     def _call_api(self, messages: List[Dict[str, str]]) -> str:
         try:
             # Pass **self.config to unpack all parameters
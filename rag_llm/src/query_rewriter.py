@@ -11,6 +11,18 @@ class QueryRewriter:
             rag_logger.info(f"🔄 [Rewriter] No history. Keeping original: '{query}'")
             return query
 
+        system_prompt, user_prompt = self._build_prompts(query, history)
+        return self._clean(query, self.llm.generate(system_prompt, user_prompt))
+
+    async def arewrite(self, query: str, history: List[Dict[str, str]]) -> str:
+        if not history:
+            rag_logger.info(f"🔄 [Rewriter] No history. Keeping original: '{query}'")
+            return query
+
+        system_prompt, user_prompt = self._build_prompts(query, history)
+        return self._clean(query, await self.llm.agenerate(system_prompt, user_prompt))
+
+    def _build_prompts(self, query: str, history: List[Dict[str, str]]):
         rag_logger.info("🔄 [Rewriter] Processing query with history...")
 
         # Construct History String
@@ -35,8 +47,9 @@ History: User: مجازات سرقت؟ Assistant: حبس... User: مسلحانه
 >>> Rewritten: مجازات سرقت مسلحانه چیست؟
 """
         user_prompt = f"### History:\n{history_str}\n### Question:\n{query}\n### Rewritten:"
-        
-        rewritten = self.llm.generate(system_prompt, user_prompt)
+        return system_prompt, user_prompt
+
+    def _clean(self, query: str, rewritten: str) -> str:
         rewritten = rewritten.replace("Rewritten:", "").replace('"', '').strip()
         
         rag_logger.info(f"✅ [Rewriter] '{query}' -> '{rewritten}'")
@@ -1,39 +1,187 @@
-from typing import Dict, Any, List
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from config.config import Config
 from retrieval.src.pipeline import RetrievalPipeline
 from retrieval.src.context_builder import ContextBuilder
 from .llm_client import LLMClient
 from .prompt import PromptBuilder
 from .query_rewriter import QueryRewriter
 from .logger import rag_logger
+from retrieval.src.timing import StageTimer, track, stage, use_timer
+
+
+class CpuPool:
+    """Threads for blocking work of async requests, with an in-flight count so optional work only takes idle ones."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-cpu")
+        self._busy = 0
+        self._lock = threading.Lock()
+
+    def has_idle(self, n: int = 1) -> bool:
+        with self._lock:
+            return self._busy + n <= self.workers
+
+    def run(self, fn, *args) -> asyncio.Future:
+        """
+        Submits fn to a worker in a copy of the caller's context (stage timings land in this
+        request); await the returned future. The worker counts as busy from submission until
+        the job ends, even if the awaiting task is cancelled meanwhile.
+        """
+        context = contextvars.copy_context()
+        with self._lock:
+            self._busy += 1
+        job = self.executor.submit(context.run, fn, *args)
+        job.add_done_callback(self._done)
+        return asyncio.wrap_future(job)
+
+    def _done(self, job):
+        with self._lock:
+            self._busy -= 1
+
+
+# CPU work (embedding, local Qdrant, reranking) of every async request; shared by all pipelines
+_cpu_pool: Optional[CpuPool] = None
+
+
+def get_cpu_pool() -> CpuPool:
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = CpuPool(Config.RAG_CPU_WORKERS)
+    return _cpu_pool
+
 
 class RAGPipeline:
     def __init__(
         self,
         retrieval_pipeline: RetrievalPipeline,
         llm_client: LLMClient,
-        max_docs_in_context: int = 8
+        max_docs_in_context: int = 8,
+        cpu_pool: Optional[CpuPool] = None
     ):
         self.retrieval_pipeline = retrieval_pipeline
         self.llm_client = llm_client
         self.context_builder = ContextBuilder(max_docs=max_docs_in_context)
         self.prompt_builder = PromptBuilder()
         self.rewriter = QueryRewriter(llm_client)
+        # Threads for arun()'s blocking work; None = the process-wide pool (Config.RAG_CPU_WORKERS threads)
+        self.cpu_pool = cpu_pool
+
+    def run(
+        self,
+        query: str,
+        chat_history: List[Dict[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        retrieved: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        retrieved: results already fetched for `query` (e.g. by RetrievalPipeline.run_batch);
+        used only when the rewriter keeps the query unchanged. Their `.timings`, if set, are
+        added to this request's stages.
+        """
+        if chat_history is None: chat_history = []
+
+        with track("rag") as timer:
+            rag_logger.info("="*50)
+            rag_logger.info(f"▶️ START PIPELINE: {query}")
+
+            # Rewrite (USES HISTORY)
+            with stage("rewrite"):
+                search_query = self.rewriter.rewrite(query, chat_history)
 
-    def run(self, query: str, chat_history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+            # Retrieve
+            if retrieved is not None and search_query == query:
+                hits = retrieved
+                prefetch = getattr(retrieved, "timings", None)
+                if prefetch:
+                    timer.add("retrieval", prefetch["total_ms"] / 1000, len(hits))
+                    for name, entry in prefetch["stages"].items():
+                        timer.add(name, entry["ms"] / 1000, entry["count"])
+            else:
+                hits = self._retrieve(search_query, filters)
+
+            # Build Context + Prompt
+            doc_map, messages = self._build_messages(search_query, hits)
+
+            # Generate
+            rag_logger.info("🤖 [LLM] Generating answer...")
+            with stage("llm"):
+                answer = self.llm_client.generate_chat(messages)
+
+            return self._result(query, search_query, answer, doc_map, timer)
+
+    async def arun(
+        self,
+        query: str,
+        chat_history: List[Dict[str, str]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        run() for asyncio servers: LLM calls go through the async client and retrieval
+        (embedding, search, reranking) runs on the CPU executor, so one event loop serves
+        many conversations without a thread per user.
+
+        With Config.SPECULATIVE_RETRIEVAL and history, retrieval on the raw query starts while
+        the rewrite is in flight, but only if it leaves a worker idle for the real retrieval. Its
+        results (and stage timings) are used only when the rewrite keeps the query.
+        """
         if chat_history is None: chat_history = []
+        pool = self.cpu_pool or get_cpu_pool()
+
+        with track("rag") as timer:
+            rag_logger.info("="*50)
+            rag_logger.info(f"▶️ START PIPELINE (async): {query}")
+
+            speculative = None
+            if chat_history and Config.SPECULATIVE_RETRIEVAL and pool.has_idle(2):
+                speculative = pool.run(self._speculate, query, filters)
 
-        rag_logger.info("="*50)
-        rag_logger.info(f"▶️ START PIPELINE: {query}")
+            # Rewrite (USES HISTORY)
+            with stage("rewrite"):
+                search_query = await self.rewriter.arewrite(query, chat_history)
 
-        # Rewrite (USES HISTORY)
-        search_query = self.rewriter.rewrite(query, chat_history)
+            # Retrieve
+            if speculative is not None and search_query == query:
+                hits, speculative_timer = await speculative
+                timer.merge(speculative_timer)
+            else:
+                if speculative is not None:
+                    rag_logger.debug("🔁 [Retrieval] Rewrite changed the query; speculative results dropped")
+                    speculative.cancel()  # only helps if it has not started yet
+                    speculative.add_done_callback(lambda f: f.cancelled() or f.exception())  # no "exception never retrieved"
+                hits = await pool.run(self._retrieve, search_query, filters)
 
-        # Retrieve
-        hits = self.retrieval_pipeline.run(query=search_query, retrieve_k=50)
+            # Build Context + Prompt
+            doc_map, messages = self._build_messages(search_query, hits)
+
+            # Generate
+            rag_logger.info("🤖 [LLM] Generating answer...")
+            with stage("llm"):
+                answer = await self.llm_client.agenerate_chat(messages)
+
+            return self._result(query, search_query, answer, doc_map, timer)
+
+    def _speculate(self, query: str, filters: Optional[Dict[str, Any]]):
+        """_retrieve into a timer of its own, merged into the request's only if the results are used."""
+        with use_timer(StageTimer("rag")) as speculative_timer:
+            hits = self._retrieve(query, filters)
+        return hits, speculative_timer
+
+    def _retrieve(self, search_query: str, filters: Optional[Dict[str, Any]]):
+        with stage("retrieval") as s:
+            hits = self.retrieval_pipeline.run(query=search_query, retrieve_k=50, filters=filters)
+            s.count = len(hits)
+        return hits
+
+    def _build_messages(self, search_query: str, hits):
+        with stage("context") as s:
+            context_str, doc_map = self.context_builder.build(hits)
+            s.count = len(doc_map)
 
-        # Build Context
-        context_str, doc_map = self.context_builder.build(hits)
-        
         if context_str:
             rag_logger.debug(f"📦 [Context] Length: {len(context_str)} chars")
             rag_logger.debug(f"📦 [Context Preview]: {context_str[:500]}...")
@@ -42,26 +190,27 @@ class RAGPipeline:
 
         # Prompt Engineering
         system_msg = self.prompt_builder.SYSTEM_PROMPT
-        
+
         messages = [{"role": "system", "content": system_msg}]
-        
+
         # Use the REWRITTEN query + New Context
         augmented_user_msg = self.prompt_builder.build_user_message(search_query, context_str)
         messages.append({"role": "user", "content": augmented_user_msg})
+        return doc_map, messages
 
-        # Generate
-        rag_logger.info("🤖 [LLM] Generating answer...")
-        answer = self.llm_client.generate_chat(messages)
+    def _result(self, query: str, search_query: str, answer: str, doc_map: Dict[str, dict], timer) -> Dict[str, Any]:
         rag_logger.debug(f"🤖 [LLM Output] {answer[:200]}...")
 
         # Citations
         used_docs = [doc_id for doc_id in doc_map.keys() if doc_id in answer]
-        
+
         rag_logger.info("🏁 END PIPELINE")
         return {
             "original_query": query,
             "rewritten_query": search_query,
             "answer": answer,
             "documents": doc_map,
-            "used_docs": used_docs
-        }
\ No newline at end of file
+            "used_docs": used_docs,
+            # Per-stage ms and candidate counts (retrieval stages included)
+            "timings": timer.as_dict()
+        }
@@ -8,6 +8,10 @@ project_root = current_file.parent.parent
 sys.path.append(str(project_root))
 
 from indexing.src.embedding import Embedder
+from indexing.src.doc_store import DocStore
+from indexing.src.vector_store import LocalVectorStore
+from indexing.src.ann_index import AnnIndex
+from indexing.src.bm25 import Bm25Index
 from config.config import Config
 from retrieval.src.retriever import Retriever
 from retrieval.src.reranker import ReRanker
@@ -19,17 +23,16 @@ def main():
 
     # Load Embedder
     logger.info("⏳ Loading Embedder...")
-    embedder = Embedder(
-        model_name=Config.MODEL_NAME,
-        is_e5=Config.IS_E5_MODEL
-    )
+    embedder = Embedder.from_config(Config.MODEL_NAME, is_e5=Config.IS_E5_MODEL)
 
     # Setup Retriever
-    logger.info(f"📂 Opening Database: {Config.QDRANT_PATH}")
+    logger.info(f"📂 Opening Database: {Config.QDRANT_URL or Config.QDRANT_PATH}")
     retriever = Retriever(
         qdrant_path=str(Config.QDRANT_PATH), 
         collection_name=Config.COLLECTION_NAME,
-        embedder=embedder
+        embedder=embedder,
+        local_vectors=LocalVectorStore(str(Config.LOCAL_VECTORS_DIR), embedder.get_dimension(), read_only=True) if Config.USE_LOCAL_VECTORS else None,
+        ann_index=AnnIndex.from_config(embedder.get_dimension(), read_only=True)
     )
 
     # Setup Re-ranker
@@ -42,7 +45,9 @@ def main():
     pipeline = RetrievalPipeline(
         retriever=retriever,
         reranker=reranker,
-        embedder=embedder
+        embedder=embedder,
+        doc_store=DocStore(str(Config.DOC_STORE_PATH)) if Config.USE_DOC_STORE else None,
+        bm25=Bm25Index(str(Config.BM25_DIR)) if Config.USE_BM25 else None
     )
 
     # Run Test
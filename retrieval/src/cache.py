@@ -0,0 +1,93 @@
+import os
+import atexit
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from preprocess.src.text_cleaning import normalize_text, to_english_digits
+from .logger import logger
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe LRU map with hit/miss counters.
+
+    With `path` the entries are pickled there on save() (and at exit) and loaded back on start,
+    so the cache survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None, name: str = "cache"):
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.name = name
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.path is not None:
+            self._load()
+            atexit.register(self.save)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    # --- Persistence ---
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                items = pickle.load(f)
+            self._data = OrderedDict(items[-self.max_entries:])
+            logger.info(f"[CACHE] {self.name}: loaded {len(self._data)} entries from {self.path}")
+        except Exception as e:
+            logger.warning(f"[CACHE] {self.name}: could not load {self.path} ({e}). Starting empty.")
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            items = list(self._data.items())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(items, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+
+def normalize_query(query: str) -> str:
+    """Persian normalization + digit folding, as applied to the indexed documents."""
+    return " ".join(to_english_digits(normalize_text(query)).split())
+
+
+def query_key(*parts: str) -> str:
+    """Stable key for a normalized query and whatever else the cached value depends on (model, prefix...)."""
+    return hashlib.sha1("\0".join(parts).encode("utf-8")).hexdigest()
@@ -0,0 +1,113 @@
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from config.config import Config
+from .logger import logger
+from .timing import stage
+
+
+def cosine_scores(query_vector: np.ndarray, doc_vectors: np.ndarray) -> np.ndarray:
+    """Bi-encoder similarity of each candidate to the query (zero vectors score 0)."""
+    doc_vectors = np.asarray(doc_vectors, dtype=np.float32)
+    if not len(doc_vectors):
+        return np.empty(0, dtype=np.float32)
+    query_vector = np.asarray(query_vector, dtype=np.float32)
+    norms = np.linalg.norm(doc_vectors, axis=1) * max(float(np.linalg.norm(query_vector)), 1e-12)
+    return (doc_vectors @ query_vector) / np.maximum(norms, 1e-12)
+
+
+class RerankCascade:
+    """
+    Cheap stages in front of the full cross-encoder, each with its own threshold:
+
+    1. Early exit: when the best candidate's bi-encoder similarity beats the runner-up by at
+       least `exit_margin`, the dense order is final and nothing is reranked.
+    2. First pass: candidates are scored by the bi-encoder (first_pass="dense") or by a small
+       cross-encoder (any object with rerank_batch), and only the best `keep` go on.
+    3. The full reranker scores the survivors.
+
+    Pruned candidates are dropped; early-exit queries carry bi-encoder scores instead of
+    cross-encoder scores.
+    """
+
+    def __init__(self, reranker, exit_margin: Optional[float] = None, first_pass=None, keep: int = 8):
+        self.reranker = reranker
+        self.exit_margin = exit_margin
+        self.first_pass = first_pass
+        self.keep = keep
+        self.stats = {"queries": 0, "early_exits": 0, "pruned": 0, "reranked": 0}
+
+    @classmethod
+    def from_config(cls, reranker) -> Optional["RerankCascade"]:
+        """Cascade from Config.RERANK_*; None when both cheap stages are off."""
+        first_pass = Config.RERANK_FIRST_PASS
+        if Config.RERANK_EXIT_MARGIN is None and first_pass is None:
+            return None
+        if first_pass not in (None, "dense"):
+            from .reranker import ReRanker
+            first_pass = ReRanker(first_pass)
+        return cls(reranker, exit_margin=Config.RERANK_EXIT_MARGIN, first_pass=first_pass, keep=Config.RERANK_FIRST_PASS_KEEP)
+
+    def _decisive(self, dense: np.ndarray) -> bool:
+        if self.exit_margin is None or len(dense) == 0:
+            return False
+        if len(dense) == 1:
+            return True
+        top2 = np.partition(dense, len(dense) - 2)[-2:]
+        return top2[1] - top2[0] >= self.exit_margin
+
+    def rank(
+        self,
+        queries: List[str],
+        passages: Sequence[List[str]],
+        ids: Sequence[List[str]],
+        dense_scores: Sequence[np.ndarray],
+        lengths: Optional[Sequence[List[Optional[int]]]] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        (candidate index, score) per query, best first, without the pruned candidates.
+        lengths: stored cross-encoder token counts of the passages (see ReRanker.rerank_batch).
+        """
+        ranked: List[Optional[List[Tuple[int, float]]]] = [None] * len(queries)
+        kept = [list(range(len(p))) for p in passages]
+
+        # Stage 1: early exit on a decisive dense margin
+        with stage("early_exit") as s:
+            for q, dense in enumerate(dense_scores):
+                if self._decisive(dense):
+                    order = np.argsort(-dense, kind="stable")
+                    ranked[q] = [(int(i), float(dense[i])) for i in order]
+                    self.stats["early_exits"] += 1
+            todo = [q for q in range(len(queries)) if ranked[q] is None]
+            s.count = len(queries) - len(todo)
+
+        # Stage 2: cheap first pass, keep the best `keep`
+        to_score = [q for q in todo if len(kept[q]) > self.keep] if self.first_pass is not None else []
+        if to_score:
+            with stage("first_pass", count=sum(len(kept[q]) for q in to_score)):
+                if self.first_pass == "dense":
+                    first_scores = [dense_scores[q] for q in to_score]
+                else:
+                    first_scores = self.first_pass.rerank_batch(
+                        [queries[q] for q in to_score], [passages[q] for q in to_score], ids=[ids[q] for q in to_score]
+                    )  # stored lengths are for the full reranker's tokenizer, so none are passed here
+                for q, scores in zip(to_score, first_scores):
+                    best = np.argsort(-np.asarray(scores), kind="stable")[:self.keep]
+                    self.stats["pruned"] += len(kept[q]) - len(best)
+                    kept[q] = sorted(int(i) for i in best)
+
+        # Stage 3: full reranker on what is left
+        if todo:
+            with stage("rerank", count=sum(len(kept[q]) for q in todo)):
+                full_scores = self.reranker.rerank_batch(
+                    [queries[q] for q in todo],
+                    [[passages[q][i] for i in kept[q]] for q in todo],
+                    ids=[[ids[q][i] for i in kept[q]] for q in todo],
+                    lengths=[[lengths[q][i] for i in kept[q]] for q in todo] if lengths is not None else None
+                )
+            for q, scores in zip(todo, full_scores):
+                ranked[q] = sorted(zip(kept[q], (float(s) for s in scores)), key=lambda x: x[1], reverse=True)
+                self.stats["reranked"] += len(kept[q])
+
+        self.stats["queries"] += len(queries)
+        logger.info(f"[CASCADE] {len(queries) - len(todo)} early exits, {sum(len(kept[q]) for q in todo)} pairs to the full reranker")
+        return ranked
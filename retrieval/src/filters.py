@@ -0,0 +1,44 @@
+from typing import Any, Dict, List, Optional
+from qdrant_client.http import models
+
+
+def _date_bound(value, upper: bool) -> int:
+    """1398 -> 13980000 (from) / 13981299 (to); full YYYYMMDD integers pass through."""
+    value = int(value)
+    if value < 10000:
+        return value * 10000 + (1299 if upper else 0)
+    return value
+
+
+def filter_conditions(spec: Optional[Dict[str, Any]]) -> List[models.Condition]:
+    """
+    Qdrant conditions for a filter spec:
+        {"domain": str | [str], "authority": str | [str], "date_from": 1398 | 13980101, "date_to": ...}
+    Empty values are ignored. Date bounds are inclusive and exclude documents without a date (date_int 0).
+    """
+    if not spec:
+        return []
+
+    conditions = []
+    for field in ("domain", "authority"):
+        value = spec.get(field)
+        if not value:
+            continue
+        values = [value] if isinstance(value, str) else list(value)
+        conditions.append(models.FieldCondition(key=field, match=models.MatchAny(any=values)))
+
+    date_from, date_to = spec.get("date_from"), spec.get("date_to")
+    if date_from or date_to:
+        conditions.append(models.FieldCondition(
+            key="date_int",
+            range=models.Range(
+                gte=_date_bound(date_from, upper=False) if date_from else 1,
+                lte=_date_bound(date_to, upper=True) if date_to else None
+            )
+        ))
+    return conditions
+
+
+def build_filter(spec: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    conditions = filter_conditions(spec)
+    return models.Filter(must=conditions) if conditions else None
@@ -0,0 +1,30 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuses several rankings of ids (best first) with RRF: score(id) = sum over rankings of 1 / (k + rank).
+    Returns (id, score) best first; ties keep the order in which ids were first seen.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def collapse_by_doc(hits: Sequence, per_doc: int = 1, limit: Optional[int] = None) -> List:
+    """
+    Keeps the best `per_doc` chunks of each judgment (payload doc_id) from a ranked hit list,
+    in rank order, up to `limit` hits: the local equivalent of Qdrant's group-by on doc_id.
+    """
+    kept, counts = [], {}
+    for hit in hits:
+        doc_id = hit.payload.get("doc_id")
+        if counts.get(doc_id, 0) >= per_doc:
+            continue
+        counts[doc_id] = counts.get(doc_id, 0) + 1
+        kept.append(hit)
+        if limit is not None and len(kept) >= limit:
+            break
+    return kept
@@ -1,5 +1,12 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import List, Sequence
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalization (zero rows stay zero), as cosine_similarity does."""
+    norms = np.sqrt(np.einsum("...i,...i->...", x, x))
+    norms = np.where(norms == 0.0, 1.0, norms)
+    return x / norms[..., None]
 
 
 def mmr(
@@ -7,34 +14,60 @@ def mmr(
     doc_embeddings: np.ndarray,
     lambda_: float = 0.7,
     k: int = 5
-):
-    selected = []
-    candidates = list(range(len(doc_embeddings)))
-
-    similarity_to_query = cosine_similarity(
-        query_embedding.reshape(1, -1),
-        doc_embeddings
-    )[0]
-
-    while len(selected) < k and candidates:
-        scores = []
-
-        for c in candidates:
-            redundancy = max(
-                cosine_similarity(
-                    doc_embeddings[c].reshape(1, -1),
-                    doc_embeddings[selected]
-                )[0]
-            ) if selected else 0.0
-
-            score = (
-                lambda_ * similarity_to_query[c]
-                - (1 - lambda_) * redundancy
-            )
-            scores.append(score)
-
-        best_idx = candidates[int(np.argmax(scores))]
-        selected.append(best_idx)
-        candidates.remove(best_idx)
+) -> List[int]:
+    query_embedding = np.asarray(query_embedding).reshape(1, -1)
+    return mmr_batch(query_embedding, [doc_embeddings], lambda_=lambda_, k=k)[0]
+
+
+def mmr_batch(
+    query_embeddings: np.ndarray,
+    doc_embeddings: Sequence[np.ndarray],
+    lambda_: float = 0.7,
+    k: int = 5
+) -> List[List[int]]:
+    """
+    MMR for several queries at once; `doc_embeddings[i]` holds the candidates of query i.
+
+    The candidate Gram matrix is computed once and each candidate's max similarity to the
+    selected set is updated incrementally, so every step is a single argmax per query.
+    Candidate lists of different lengths are padded and masked out.
+    """
+    query_embeddings = np.asarray(query_embeddings)
+    doc_embeddings = [np.asarray(d) for d in doc_embeddings]
+    sizes = [len(d) for d in doc_embeddings]
+    n_queries, n_max = len(doc_embeddings), max(sizes, default=0)
+    if n_max == 0:
+        return [[] for _ in range(n_queries)]
+
+    dtype = np.result_type(query_embeddings.dtype, *(d.dtype for d in doc_embeddings), np.float32)
+    docs = np.zeros((n_queries, n_max, query_embeddings.shape[1]), dtype=dtype)
+    available = np.zeros((n_queries, n_max), dtype=bool)
+    for i, d in enumerate(doc_embeddings):
+        if sizes[i]:
+            docs[i, :sizes[i]] = d
+            available[i, :sizes[i]] = True
+
+    docs = _normalize(docs)
+    queries = _normalize(query_embeddings.astype(dtype, copy=False))
+    relevance = lambda_ * (queries[:, None, :] @ docs.transpose(0, 2, 1))[:, 0]
+    gram = docs @ docs.transpose(0, 2, 1)
+
+    rows = np.arange(n_queries)
+    redundancy = np.zeros((n_queries, n_max), dtype=dtype)  # 0 until something is selected
+    selected = [[] for _ in range(n_queries)]
+
+    for step in range(min(k, n_max)):
+        active = available.any(axis=1)
+        if not active.any():
+            break
+
+        scores = np.where(available, relevance - (1 - lambda_) * redundancy, -np.inf)
+        best = scores.argmax(axis=1)  # first index on ties, like the sequential loop
+        for r in np.flatnonzero(active):
+            selected[r].append(int(best[r]))
+        available[rows[active], best[active]] = False
+
+        best_sims = gram[rows, best]
+        redundancy = best_sims if step == 0 else np.maximum(redundancy, best_sims)
 
     return selected
@@ -1,87 +1,263 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import time
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from . import mmr
+from .fusion import reciprocal_rank_fusion, collapse_by_doc
+from .cascade import RerankCascade, cosine_scores
+from .timing import track, stage
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../')))
 from rag_llm.src.logger import rag_logger
+from config.config import Config
+from indexing.src.token_counts import TokenCounter
+
+class RetrievalResults(list):
+    """Result dicts of one query, plus `timings`: the per-stage breakdown of the request (see timing.py)."""
+    timings: Optional[Dict[str, Any]] = None
+
 
 class RetrievalPipeline:
-    def __init__(self, retriever, reranker, embedder):
+    def __init__(self, retriever, reranker, embedder, doc_store=None, bm25=None, cascade=None, chunks_per_doc=None):
         self.retriever = retriever
         self.reranker = reranker
         self.embedder = embedder
-        self.tokenizer = embedder.tokenizer
+        # Tokenizer of Config.CONTEXT_BUDGET_TOKENIZER, loaded on the first point without a stored count
+        self._budget_tokenizer = None
+        # Optional DocStore: hydrates text/metadata for lean payloads
+        self.doc_store = doc_store
+        # Optional Bm25Index: lexical candidates searched next to dense search and fused with RRF
+        self.bm25 = bm25
+        self._lexical_pool = ThreadPoolExecutor(max_workers=1) if bm25 is not None else None
+        # Optional RerankCascade (early exit / first pass before the full reranker); None = from Config, False = off
+        self.cascade = RerankCascade.from_config(reranker) if cascade is None else cascade
+        # Grouped retrieval (chunks kept per doc_id); None = Config.CHUNKS_PER_DOC, 0 = off
+        self.chunks_per_doc = Config.CHUNKS_PER_DOC if chunks_per_doc is None else chunks_per_doc
 
-    def _select_by_token_budget(self, candidates: List[tuple], max_tokens: int = 2000) -> List[Dict[str, Any]]:
-        selected_results = []
+    def _retrieve_candidates(self, query: str, retrieve_k: int, filters: Optional[Dict[str, Any]] = None):
+        """Dense hits, or with BM25 the RRF fusion of dense and lexical rankings (top retrieve_k)."""
+        hit_lists, query_vectors = self._retrieve_candidates_batch([query], retrieve_k, filters)
+        return hit_lists[0], query_vectors[0]
+
+    def _retrieve_candidates_batch(self, queries: List[str], retrieve_k: int, filters: Optional[Dict[str, Any]] = None):
+        """
+        _retrieve_candidates for many queries: one encoder call and one batched Qdrant request.
+        With chunks_per_doc, GROUP_OVERSAMPLING x retrieve_k candidates are fetched and collapsed
+        by doc_id to retrieve_k, so sibling chunks of one judgment do not crowd out the others.
+        """
+        if not self.chunks_per_doc:
+            return self._search_batch(queries, retrieve_k, filters)
+        hit_lists, query_vectors = self._search_batch(queries, retrieve_k * Config.GROUP_OVERSAMPLING, filters)
+        with stage("group") as s:
+            collapsed = [collapse_by_doc(hits, self.chunks_per_doc, limit=retrieve_k) for hits in hit_lists]
+            s.count = sum(len(h) for h in collapsed)
+        rag_logger.debug(f"📊 [Retrieval] Grouped by doc_id: {[len(h) for h in hit_lists]} -> {[len(h) for h in collapsed]}")
+        return collapsed, query_vectors
+
+    def _search_batch(self, queries: List[str], retrieve_k: int, filters: Optional[Dict[str, Any]] = None):
+        lexical_future = None
+        if self.bm25 is not None:
+            lexical_future = self._lexical_pool.submit(
+                lambda: [self.bm25.search(q, Config.BM25_TOP_K) for q in queries]
+            )
+        hit_lists, query_vectors = self.retriever.retrieve_batch(queries, top_k=retrieve_k, filters=filters)
+        if lexical_future is None:
+            return hit_lists, query_vectors
+
+        with stage("bm25_wait") as s:
+            lexical_lists = lexical_future.result()
+            s.count = sum(len(lexical) for lexical in lexical_lists)
+        with stage("fusion") as s:
+            fused = [self._fuse(hits, lexical, retrieve_k, filters) for hits, lexical in zip(hit_lists, lexical_lists)]
+            s.count = sum(len(h) for h in fused)
+        return fused, query_vectors
+
+    def _fuse(self, hits, lexical, retrieve_k: int, filters: Optional[Dict[str, Any]] = None):
+        # The lexical index is unfiltered: filtered-out ids are dropped when their payloads are fetched
+        fetched = {}
+        if filters:
+            fetched = {str(p.id): p for p in self.retriever.fetch_points([pid for pid, _ in lexical], filters=filters)}
+            lexical = [(pid, score) for pid, score in lexical if pid in fetched]
+
+        fused = reciprocal_rank_fusion(
+            [[str(h.id) for h in hits], [point_id for point_id, _ in lexical]], k=Config.RRF_K
+        )[:retrieve_k]
+        by_id = {str(h.id): h for h in hits}
+        lexical_only = [point_id for point_id, _ in fused if point_id not in by_id]
+        for point in self.retriever.fetch_points([pid for pid in lexical_only if pid not in fetched]):
+            by_id[str(point.id)] = point
+        by_id.update({pid: fetched[pid] for pid in lexical_only if pid in fetched})
+
+        rag_logger.debug(f"📊 [Retrieval] Hybrid: {len(hits)} dense + {len(lexical)} lexical -> {len(fused)} fused ({len(lexical_only)} lexical-only)")
+        return [by_id[point_id] for point_id, _ in fused if point_id in by_id]
+
+    def _hit_texts(self, hits) -> Dict[str, str]:
+        if self.doc_store is not None:
+            return self.doc_store.hit_texts(hits)
+        return {str(h.id): h.payload.get("text", "") for h in hits}
+
+    def _hit_metadata(self, hits) -> Dict[str, dict]:
+        """Metadata per doc_id, hydrated from the DocStore only for hits whose payload lacks it."""
+        metadata = {h.payload.get("doc_id"): h.payload["metadata"] for h in hits if "metadata" in h.payload}
+        missing = [h.payload.get("doc_id") for h in hits if h.payload.get("doc_id") not in metadata]
+        if missing and self.doc_store is not None:
+            for doc_id, doc in self.doc_store.get_documents(missing).items():
+                metadata[doc_id] = doc["metadata"]
+        return metadata
+
+    def _load_budget_tokenizer(self):
+        name = Config.CONTEXT_BUDGET_TOKENIZER
+        if name == "rerank" and self.reranker is not None:
+            return self.reranker.tokenizer
+        if name == "llm" and Config.LLM_TOKENIZER:
+            return TokenCounter.load_llm_tokenizer(Config.LLM_TOKENIZER)
+        if name != "embed":
+            rag_logger.warning(f"⚠️ No '{name}' tokenizer configured: counting context tokens with the embedding tokenizer")
+        return self.embedder.tokenizer
+
+    def _token_count(self, hit, text: str) -> int:
+        """Stored count from the payload (see TokenCounter); the same tokenizer only for points indexed without one."""
+        count = (hit.payload.get("tokens") or {}).get(Config.CONTEXT_BUDGET_TOKENIZER)
+        if count is None:
+            if self._budget_tokenizer is None:
+                self._budget_tokenizer = self._load_budget_tokenizer()
+            count = TokenCounter.lengths(self._budget_tokenizer, [text])[0]
+        return count
+
+    def _select_by_token_budget(self, candidates: List[tuple], texts: Dict[str, str], max_tokens: int = 2000) -> List[Dict[str, Any]]:
+        selected = []
         current_tokens = 0
         for hit, score in candidates:
-            text = hit.payload.get("text", "")
-            count = len(self.tokenizer.tokenize(text))
+            count = self._token_count(hit, texts[str(hit.id)])
             if current_tokens + count > max_tokens: break
-            
+            selected.append((hit, score))
+            current_tokens += count
+
+        # Metadata is only needed for what made it into the budget
+        metadata = self._hit_metadata([hit for hit, _ in selected])
+
+        selected_results = []
+        for hit, score in selected:
+            doc_id = hit.payload.get("doc_id", "unknown")
             result_obj = {
-                "text": text,
-                "metadata": hit.payload.get("metadata", {}),
-                "doc_id": hit.payload.get("doc_id", "unknown"),
+                "text": texts[str(hit.id)],
+                "metadata": metadata.get(doc_id, {}),
+                "doc_id": doc_id,
                 "chunk_id": hit.id,
                 "score": score
             }
             selected_results.append(result_obj)
-            current_tokens += count
         return selected_results
 
-    def run(self, query: str, retrieve_k: int = 40) -> List[Dict[str, Any]]:
+    def _mmr_candidates(self, hit_lists, query_vectors):
+        """
+        MMR survivors per query with their bi-encoder similarities, and their hydrated texts.
+        Survivors without usable text (20 chars or less) are dropped.
+        """
+        # Filter (lean payloads carry no text; those are checked after hydration below)
+        valid_lists = [
+            [h for h in hits if "text" not in h.payload or len(h.payload["text"] or "") > 20]
+            for hits in hit_lists
+        ]
+        rag_logger.debug(f"📊 [Retrieval] Hits found: {[len(v) for v in valid_lists]} (Filtered)")
+
+        # MMR
+        # Vectors from the hits, the local vector store, or Qdrant for just these ids
+        with stage("vectors", count=sum(len(v) for v in valid_lists)):
+            doc_embeddings = [self.retriever.candidate_vectors(valid_hits) for valid_hits in valid_lists]
+        with stage("mmr") as s:
+            selected_indices = mmr.mmr_batch(
+                query_embeddings=query_vectors,
+                doc_embeddings=doc_embeddings,
+                lambda_=0.7,
+                k=20
+            )
+            s.count = sum(len(idx) for idx in selected_indices)
+
+        # Hydrate text only for the MMR survivors (one lookup for all queries)
+        with stage("hydrate") as s:
+            texts = self._hit_texts([valid_lists[q][i] for q, idx in enumerate(selected_indices) for i in idx])
+            s.count = len(texts)
+
+        mmr_lists, dense_lists = [], []
+        for q, idx in enumerate(selected_indices):
+            idx = [i for i in idx if len(texts.get(str(valid_lists[q][i].id), "")) > 20]
+            mmr_lists.append([valid_lists[q][i] for i in idx])
+            dense_lists.append(cosine_scores(query_vectors[q], doc_embeddings[q][idx]))
+        return mmr_lists, dense_lists, texts
+
+    def _rank(self, queries: List[str], mmr_lists, dense_lists, texts: Dict[str, str]) -> List[List[tuple]]:
+        """(hit, score) per query, best first: the cascade when configured, else the full reranker on every survivor."""
+        passages = [[texts[str(h.id)] for h in mmr_hits] for mmr_hits in mmr_lists]
+        ids = [[str(h.id) for h in mmr_hits] for mmr_hits in mmr_lists]
+        # Stored cross-encoder token counts spare the reranker tokenizing passages that need no truncation
+        lengths = [[(h.payload.get("tokens") or {}).get("rerank") for h in mmr_hits] for mmr_hits in mmr_lists]
+
+        if self.cascade:
+            ranked = self.cascade.rank(queries, passages, ids, dense_lists, lengths=lengths)
+            return [[(mmr_hits[i], score) for i, score in r] for mmr_hits, r in zip(mmr_lists, ranked)]
+
+        # Re-ranking (every uncached pair of every query in one cross-encoder pass)
+        with stage("rerank", count=sum(len(p) for p in passages)):
+            score_lists = self.reranker.rerank_batch(queries=queries, passages=passages, ids=ids, lengths=lengths)
+        return [
+            sorted(zip(mmr_hits, scores), key=lambda x: x[1], reverse=True)
+            for mmr_hits, scores in zip(mmr_lists, score_lists)
+        ]
+
+    def run(self, query: str, retrieve_k: int = 40, filters: Optional[Dict[str, Any]] = None) -> RetrievalResults:
+        return self.run_batch([query], retrieve_k=retrieve_k, filters=filters)[0]
+
+    def run_batch(self, queries: List[str], retrieve_k: int = 40, filters: Optional[Dict[str, Any]] = None) -> List[RetrievalResults]:
+        """
+        run() for many queries at once: one encoder call and one batched Qdrant request,
+        MMR over all candidate sets together, one text hydration, and a single cross-encoder
+        pass over every (query, passage) pair. Returns one result list per query; each carries
+        the batch's stage timings as `.timings`.
+        """
+        with track("retrieval") as timer:
+            all_results = [RetrievalResults(r) for r in self._run_batch(queries, retrieve_k, filters)]
+        timings = timer.as_dict()
+        for results in all_results:
+            results.timings = timings
+        return all_results
+
+    def _run_batch(self, queries: List[str], retrieve_k: int, filters: Optional[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         start_time = time.time()
-        rag_logger.info(f"🔎 [Retrieval] Searching for: '{query}'")
+        if len(queries) == 1:
+            rag_logger.info(f"🔎 [Retrieval] Searching for: '{queries[0]}'")
+        else:
+            rag_logger.info(f"🔎 [Retrieval] Searching for {len(queries)} queries")
 
         # Retrieval
         try:
-            hits, query_vector = self.retriever.retrieve(query=query, top_k=retrieve_k)
+            hit_lists, query_vectors = self._retrieve_candidates_batch(queries, retrieve_k, filters)
         except Exception as e:
             rag_logger.error(f"❌ [Retrieval] Failed: {e}")
-            return []
-
-        # Filter
-        valid_hits = [h for h in hits if h.payload.get("text") and len(h.payload["text"]) > 20]
-        rag_logger.debug(f"📊 [Retrieval] Hits found: {len(valid_hits)} (Filtered)")
+            return [[] for _ in queries]
 
-        if not valid_hits:
-            rag_logger.warning("⚠️ [Retrieval] No valid documents found.")
-            return []
-
-        # MMR
-        if hasattr(valid_hits[0], 'vector') and valid_hits[0].vector is not None:
-             doc_embeddings = np.array([h.vector for h in valid_hits])
-        else:
-             texts = [h.payload["text"] for h in valid_hits]
-             doc_embeddings = self.embedder.embed(texts)
-
-        selected_indices = mmr.mmr(
-            query_embedding=query_vector,
-            doc_embeddings=doc_embeddings,
-            lambda_=0.7, 
-            k=min(20, len(valid_hits))
-        )
-        mmr_hits = [valid_hits[i] for i in selected_indices]
-
-        # Re-ranking
-        passages = [h.payload["text"] for h in mmr_hits]
-        scores = self.reranker.rerank(query=query, passages=passages)
-        ranked_candidates = sorted(zip(mmr_hits, scores), key=lambda x: x[1], reverse=True)
+        mmr_lists, dense_lists, texts = self._mmr_candidates(hit_lists, query_vectors)
+        ranked_lists = self._rank(queries, mmr_lists, dense_lists, texts)
 
         # Selection
-        final_results = self._select_by_token_budget(ranked_candidates, max_tokens=2500)
+        all_results = []
+        with stage("budget") as s:
+            for ranked_candidates in ranked_lists:
+                if not ranked_candidates:
+                    rag_logger.warning("⚠️ [Retrieval] No valid documents found.")
+                    all_results.append([])
+                    continue
+                all_results.append(self._select_by_token_budget(ranked_candidates, texts, max_tokens=2500))
+            s.count = sum(len(r) for r in all_results)
 
         elapsed = time.time() - start_time
-        
+
         # --- LOGGING ---
-        rag_logger.info(f"✅ [Retrieval] Selected {len(final_results)} documents in {elapsed:.2f}s")
-        for i, res in enumerate(final_results[:3]): # Log top 3 docs title
-            title = res['metadata'].get('title', 'No Title')
-            rag_logger.debug(f"   📄 Doc {i+1}: {title} (Score: {res['score']:.4f})")
+        rag_logger.info(f"✅ [Retrieval] Selected {sum(len(r) for r in all_results)} documents for {len(queries)} queries in {elapsed:.2f}s")
+        for final_results in all_results:
+            for i, res in enumerate(final_results[:3]): # Log top 3 docs title
+                title = res['metadata'].get('title', 'No Title')
+                rag_logger.debug(f"   📄 Doc {i+1}: {title} (Score: {res['score']:.4f})")
         # ------------------------
 
-        return final_results
\ No newline at end of file
+        return all_results
@@ -1,9 +1,14 @@
 from sentence_transformers import CrossEncoder
-from typing import List
+from typing import List, Optional, Tuple
+import torch
+import numpy as np
+from config.config import Config
+from .cache import LRUCache, normalize_query, query_key
 from .logger import logger
 
 
 def truncate(text: str, max_tokens: int = 512) -> str:
+    """Character heuristic (about 4 chars per token) for tokenizers without offset mappings."""
     return text[: max_tokens * 4]
 
 
@@ -11,34 +16,203 @@ class ReRanker:
     def __init__(
         self,
         model_name: str = "BAAI/bge-reranker-v2-m3",
-        device: str = "cuda"
+        device: Optional[str] = None,
+        score_cache: Optional[LRUCache] = None,
+        max_length: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        token_cache: Optional[LRUCache] = None
     ):
         logger.info(f"[RERANKER] loading model: {model_name}")
+        self.model_name = model_name
+        # None = CUDA when available, else CPU
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        logger.info(f"[RERANKER] using device: {self.device}")
+        self.max_length = max_length or Config.RERANK_MAX_LENGTH
         self.model = CrossEncoder(
             model_name,
-            device=device
+            device=self.device,
+            max_length=self.max_length
         )
+        self.tokenizer = self.model.tokenizer
+        # Padded tokens per forward pass (longest pair in the batch x pairs in the batch)
+        self.max_batch_tokens = max_batch_tokens or Config.RERANK_BATCH_TOKENS
+        # Scores by (normalized query, point id); Config.RERANK_CACHE_SIZE = 0 disables it
+        if score_cache is None and Config.RERANK_CACHE_SIZE:
+            score_cache = LRUCache(Config.RERANK_CACHE_SIZE, name="rerank scores")
+        self.score_cache = score_cache
+        # Passage token ids by point id; Config.RERANK_TOKEN_CACHE_SIZE = 0 disables it
+        if token_cache is None and Config.RERANK_TOKEN_CACHE_SIZE:
+            token_cache = LRUCache(Config.RERANK_TOKEN_CACHE_SIZE, name="rerank token ids")
+        self.token_cache = token_cache
 
     def rerank(
         self,
         query: str,
         passages: List[str],
-        batch_size: int = 8
-    ) -> List[float]:
+        batch_size: int = 64,
+        ids: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        Cross-encoder score per passage, in input order. With `ids` (point ids of the passages)
+        cached scores are reused and only the misses go to the model.
+        """
+        return self.rerank_batch([query], [passages], batch_size=batch_size, ids=None if ids is None else [ids])[0]
 
-        logger.info(f"[RERANKER] reranking {len(passages)} passages")
+    def rerank_batch(
+        self,
+        queries: List[str],
+        passages: List[List[str]],
+        batch_size: int = 64,
+        ids: Optional[List[List[str]]] = None,
+        lengths: Optional[List[List[Optional[int]]]] = None
+    ) -> List[np.ndarray]:
+        """
+        Scores for several queries, each with its own passages, in input order. All uncached
+        (query, passage) pairs go through the model together (see _predict).
+
+        lengths: stored token counts of the passages for this model's tokenizer (the "rerank"
+        count in the payload, None where unknown); passages known to fit are not re-tokenized.
+
+        Queries are scored normalized (as the documents were), the form the score cache is keyed on.
+        """
+        queries = [normalize_query(q) for q in queries]
+        scores = [np.full(len(p), np.nan, dtype=np.float32) for p in passages]
+        keys = None
+        if ids is not None and self.score_cache is not None:
+            keys = []
+            for q, (query, point_ids) in enumerate(zip(queries, ids)):
+                q_key = query_key(self.model_name, query)
+                keys.append([(q_key, str(point_id)) for point_id in point_ids])
+                scores[q][:] = [self.score_cache.get(key, np.nan) for key in keys[q]]
+
+        missing = [(q, i) for q in range(len(queries)) for i in np.flatnonzero(np.isnan(scores[q]))]
+        logger.info(f"[RERANKER] {sum(len(p) for p in passages) - len(missing)} cached scores, {len(missing)} to compute")
+        if missing:
+            computed = self._predict(
+                [(queries[q], passages[q][i]) for q, i in missing],
+                batch_size,
+                lengths=[lengths[q][i] for q, i in missing] if lengths is not None else None,
+                point_ids=[str(ids[q][i]) for q, i in missing] if ids is not None else None
+            )
+            for (q, i), score in zip(missing, computed):
+                scores[q][i] = score
+                if keys is not None:
+                    self.score_cache.put(keys[q][i], float(score))
+        return scores
+
+    def _query_ids(self, queries: List[str]) -> dict:
+        queries = list(dict.fromkeys(queries))
+        return dict(zip(queries, self.tokenizer(queries, add_special_tokens=False)["input_ids"]))
+
+    def _truncate_pairs(self, pairs: List[tuple], lengths: Optional[List[Optional[int]]] = None) -> Tuple[List[tuple], List[int]]:
+        """
+        Cuts each passage at a token boundary so that query + passage + special tokens fit
+        max_length, and returns the pairs with their token lengths. Only passages without a
+        known length, or known to be too long, are tokenized.
+        """
+        if not getattr(self.tokenizer, "is_fast", False):
+            pairs = [(q, truncate(p, self.max_length)) for q, p in pairs]
+            return pairs, [len(q) // 4 + len(p) // 4 for q, p in pairs]
+
+        specials = self.tokenizer.num_special_tokens_to_add(pair=True)
+        query_ids = self._query_ids([q for q, _ in pairs])
+        # Long queries keep at least a quarter of the window for the passage
+        budgets = [max(self.max_length - specials - len(query_ids[q]), self.max_length // 4) for q, _ in pairs]
+        passage_lengths = list(lengths) if lengths is not None else [None] * len(pairs)
 
-        passages = [
-            truncate(p)
-            for p in passages
+        to_cut = [j for j, n in enumerate(passage_lengths) if n is None or n > budgets[j]]
+        truncated = list(pairs)
+        if to_cut:
+            encoded = self.tokenizer([pairs[j][1] for j in to_cut], add_special_tokens=False, return_offsets_mapping=True)
+            for j, offsets in zip(to_cut, encoded["offset_mapping"]):
+                query, passage = pairs[j]
+                if len(offsets) > budgets[j]:
+                    passage = passage[:offsets[budgets[j] - 1][1]]
+                truncated[j] = (query, passage)
+                passage_lengths[j] = len(offsets)
+
+        token_lengths = [
+            min(len(query_ids[q]) + min(n, budget) + specials, self.max_length)
+            for (q, _), n, budget in zip(pairs, passage_lengths, budgets)
         ]
+        return truncated, token_lengths
 
-        pairs = [(query, p) for p in passages]
+    def _encode_ids(self, pairs: List[tuple], point_ids: List[str]) -> Tuple[List[tuple], List[int]]:
+        """
+        (query ids, passage ids) per pair, with passage ids from the token cache (tokenized
+        once per point, truncated to max_length), and the pairs' token lengths.
+        """
+        specials = self.tokenizer.num_special_tokens_to_add(pair=True)
+        query_ids = self._query_ids([q for q, _ in pairs])
 
-        scores = self.model.predict(
-            pairs,
-            batch_size=batch_size,
-            show_progress_bar=False
-        )
+        passage_ids = {}
+        for j, point_id in enumerate(point_ids):
+            cached = self.token_cache.get((self.model_name, point_id))
+            if cached is not None:
+                passage_ids[point_id] = cached
+        to_encode = {point_id: pairs[j][1] for j, point_id in enumerate(point_ids) if point_id not in passage_ids}
+        if to_encode:
+            encoded = self.tokenizer(
+                list(to_encode.values()), add_special_tokens=False, truncation=True, max_length=self.max_length
+            )["input_ids"]
+            for point_id, token_ids in zip(to_encode, encoded):
+                token_ids = np.asarray(token_ids, dtype=np.int32)
+                token_ids.setflags(write=False)  # shared between calls
+                self.token_cache.put((self.model_name, point_id), token_ids)
+                passage_ids[point_id] = token_ids
+
+        inputs, token_lengths = [], []
+        for (query, _), point_id in zip(pairs, point_ids):
+            q_ids = query_ids[query]
+            budget = max(self.max_length - specials - len(q_ids), self.max_length // 4)
+            p_ids = passage_ids[point_id][:budget]
+            inputs.append((q_ids, p_ids.tolist()))
+            token_lengths.append(min(len(q_ids) + len(p_ids) + specials, self.max_length))
+        return inputs, token_lengths
+
+    def _forward_ids(self, inputs: List[tuple]) -> np.ndarray:
+        """CrossEncoder.predict on token ids instead of texts (same activation)."""
+        features = [
+            self.tokenizer.prepare_for_model(q_ids, p_ids, truncation="longest_first", max_length=self.max_length)
+            for q_ids, p_ids in inputs
+        ]
+        batch = self.tokenizer.pad(features, padding=True, return_tensors="pt")
+        batch = {name: tensor.to(self.device) for name, tensor in batch.items()}
+        with torch.inference_mode():
+            logits = self.model.model(**batch, return_dict=True).logits
+            activation = getattr(self.model, "activation_fn", None) or getattr(self.model, "default_activation_function", None)
+            if activation is not None:
+                logits = activation(logits)
+        return logits[:, 0].float().cpu().numpy()
+
+    def _predict(
+        self,
+        pairs: List[tuple],
+        batch_size: int,
+        lengths: Optional[List[Optional[int]]] = None,
+        point_ids: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """
+        Scores in input order. Pairs are sorted by token length and grouped so that each
+        batch stays under max_batch_tokens of padded input (and at most batch_size pairs).
+        With the token cache and point ids, the model runs on cached passage ids.
+        """
+        logger.info(f"[RERANKER] reranking {len(pairs)} pairs")
+        if self.token_cache is not None and point_ids is not None:
+            inputs, token_lengths = self._encode_ids(pairs, point_ids)
+            forward = self._forward_ids
+        else:
+            inputs, token_lengths = self._truncate_pairs(pairs, lengths)
+            forward = lambda batch: self.model.predict(batch, batch_size=len(batch), show_progress_bar=False)
+        order = np.argsort(-np.asarray(token_lengths), kind="stable")
+
+        scores = np.empty(len(inputs), dtype=np.float32)
+        start = 0
+        while start < len(order):
+            # Sorted longest first: the first pair of a batch sets its padded length
+            per_batch = max(1, min(batch_size, self.max_batch_tokens // max(token_lengths[order[start]], 1)))
+            batch = order[start:start + per_batch]
+            scores[batch] = forward([inputs[j] for j in batch])
+            start += per_batch
 
         return scores
@@ -1,44 +1,336 @@
 from qdrant_client import QdrantClient
-from typing import List, Any
+from qdrant_client.http import models
+from typing import List, Any, Dict, Optional
+import numpy as np
+from config.config import Config
+from indexing.src.qdrant_pool import get_client, release_client
+from .cache import LRUCache, normalize_query, query_key
+from .filters import build_filter, filter_conditions
+from .timing import stage
 from .logger import logger
 
+
+def build_search_params(oversampling: Optional[float] = None, rescore: Optional[bool] = None):
+    if oversampling is None and rescore is None:
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(
+            ignore=False,
+            rescore=rescore,
+            oversampling=oversampling
+        )
+    )
+
 class Retriever:
     def __init__(
         self,
         qdrant_path: str,
         collection_name: str,
-        embedder
+        embedder,
+        local_vectors=None,
+        query_cache: Optional[LRUCache] = None,
+        client: Optional[QdrantClient] = None,
+        ann_index=None
     ):
-        logger.info(f"[RETRIEVER] Connecting to Qdrant at: {qdrant_path}")
-        self.client = QdrantClient(path=qdrant_path)
+        logger.info(f"[RETRIEVER] Connecting to Qdrant at: {Config.QDRANT_URL or qdrant_path}")
+        # Shared client (see indexing/src/qdrant_pool.py): one connection per process and target
+        self.client = client or get_client(qdrant_path)
+        # Injected clients belong to the caller
+        self._owns_client = client is None
         self.collection_name = collection_name
         self.embedder = embedder
+        # Optional LocalVectorStore: candidate vectors come from a local memmap instead of the search response
+        self.local_vectors = local_vectors
+        # Optional AnnIndex (hnswlib / FAISS): unfiltered dense search skips Qdrant's local-mode scan
+        self.ann_index = ann_index
+        # Query vectors by (model, E5 prefix, normalized query); Config.QUERY_CACHE_SIZE = 0 disables it
+        if query_cache is None and Config.QUERY_CACHE_SIZE:
+            clean_name = embedder.model_name.split("/")[-1]
+            cache_path = Config.QUERY_CACHE_DIR / f"query_vectors_{clean_name}.pkl" if Config.QUERY_CACHE_DIR else None
+            query_cache = LRUCache(Config.QUERY_CACHE_SIZE, path=cache_path, name="query vectors")
+        self.query_cache = query_cache
+        # Collection name -> has a quantization config (see _search_params)
+        self._quantized: Dict[str, bool] = {}
+
+    def _search_params(self, oversampling: Optional[float], rescore: Optional[bool]):
+        """
+        Search params; on quantized collections unset values default to Config.SEARCH_OVERSAMPLING /
+        SEARCH_RESCORE. Embedded local mode does not quantize, so it never gets those defaults.
+        """
+        if not Config.QDRANT_URL:
+            return build_search_params(oversampling, rescore)
+        if self.collection_name not in self._quantized:
+            info = self.client.get_collection(self.collection_name)
+            self._quantized[self.collection_name] = info.config.quantization_config is not None
+        if self._quantized[self.collection_name]:
+            oversampling = Config.SEARCH_OVERSAMPLING if oversampling is None else oversampling
+            rescore = Config.SEARCH_RESCORE if rescore is None else rescore
+        return build_search_params(oversampling, rescore)
+
+    def retrieve(
+        self,
+        query: str,
+        top_k: int = 40,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        with_vectors: Optional[bool] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+            """
+            oversampling / rescore only matter for quantized collections: fetch
+            top_k * oversampling candidates from the compressed index, then (if rescore)
+            re-score them with the original vectors. None means Config.SEARCH_OVERSAMPLING /
+            SEARCH_RESCORE when the collection is quantized.
+
+            with_vectors=None ships vectors back only when there is no local vector store;
+            with False the hits carry ids, scores and payloads only (see candidate_vectors).
+
+            filters: {"domain", "authority", "date_from", "date_to"} (see filters.py), applied
+            inside the ANN search on the indexed payload fields.
+
+            With an AnnIndex, unfiltered searches go to it (oversampling / rescore do not apply);
+            filtered ones stay on Qdrant.
+            """
+            if with_vectors is None:
+                with_vectors = self.local_vectors is None
 
-    def retrieve(self, query: str, top_k: int = 40):
             logger.info("[RETRIEVER] embedding query")
             
             # Embed the query
-            query_vector = self.embedder.embed([query], is_query=True)[0]
+            with stage("embed", count=1):
+                query_vector = self.embed_query(query)
 
             logger.info(f"[RETRIEVER] searching top_k={top_k}")
 
             # Search Qdrant
-            response = self.client.query_points(
-                collection_name=self.collection_name,
-                query=query_vector,
+            with stage("search") as s:
+                if self._use_ann(filters):
+                    hits = self._ann_search([query_vector], top_k, with_vectors)[0]
+                else:
+                    response = self.client.query_points(
+                        collection_name=self.collection_name,
+                        query=query_vector,
+                        query_filter=build_filter(filters),
+                        limit=top_k,
+                        search_params=self._search_params(oversampling, rescore),
+                        with_payload=True,
+                        with_vectors=with_vectors
+                    )
+
+                    # Extract the list
+                    hits = response.points
+                s.count = len(hits)
+
+            logger.info(f"[RETRIEVER] retrieved {len(hits)} hits")
+            return hits, query_vector
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        (n, dim) query vectors: cached ones from the LRU, all others in a single encoder call.
+        Queries are embedded normalized (as the documents were), so spellings that share a
+        cache key also share the vector.
+        """
+        queries = [normalize_query(q) for q in queries]
+        if self.query_cache is None:
+            return self.embedder.embed(queries, is_query=True)
+
+        # Keyed on the exact text the encoder sees
+        prefix = "query: " if self.embedder.is_e5 else ""
+        keys = [query_key(self.embedder.model_name, prefix + q) for q in queries]
+        vectors = [self.query_cache.get(key) for key in keys]
+
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            computed = self.embedder.embed([queries[i] for i in missing], is_query=True)
+            for i, query_vector in zip(missing, computed):
+                query_vector.setflags(write=False)  # shared between callers
+                self.query_cache.put(keys[i], query_vector)
+                vectors[i] = query_vector
+        return np.stack(vectors)
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: int = 40,
+        oversampling: Optional[float] = None,
+        rescore: Optional[bool] = None,
+        with_vectors: Optional[bool] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """
+        retrieve() for many queries: one encoder call and one batched Qdrant request.
+        Returns (one hit list per query, (n, dim) query vectors).
+        """
+        if with_vectors is None:
+            with_vectors = self.local_vectors is None
+        if not queries:
+            return [], np.empty((0, self.embedder.get_dimension()), dtype=np.float32)
+
+        logger.info(f"[RETRIEVER] embedding {len(queries)} queries")
+        with stage("embed", count=len(queries)):
+            query_vectors = self.embed_queries(queries)
+
+        if self._use_ann(filters):
+            logger.info(f"[RETRIEVER] ANN search of {len(queries)} queries, top_k={top_k}")
+            with stage("search") as s:
+                hit_lists = self._ann_search(query_vectors, top_k, with_vectors)
+                s.count = sum(len(hits) for hits in hit_lists)
+            return hit_lists, query_vectors
+
+        query_filter = build_filter(filters)
+        search_params = self._search_params(oversampling, rescore)
+        requests = [
+            models.QueryRequest(
+                query=query_vector.tolist(),
+                filter=query_filter,
+                params=search_params,
                 limit=top_k,
                 with_payload=True,
-                with_vectors=True 
+                with_vector=with_vectors
             )
-            
-            # Extract the list
-            hits = response.points 
+            for query_vector in query_vectors
+        ]
 
-            logger.info(f"[RETRIEVER] retrieved {len(hits)} hits")
-            return hits, query_vector
+        logger.info(f"[RETRIEVER] batch search of {len(requests)} queries, top_k={top_k}")
+        with stage("search") as s:
+            responses = self.client.query_batch_points(collection_name=self.collection_name, requests=requests)
+            s.count = sum(len(response.points) for response in responses)
+        return [response.points for response in responses], query_vectors
+
+    def _use_ann(self, filters: Optional[Dict[str, Any]]) -> bool:
+        return self.ann_index is not None and not filter_conditions(filters)
+
+    def _ann_search(self, query_vectors, top_k: int, with_vectors: bool):
+        """AnnIndex ids + scores, with payloads (and vectors) read from Qdrant for the hits only."""
+        id_lists, score_lists = self.ann_index.search(query_vectors, top_k)
+        unique_ids = list(dict.fromkeys(pid for ids in id_lists for pid in ids))
+        points = {
+            str(p.id): p
+            for p in self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=unique_ids,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+        } if unique_ids else {}
+
+        # Same shape as query_points hits; ids missing from Qdrant (index out of sync) are dropped
+        return [
+            [
+                models.ScoredPoint(id=points[pid].id, version=0, score=score, payload=points[pid].payload, vector=points[pid].vector)
+                for pid, score in zip(ids, scores) if pid in points
+            ]
+            for ids, scores in zip(id_lists, score_lists)
+        ]
+
+    def retrieve_groups(
+        self,
+        query: str,
+        top_k: int = 40,
+        group_size: int = 1,
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Qdrant group-by on doc_id: the best `group_size` chunks of each of the top_k judgments,
+        flattened best first. RetrievalPipeline collapses locally instead (see collapse_by_doc),
+        which also covers fused BM25 hits and batched requests.
+        """
+        query_vector = self.embed_query(query)
+        response = self.client.query_points_groups(
+            collection_name=self.collection_name,
+            query=query_vector,
+            group_by="doc_id",
+            limit=top_k,
+            group_size=group_size,
+            query_filter=build_filter(filters),
+            with_payload=True,
+            with_vectors=self.local_vectors is None
+        )
+        hits = sorted((hit for group in response.groups for hit in group.hits), key=lambda h: h.score, reverse=True)
+        return hits, query_vector
+
+    def fetch_points(self, point_ids: List[str], with_vectors: bool = False, filters: Optional[Dict[str, Any]] = None):
+        """
+        Payloads (and optionally vectors) of points found outside dense search, e.g. by BM25.
+        With filters, points that do not match are dropped.
+        """
+        if not point_ids:
+            return []
+        conditions = filter_conditions(filters)
+        if not conditions:
+            return self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=point_ids,
+                with_payload=True,
+                with_vectors=with_vectors
+            )
+        points, _ = self.client.scroll(
+            collection_name=self.collection_name,
+            scroll_filter=models.Filter(must=[models.HasIdCondition(has_id=point_ids), *conditions]),
+            limit=len(point_ids),
+            with_payload=True,
+            with_vectors=with_vectors
+        )
+        return points
+
+    def facet_values(self, field: str, batch_size: int = 1024) -> List[str]:
+        """Distinct values of a payload field (for filter widgets), by scrolling that field only."""
+        values = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                self.collection_name, limit=batch_size, offset=offset, with_payload=[field], with_vectors=False
+            )
+            values.update(p.payload[field] for p in points if p.payload.get(field))
+            if offset is None:
+                break
+        return sorted(values)
+
+    def candidate_vectors(self, hits) -> np.ndarray:
+        """
+        float32 (n, dim) vectors of `hits`, in order: from the hits themselves when they carry
+        vectors, else from the local vector store, else fetched from Qdrant for just these ids.
+        """
+        if hits and all(h.vector is not None for h in hits):
+            return np.asarray([h.vector for h in hits], dtype=np.float32)
+
+        ids = [str(h.id) for h in hits]
+        if self.local_vectors is not None:
+            vectors, missing = self.local_vectors.get_many(ids)
+        else:
+            vectors = np.zeros((len(ids), self.embedder.get_dimension()), dtype=np.float32)
+            missing = list(range(len(ids)))
+
+        # Hits that came back with vectors (e.g. the dense half of a hybrid candidate list)
+        for i in list(missing):
+            if hits[i].vector is not None:
+                vectors[i] = hits[i].vector
+        missing = [i for i in missing if hits[i].vector is None]
+
+        if missing:
+            logger.info(f"[RETRIEVER] fetching {len(missing)} vectors from Qdrant")
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[ids[i] for i in missing],
+                with_payload=False,
+                with_vectors=True
+            )
+            fetched = {str(p.id): p.vector for p in points}
+            for i in missing:
+                if ids[i] in fetched:
+                    vectors[i] = fetched[ids[i]]
+        return vectors
     
     def close(self):
         """Explicitly closes the Qdrant connection to prevent shutdown errors."""
+        if self.query_cache is not None:
+            self.query_cache.save()
+            logger.info(f"[RETRIEVER] Query cache: {self.query_cache.stats()}")
         if self.client:
-            self.client.close()
-            logger.info("[RETRIEVER] Connection closed.")
\ No newline at end of file
+            if self._owns_client:
+                release_client(self.client)
+                logger.info("[RETRIEVER] Connection closed.")
+            self.client = None
\ No newline at end of file
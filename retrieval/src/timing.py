@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional
+import numpy as np
+
+_current: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """
+    Per-request stage timings (time.perf_counter) and candidate counts.
+
+    Stages are recorded with `stage(name)` anywhere below `track()`; a stage entered
+    twice accumulates its time and count.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._start = time.perf_counter()
+        self.total_ms: Optional[float] = None
+        self._lock = threading.Lock()  # stages may finish on executor threads (RAGPipeline.arun)
+
+    def add(self, stage_name: str, seconds: float, count: Optional[int] = None):
+        with self._lock:
+            entry = self.stages.setdefault(stage_name, {"ms": 0.0, "count": None})
+            entry["ms"] += seconds * 1000
+            if count is not None:
+                entry["count"] = (entry["count"] or 0) + count
+
+    def merge(self, other: "StageTimer"):
+        """Adds the stages of a timer that ran separately (e.g. speculative work that was used)."""
+        with other._lock:
+            stages = [(k, v["ms"], v["count"]) for k, v in other.stages.items()]
+        for stage_name, ms, count in stages:
+            self.add(stage_name, ms / 1000, count)
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+
+    def as_dict(self) -> Dict[str, Any]:
+        total_ms = self.total_ms if self.total_ms is not None else (time.perf_counter() - self._start) * 1000
+        with self._lock:
+            stages = {k: {"ms": round(v["ms"], 2), "count": v["count"]} for k, v in self.stages.items()}
+        return {"total_ms": round(total_ms, 2), "stages": stages}
+
+
+class _Stage:
+    """Handle yielded by stage(): set `count` to the number of candidates the stage produced."""
+    count: Optional[int] = None
+
+
+@contextmanager
+def track(name: str):
+    """
+    Starts a StageTimer for one request, or joins the one already running (RAGPipeline ->
+    RetrievalPipeline), so nested pipelines report one flat breakdown. The outermost call
+    records the result in the process-wide LATENCY stats.
+    """
+    timer = _current.get()
+    if timer is not None:
+        yield timer
+        return
+
+    timer = StageTimer(name)
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+        timer.finish()
+        LATENCY.record(timer)
+
+
+@contextmanager
+def use_timer(timer: StageTimer):
+    """Records stages into `timer` instead of the request's own, without reporting it to LATENCY."""
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name: str, count: Optional[int] = None):
+    """Times a block into the current StageTimer (no-op outside track())."""
+    handle = _Stage()
+    handle.count = count
+    start = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        timer = _current.get()
+        if timer is not None:
+            timer.add(name, time.perf_counter() - start, handle.count)
+
+
+def share_timings(timings: Dict[str, Any], n: int) -> Dict[str, Any]:
+    """One query's share (1/n of the time) of a batch's timings, e.g. RetrievalPipeline.run_batch of n queries."""
+    return {
+        "total_ms": round(timings["total_ms"] / n, 2),
+        "stages": {k: {"ms": round(v["ms"] / n, 2), "count": v["count"]} for k, v in timings["stages"].items()},
+    }
+
+
+def current_timings() -> Optional[Dict[str, Any]]:
+    timer = _current.get()
+    return timer.as_dict() if timer is not None else None
+
+
+class LatencyStats:
+    """Rolling p50 / p95 / p99 per stage over the last `window` requests of this process."""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timer: StageTimer):
+        with self._lock:
+            samples = [(f"{timer.name}.total", timer.total_ms)]
+            samples += [(f"{timer.name}.{k}", v["ms"]) for k, v in timer.as_dict()["stages"].items()]
+            for key, ms in samples:
+                self._samples.setdefault(key, deque(maxlen=self.window)).append(ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {k: np.asarray(v) for k, v in self._samples.items()}
+        return {
+            key: {
+                "n": len(values),
+                "p50": round(float(np.percentile(values, 50)), 2),
+                "p95": round(float(np.percentile(values, 95)), 2),
+                "p99": round(float(np.percentile(values, 99)), 2),
+            }
+            for key, values in snapshot.items()
+        }
+
+
+# Process-wide rolling latency aggregates (read by the UI / run_rag.py debug views)
+LATENCY = LatencyStats()
+
+
+def format_timings(timings: Dict[str, Any]) -> str:
+    """One line per stage (ms, candidate count) for console debug output."""
+    lines = [f"{'stage':<14}{'ms':>10}{'count':>8}"]
+    for name, entry in timings["stages"].items():
+        count = "" if entry["count"] is None else entry["count"]
+        lines.append(f"{name:<14}{entry['ms']:>10.1f}{count:>8}")
+    lines.append(f"{'total':<14}{timings['total_ms']:>10.1f}")
+    return "\n".join(lines)
+
+
+def format_summary(summary: Dict[str, Dict[str, float]]) -> str:
+    """Rolling percentiles (LatencyStats.summary) as a table."""
+    lines = [f"{'stage':<24}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}"]
+    for name, s in summary.items():
+        lines.append(f"{name:<24}{s['n']:>6}{s['p50']:>10.1f}{s['p95']:>10.1f}{s['p99']:>10.1f}")
+    return "\n".join(lines)
@@ -13,11 +13,16 @@ sys.path.append(str(project_root))
 
 from config.config import Config
 from indexing.src.embedding import Embedder
+from indexing.src.doc_store import DocStore
+from indexing.src.vector_store import LocalVectorStore
+from indexing.src.ann_index import AnnIndex
+from indexing.src.bm25 import Bm25Index
 from retrieval.src.retriever import Retriever
 from retrieval.src.reranker import ReRanker
 from retrieval.src.pipeline import RetrievalPipeline
 from rag_llm.src.llm_client import LLMClient
 from rag_llm.src.rag_pipeline import RAGPipeline
+from retrieval.src.timing import LATENCY
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="دستیار قضایی", page_icon="⚖️", layout="wide")
@@ -41,7 +46,7 @@ def get_reranker():
     return ReRanker("BAAI/bge-reranker-v2-m3")
 
 # LOAD SEARCH ENGINE (Embedder + Qdrant Connection)
-# We MUST cache the Retriever to prevent Qdrant from trying to open the DB twice.
+# Cached so models load once per session; the Qdrant client itself is shared per process (qdrant_pool).
 @st.cache_resource(show_spinner="در حال اتصال به پایگاه داده و مدل Embedding...")
 def get_search_engine(model_name):
     # Explicit garbage collection to release old locks/memory if switching
@@ -55,20 +60,50 @@ def get_search_engine(model_name):
     collection_name = f"legal_rag_{clean_name}"
     db_path = Config.DB_ROOT_DIR / f"qdrant_{clean_name}"
 
-    if not db_path.exists():
-        return None, None, f"پایگاه داده برای {clean_name} یافت نشد."
+    if not Config.QDRANT_URL and not db_path.exists():
+        return None, None, None, None, f"پایگاه داده برای {clean_name} یافت نشد."
 
     # Load Model
-    embedder = Embedder(model_name=model_name, is_e5=is_e5)
+    embedder = Embedder.from_config(model_name, is_e5=is_e5)
     
+    # Local float32 vectors for MMR (Qdrant then returns ids + scores only)
+    local_vectors = None
+    if Config.USE_LOCAL_VECTORS:
+        local_vectors = LocalVectorStore(
+            str(Config.DB_ROOT_DIR / f"vectors_{clean_name}"), embedder.get_dimension(), read_only=True
+        )
+
     # Connect to Qdrant
     retriever = Retriever(
         qdrant_path=str(db_path), 
         collection_name=collection_name, 
-        embedder=embedder
+        embedder=embedder,
+        local_vectors=local_vectors,
+        # In-process HNSW / IVF index instead of Qdrant's local scan
+        ann_index=AnnIndex.from_config(
+            embedder.get_dimension(), read_only=True, path=str(Config.DB_ROOT_DIR / f"ann_{Config.ANN_BACKEND}_{clean_name}")
+        )
     )
+
+    # Side store for lean payloads (text + metadata)
+    doc_store = None
+    if Config.USE_DOC_STORE:
+        doc_store = DocStore(str(Config.DB_ROOT_DIR / f"docstore_{clean_name}.sqlite"))
+
+    # Lexical index for hybrid retrieval
+    bm25 = None
+    if Config.USE_BM25:
+        bm25 = Bm25Index(str(Config.DB_ROOT_DIR / f"bm25_{clean_name}"))
     
-    return embedder, retriever, None
+    return embedder, retriever, doc_store, bm25, None
+
+# FILTER OPTIONS (distinct payload values of the loaded collection)
+@st.cache_data(show_spinner=False)
+def get_filter_options(model_name):
+    _, retriever, _, _, error_msg = get_search_engine(model_name)
+    if error_msg:
+        return [], []
+    return retriever.facet_values("domain"), retriever.facet_values("authority")
 
 # LOAD LLM
 def get_llm_client(model_name, temp, top_p, api_key):
@@ -110,6 +145,17 @@ with st.sidebar:
         st.session_state.messages = []
         st.rerun()
 
+    # Debug view: per-answer stage breakdown + rolling percentiles of this process
+    show_timings = st.checkbox("🛠️ نمایش زمان‌بندی مراحل (Debug)", value=False)
+    if show_timings:
+        latency = LATENCY.summary()
+        if latency:
+            st.caption("تأخیر مراحل در این فرایند (ms)")
+            st.dataframe(
+                [{"stage": name, **stats} for name, stats in latency.items()],
+                hide_index=True, use_container_width=True
+            )
+
 # --- INIT ---
 load_dotenv()
 api_key = os.getenv("AVALAI_API_KEY")
@@ -120,7 +166,7 @@ if not api_key:
 # Get Cached Resources
 try:
     reranker = get_reranker()
-    embedder, retriever, error_msg = get_search_engine(selected_embedding)
+    embedder, retriever, doc_store, bm25, error_msg = get_search_engine(selected_embedding)
     
     if error_msg:
         st.error(f"⛔ خطا: {error_msg}")
@@ -131,8 +177,22 @@ except Exception as e:
     st.error(f"خطای سیستمی: {e}")
     st.stop()
 
+# --- FILTERS (options come from the loaded collection) ---
+YEAR_RANGE = (1380, 1405)
+domain_options, authority_options = get_filter_options(selected_embedding)
+with st.sidebar:
+    st.markdown("---")
+    st.subheader("فیلتر آرا")
+    selected_domains = st.multiselect("حوزه", domain_options)
+    selected_authorities = st.multiselect("مرجع صادرکننده", authority_options)
+    selected_years = st.slider("سال صدور", YEAR_RANGE[0], YEAR_RANGE[1], YEAR_RANGE)
+
+search_filters = {"domain": selected_domains, "authority": selected_authorities}
+if selected_years != YEAR_RANGE:
+    search_filters["date_from"], search_filters["date_to"] = selected_years
+
 # Build Pipeline
-retrieval_pipe = RetrievalPipeline(retriever, reranker, embedder)
+retrieval_pipe = RetrievalPipeline(retriever, reranker, embedder, doc_store=doc_store, bm25=bm25)
 llm = get_llm_client(selected_llm, temperature, top_p, api_key)
 rag = RAGPipeline(retrieval_pipeline=retrieval_pipe, llm_client=llm)
 
@@ -178,12 +238,23 @@ def render_citations(result_data):
             with cols[i % 3]:
                 st.markdown(html, unsafe_allow_html=True)
 
+def render_timings(result_data):
+    timings = result_data.get('timings')
+    if not show_timings or not timings: return
+
+    with st.expander(f"⏱️ زمان‌بندی مراحل: {timings['total_ms']:.0f} ms"):
+        st.dataframe(
+            [{"stage": name, "ms": entry["ms"], "count": entry["count"]} for name, entry in timings["stages"].items()],
+            hide_index=True, use_container_width=True
+        )
+
 # --- CHAT LOOP ---
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
         if message["role"] == "assistant" and "rag_result" in message:
             render_citations(message["rag_result"])
+            render_timings(message["rag_result"])
 
 query = st.chat_input("سوال خود را بپرسید...")
 
@@ -205,7 +276,7 @@ if query:
             ]
             
             start_time = time.time()
-            result = rag.run(query, chat_history_for_llm)
+            result = rag.run(query, chat_history_for_llm, filters=search_filters)
             end_time = time.time()
             
             status.write(f"🔍 جستجو برای: **{result['rewritten_query']}**")
@@ -214,6 +285,7 @@ if query:
             
             placeholder.markdown(result['answer'])
             render_citations(result)
+            render_timings(result)
             
             st.session_state.messages.append({
                 "role": "assistant", 